@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Cognito username/password authentication for the direct-auth MCP clients
+Caches tokens on disk so concurrent and repeated runs on a host share them
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from file_store import CACHE_DIR, LockedJsonStore
+
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'cognito-tokens.json')
+
+# Refresh in the background once a token is this close to expiry
+REFRESH_MARGIN = 300
+# Below this, a cached token is too close to expiry to hand out at all
+MIN_TOKEN_LIFETIME = 30
+# A failed background refresh is retried after this many seconds, doubling up to the max
+BACKGROUND_RETRY_DELAY = 5
+BACKGROUND_RETRY_MAX_DELAY = 60
+
+
+def calculate_secret_hash(username, client_id, client_secret):
+    """Calculate SECRET_HASH for Cognito"""
+    message = username + client_id
+    dig = hmac.new(
+        client_secret.encode('utf-8'),
+        message.encode('utf-8'),
+        hashlib.sha256
+    ).digest()
+    return base64.b64encode(dig).decode()
+
+
+class TokenCache(LockedJsonStore):
+    """Token store shared by every process on the host.
+
+    Entries are keyed by pool, client and user.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(path or os.getenv('COGNITO_TOKEN_CACHE', DEFAULT_CACHE_PATH))
+
+    @staticmethod
+    def key(user_pool_id, client_id, username):
+        raw = f"{user_pool_id}|{client_id}|{username}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class CognitoError(Exception):
+    """Auth failure raised by Cognito stand-ins such as fake_mcp_server.FakeCognito"""
+
+
+def _client_error():
+    """Exceptions that mean Cognito refused us; botocore is imported only when matching"""
+    try:
+        from botocore.exceptions import ClientError
+    except ImportError:
+        return CognitoError
+    return (ClientError, CognitoError)
+
+
+def _cognito_errors():
+    """_client_error() plus botocore's own failures (endpoint unreachable, read timeout)"""
+    try:
+        from botocore.exceptions import BotoCoreError, ClientError
+    except ImportError:
+        return CognitoError
+    return (ClientError, BotoCoreError, CognitoError)
+
+
+_client_override = None
+
+
+def use_cognito_client(client):
+    """Send Cognito calls to `client` (e.g. fake_mcp_server.FakeCognito); None restores boto3"""
+    global _client_override
+    _client_override = client
+
+
+def _cognito_client():
+    return _client_override or _boto3_cognito_client()
+
+
+@functools.lru_cache(maxsize=None)
+def _boto3_cognito_client():
+    # boto3 costs a few hundred ms to import and build a client, so only
+    # pay for it when the token cache can't serve the run
+    import boto3
+    return boto3.session.Session().client('cognito-idp')
+
+
+def _initiate_auth(user_pool_id, client_id, auth_flow, auth_parameters):
+    response = _cognito_client().admin_initiate_auth(
+        UserPoolId=user_pool_id,
+        ClientId=client_id,
+        AuthFlow=auth_flow,
+        AuthParameters=auth_parameters
+    )
+    result = response['AuthenticationResult']
+    return {
+        'access_token': result['AccessToken'],
+        # REFRESH_TOKEN_AUTH doesn't return a new refresh token
+        'refresh_token': result.get('RefreshToken'),
+        'expires_at': time.time() + result.get('ExpiresIn', 3600)
+    }
+
+
+def _login(user_pool_id, client_id, client_secret, username, password):
+    return _initiate_auth(user_pool_id, client_id, 'ADMIN_NO_SRP_AUTH', {
+        'USERNAME': username,
+        'PASSWORD': password,
+        'SECRET_HASH': calculate_secret_hash(username, client_id, client_secret)
+    })
+
+
+def _refresh(user_pool_id, client_id, client_secret, username, refresh_token):
+    entry = _initiate_auth(user_pool_id, client_id, 'REFRESH_TOKEN_AUTH', {
+        'REFRESH_TOKEN': refresh_token,
+        'SECRET_HASH': calculate_secret_hash(username, client_id, client_secret)
+    })
+    entry['refresh_token'] = entry['refresh_token'] or refresh_token
+    return entry
+
+
+def _renew(cache, key, user_pool_id, client_id, client_secret, username, password):
+    """Renew a token (refresh first, then full login); call under the exclusive lock"""
+    entry = cache.get(key) or {}
+    renewed = None
+    if entry.get('refresh_token'):
+        try:
+            renewed = _refresh(user_pool_id, client_id, client_secret, username, entry['refresh_token'])
+        except _client_error():
+            renewed = None  # Refresh token expired or revoked; log in again
+    if renewed is None:
+        renewed = _login(user_pool_id, client_id, client_secret, username, password)
+    cache.put(key, renewed)
+    return renewed
+
+
+def _background_refresh(cache, key, user_pool_id, client_id, client_secret, username, password,
+                        retry_delay=BACKGROUND_RETRY_DELAY):
+    # Non-blocking: if another process holds the lock it is already renewing
+    with cache.locked(exclusive=True, blocking=False) as acquired:
+        if not acquired:
+            return
+        entry = cache.get(key) or {}
+        remaining = entry.get('expires_at', 0) - time.time()
+        if remaining > REFRESH_MARGIN:
+            return
+        try:
+            _renew(cache, key, user_pool_id, client_id, client_secret, username, password)
+            return
+        except _cognito_errors() as e:
+            error = e
+
+    # Once the token is under MIN_TOKEN_LIFETIME, callers renew synchronously
+    if remaining - retry_delay <= MIN_TOKEN_LIFETIME:
+        print(f"⚠️  Background token refresh failed: {error}; the next call renews synchronously")
+        return
+    print(f"⚠️  Background token refresh failed: {error}; retrying in {retry_delay}s")
+    # A daemon timer, so a short-lived run doesn't wait out a Cognito outage before exiting
+    retry = threading.Timer(
+        retry_delay, _background_refresh,
+        args=(cache, key, user_pool_id, client_id, client_secret, username, password),
+        kwargs={'retry_delay': min(retry_delay * 2, BACKGROUND_RETRY_MAX_DELAY)}
+    )
+    retry.daemon = True
+    retry.start()
+
+
+def get_access_token(user_pool_id, client_id, client_secret, username, password, cache=None):
+    """Return a valid access token, going to Cognito only when the cache can't serve one.
+
+    A cached token is reused until REFRESH_MARGIN seconds before expiry.
+    Inside that window it is still returned, while a background thread
+    renews it through REFRESH_TOKEN_AUTH for the next caller.
+    """
+    cache = cache or TokenCache()
+    key = TokenCache.key(user_pool_id, client_id, username)
+
+    with cache.locked():
+        entry = cache.get(key)
+    remaining = entry['expires_at'] - time.time() if entry else 0
+
+    if remaining > MIN_TOKEN_LIFETIME:
+        if remaining <= REFRESH_MARGIN:
+            # Not a daemon thread, so a short-lived run still finishes the renewal
+            threading.Thread(
+                target=_background_refresh,
+                args=(cache, key, user_pool_id, client_id, client_secret, username, password)
+            ).start()
+        return entry['access_token']
+
+    with cache.locked(exclusive=True):
+        # Another process may have renewed while we waited for the lock
+        entry = cache.get(key)
+        if entry and entry['expires_at'] - time.time() > MIN_TOKEN_LIFETIME:
+            return entry['access_token']
+        return _renew(cache, key, user_pool_id, client_id, client_secret, username, password)['access_token']
+
+
+def authenticate_user(user_pool_id, client_id, client_secret, username, password):
+    """Authenticate user with username/password"""
+    try:
+        try:
+            return get_access_token(user_pool_id, client_id, client_secret, username, password)
+        except OSError:
+            # Cache directory unusable (e.g. read-only home); authenticate without it
+            return _login(user_pool_id, client_id, client_secret, username, password)['access_token']
+    except _client_error() as e:
+        print(f"❌ Authentication failed: {e}")
+        return None
@@ -0,0 +1,121 @@
+/**
+ * Response compression for the SSE-framed MCP endpoint.
+ * Negotiates br or gzip from Accept-Encoding and flushes after every event,
+ * so a compressed stream still delivers each JSON-RPC response as it is written.
+ */
+
+import type { Response } from 'express';
+import zlib from 'zlib';
+import { responseBytes, responseEncodedBytes } from './metrics.js';
+
+export type Encoding = 'br' | 'gzip' | 'identity';
+
+// Bodies expected to be smaller than this go out uncompressed; the encoder
+// framing and CPU would cost more than they save
+const COMPRESSION_MIN_BYTES = Number(process.env.COMPRESSION_MIN_BYTES || 1024);
+// Set to "off" to always answer identity, e.g. when a proxy compresses instead
+const COMPRESSION = process.env.COMPRESSION || 'on';
+// Brotli's default quality (11) is far too slow to run once per event
+const BROTLI_QUALITY = Number(process.env.BROTLI_QUALITY || 5);
+
+// Server preference when the client weights several encodings equally
+const PREFERENCE: Encoding[] = ['br', 'gzip'];
+
+/**
+ * Pick the best encoding the client accepts, honouring q-values and `*`.
+ */
+export function negotiateEncoding(acceptEncoding: string | undefined): Encoding {
+  if (COMPRESSION === 'off' || !acceptEncoding) {
+    return 'identity';
+  }
+  const weights = new Map<string, number>();
+  for (const part of acceptEncoding.split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';');
+    if (!name) {
+      continue;
+    }
+    const q = params.map((param) => /^\s*q=([0-9.]+)\s*$/.exec(param)).find(Boolean);
+    weights.set(name, q ? Number(q[1]) : 1);
+  }
+  let best: Encoding = 'identity';
+  let bestWeight = 0;
+  for (const encoding of PREFERENCE) {
+    const weight = weights.get(encoding) ?? weights.get('*') ?? 0;
+    if (weight > bestWeight) {
+      best = encoding;
+      bestWeight = weight;
+    }
+  }
+  return best;
+}
+
+/**
+ * Writes SSE events to a response, compressed when that pays off.
+ *
+ * The choice is made at the first event, while headers can still change:
+ * the body is compressed if the first event times `expectedEvents` reaches
+ * COMPRESSION_MIN_BYTES. After every event the encoder is flushed, so the
+ * client can decode it without waiting for the rest of the stream.
+ */
+export class EventStreamWriter {
+  private compressor?: zlib.Gzip | zlib.BrotliCompress;
+  private started = false;
+
+  constructor(
+    private res: Response,
+    private encoding: Encoding,
+    private expectedEvents = 1
+  ) {
+    res.vary('Accept-Encoding');
+  }
+
+  write(event: string): void {
+    const data = Buffer.from(event);
+    if (!this.started) {
+      this.started = true;
+      if (this.encoding !== 'identity' && data.length * this.expectedEvents >= COMPRESSION_MIN_BYTES) {
+        this.startCompression();
+      } else {
+        this.encoding = 'identity';
+      }
+    }
+    responseBytes.inc({ encoding: this.encoding }, data.length);
+    if (!this.compressor) {
+      responseEncodedBytes.inc({ encoding: 'identity' }, data.length);
+      this.res.write(data);
+      return;
+    }
+    this.compressor.write(data);
+    this.compressor.flush(
+      this.encoding === 'br' ? zlib.constants.BROTLI_OPERATION_FLUSH : zlib.constants.Z_SYNC_FLUSH
+    );
+  }
+
+  end(): void {
+    if (this.compressor) {
+      // The pipe ends the response once the encoder has written its trailer
+      this.compressor.end();
+    } else {
+      this.res.end();
+    }
+  }
+
+  private startCompression(): void {
+    const compressor =
+      this.encoding === 'br'
+        ? zlib.createBrotliCompress({
+            params: {
+              [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+              [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+            },
+          })
+        : zlib.createGzip();
+    const encoding = this.encoding;
+    this.res.setHeader('Content-Encoding', encoding);
+    compressor.on('data', (chunk: Buffer) => responseEncodedBytes.inc({ encoding }, chunk.length));
+    compressor.pipe(this.res);
+    // A client that hangs up mid-stream must not leave the encoder buffering
+    this.res.once('close', () => compressor.destroy());
+    this.compressor = compressor;
+  }
+}
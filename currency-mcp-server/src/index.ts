@@ -5,8 +5,12 @@ import {
   ListToolsRequestSchema,
   InitializeRequestSchema,
 } from '@modelcontextprotocol/sdk/types.js';
+import { createHash, randomBytes, timingSafeEqual } from 'crypto';
 import express from 'express';
+import { EventStreamWriter, negotiateEncoding } from './compression.js';
+import { CONTENT_TYPE, registry, requestDuration, requestsInFlight } from './metrics.js';
 import { authenticateToken } from './oauth-cognito.js';
+import { crossRate, getRates, getUsdRate, rateTiming, RateTiming } from './rate-cache.js';
 
 const app = express();
 const PORT = process.env.PORT || 8080;
@@ -14,6 +18,104 @@ const BASE_PATH = process.env.BASE_PATH || '';
 
 app.use(express.json());
 
+// Largest array accepted by convert_batch and convert_currency
+const MAX_BATCH_AMOUNTS = Number(process.env.MAX_BATCH_AMOUNTS || 10000);
+
+// Convert many amounts at one rate; the text is JSON so callers can parse it
+async function convertBatch(args: any) {
+  const amounts = args?.amounts;
+  if (
+    !Array.isArray(amounts) ||
+    amounts.some((amount: unknown) => typeof amount !== 'number' || !Number.isFinite(amount))
+  ) {
+    return {
+      content: [{ type: 'text', text: 'amounts must be an array of numbers' }],
+      isError: true,
+    };
+  }
+  if (amounts.length > MAX_BATCH_AMOUNTS) {
+    return {
+      content: [{ type: 'text', text: `At most ${MAX_BATCH_AMOUNTS} amounts per call` }],
+      isError: true,
+    };
+  }
+
+  try {
+    const rate = await getUsdRate('INR');
+    const converted = amounts.map((amount: number) => (amount * rate).toFixed(2));
+    return {
+      content: [
+        {
+          type: 'text',
+          text: JSON.stringify({ rate, converted }),
+        },
+      ],
+    };
+  } catch (error) {
+    return {
+      content: [
+        {
+          type: 'text',
+          text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
+        },
+      ],
+      isError: true,
+    };
+  }
+}
+
+// Convert (from, to, amount) triples through the cached cross-rate matrix
+async function convertCurrencies(args: any) {
+  const conversions = args?.conversions;
+  if (!Array.isArray(conversions)) {
+    return {
+      content: [{ type: 'text', text: 'conversions must be an array of {from, to, amount}' }],
+      isError: true,
+    };
+  }
+  if (conversions.length > MAX_BATCH_AMOUNTS) {
+    return {
+      content: [{ type: 'text', text: `At most ${MAX_BATCH_AMOUNTS} conversions per call` }],
+      isError: true,
+    };
+  }
+
+  try {
+    const { matrix, fetchedAt } = await getRates();
+    const results = conversions.map((conversion: any) => {
+      const from = String(conversion?.from ?? '').toUpperCase();
+      const to = String(conversion?.to ?? '').toUpperCase();
+      const amount = conversion?.amount;
+      if (typeof amount !== 'number' || !Number.isFinite(amount)) {
+        return { from, to, error: 'amount must be a number' };
+      }
+      const rate = crossRate(matrix, from, to);
+      if (rate === undefined) {
+        return { from, to, amount, error: `Unsupported currency pair ${from}/${to}` };
+      }
+      return { from, to, amount, rate, converted: (amount * rate).toFixed(2) };
+    });
+    return {
+      content: [
+        {
+          type: 'text',
+          text: JSON.stringify({ asOf: new Date(fetchedAt).toISOString(), results }),
+        },
+      ],
+    };
+  } catch (error) {
+    return {
+      content: [
+        {
+          type: 'text',
+          text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
+        },
+      ],
+      isError: true,
+    };
+  }
+}
+
 // Create a single MCP server instance
 const server = new Server(
   {
@@ -67,6 +169,44 @@ server.setRequestHandler(ListToolsRequestSchema, async () => {
           properties: {},
         },
       },
+      {
+        name: 'convert_batch',
+        description: 'Convert many USD amounts to INR at one exchange rate',
+        inputSchema: {
+          type: 'object',
+          properties: {
+            amounts: {
+              type: 'array',
+              items: { type: 'number' },
+              description: 'USD amounts to convert',
+            },
+          },
+          required: ['amounts'],
+        },
+      },
+      {
+        name: 'convert_currency',
+        description: 'Convert amounts between any two supported currencies (ISO 4217 codes)',
+        inputSchema: {
+          type: 'object',
+          properties: {
+            conversions: {
+              type: 'array',
+              items: {
+                type: 'object',
+                properties: {
+                  from: { type: 'string', description: 'Source currency, e.g. USD' },
+                  to: { type: 'string', description: 'Target currency, e.g. EUR' },
+                  amount: { type: 'number', description: 'Amount in the source currency' },
+                },
+                required: ['from', 'to', 'amount'],
+              },
+              description: 'Conversions to run, all at one snapshot of rates',
+            },
+          },
+          required: ['conversions'],
+        },
+      },
     ],
   };
 });
@@ -78,9 +218,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request: any) => {
   if (name === 'convert_usd_to_inr') {
     const amount = args?.amount || 100;
     try {
-      const response = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
-      const data = await response.json();
-      const rate = data.rates.INR;
+      const rate = await getUsdRate('INR');
       const converted = amount * rate;
       
       return {
@@ -106,9 +244,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request: any) => {
 
   if (name === 'get_current_rate') {
     try {
-      const response = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
-      const data = await response.json();
-      const rate = data.rates.INR;
+      const rate = await getUsdRate('INR');
       
       return {
         content: [
@@ -131,6 +267,14 @@ server.setRequestHandler(CallToolRequestSchema, async (request: any) => {
     }
   }
 
+  if (name === 'convert_batch') {
+    return convertBatch(args);
+  }
+
+  if (name === 'convert_currency') {
+    return convertCurrencies(args);
+  }
+
   throw new Error(`Unknown tool: ${name}`);
 });
 
@@ -139,143 +283,318 @@ app.get(`${BASE_PATH}/`, (req, res) => {
   res.json({ status: 'healthy', service: 'currency-mcp-server' });
 });
 
-// MCP endpoint - handle JSON-RPC requests properly
-app.post(`${BASE_PATH}/mcp`, authenticateToken, async (req, res) => {
-  try {
-    // Set SSE headers for streaming response
-    res.setHeader('Content-Type', 'text/event-stream');
-    res.setHeader('Cache-Control', 'no-cache');
-    res.setHeader('Connection', 'keep-alive');
-    res.setHeader('Access-Control-Allow-Origin', '*');
-
-    const { method, params, id } = req.body;
-
-    let result;
-    
-    // Handle different MCP methods
-    if (method === 'initialize') {
-      result = {
-        protocolVersion: '2024-11-05',
-        capabilities: {
-          tools: {},
+// Bearer token check in constant time (digests have equal lengths)
+function tokenMatches(header: string | undefined, token: string): boolean {
+  const digest = (value: string) => createHash('sha256').update(value).digest();
+  return timingSafeEqual(digest(header || ''), digest(`Bearer ${token}`));
+}
+
+// Prometheus scrape endpoint. It sits under the public route, so it fails
+// closed: without METRICS_TOKEN it is not served at all
+app.get(`${BASE_PATH}/metrics`, (req, res) => {
+  const token = process.env.METRICS_TOKEN;
+  if (!token) {
+    res.status(404).json({ error: 'Not found' });
+    return;
+  }
+  if (!tokenMatches(req.get('authorization'), token)) {
+    res.status(401).json({ error: 'Unauthorized' });
+    return;
+  }
+  res.setHeader('Content-Type', CONTENT_TYPE);
+  res.send(registry.render());
+});
+
+type JsonRpcMessage = {
+  jsonrpc?: string;
+  id?: string | number | null;
+  method?: string;
+  params?: any;
+};
+
+// Dispatch a single JSON-RPC method and return its result
+async function handleMethod(method: string | undefined, params: any) {
+  let result;
+  
+  // Handle different MCP methods
+  if (method === 'initialize') {
+    result = {
+      protocolVersion: '2024-11-05',
+      capabilities: {
+        tools: {},
+      },
+      serverInfo: {
+        name: 'currency-converter',
+        version: '1.0.0',
+      },
+    };
+  } else if (method === 'tools/list') {
+    result = {
+      tools: [
+        {
+          name: 'convert_usd_to_inr',
+          description: 'Convert USD amount to INR using current exchange rate',
+          inputSchema: {
+            type: 'object',
+            properties: {
+              amount: {
+                type: 'number',
+                description: 'USD amount to convert',
+              },
+            },
+            required: ['amount'],
+          },
         },
-        serverInfo: {
-          name: 'currency-converter',
-          version: '1.0.0',
+        {
+          name: 'get_current_rate',
+          description: 'Get current USD to INR exchange rate',
+          inputSchema: {
+            type: 'object',
+            properties: {},
+          },
         },
-      };
-    } else if (method === 'tools/list') {
-      result = {
-        tools: [
-          {
-            name: 'convert_usd_to_inr',
-            description: 'Convert USD amount to INR using current exchange rate',
-            inputSchema: {
-              type: 'object',
-              properties: {
-                amount: {
-                  type: 'number',
-                  description: 'USD amount to convert',
-                },
+        {
+          name: 'convert_batch',
+          description: 'Convert many USD amounts to INR at one exchange rate',
+          inputSchema: {
+            type: 'object',
+            properties: {
+              amounts: {
+                type: 'array',
+                items: { type: 'number' },
+                description: 'USD amounts to convert',
               },
-              required: ['amount'],
             },
+            required: ['amounts'],
           },
-          {
-            name: 'get_current_rate',
-            description: 'Get current USD to INR exchange rate',
-            inputSchema: {
-              type: 'object',
-              properties: {},
+        },
+        {
+          name: 'convert_currency',
+          description: 'Convert amounts between any two supported currencies (ISO 4217 codes)',
+          inputSchema: {
+            type: 'object',
+            properties: {
+              conversions: {
+                type: 'array',
+                items: {
+                  type: 'object',
+                  properties: {
+                    from: { type: 'string', description: 'Source currency, e.g. USD' },
+                    to: { type: 'string', description: 'Target currency, e.g. EUR' },
+                    amount: { type: 'number', description: 'Amount in the source currency' },
+                  },
+                  required: ['from', 'to', 'amount'],
+                },
+                description: 'Conversions to run, all at one snapshot of rates',
+              },
             },
+            required: ['conversions'],
           },
-        ],
-      };
-    } else if (method === 'tools/call') {
-      const { name, arguments: args } = params;
-
-      if (name === 'convert_usd_to_inr') {
-        const amount = args?.amount || 100;
-        try {
-          const response = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
-          const data = await response.json();
-          const rate = data.rates.INR;
-          const converted = amount * rate;
-          
-          result = {
-            content: [
-              {
-                type: 'text',
-                text: `$${amount} USD = ₹${converted.toFixed(2)} INR (Rate: ${rate})`,
-              },
-            ],
-          };
-        } catch (error) {
-          result = {
-            content: [
-              {
-                type: 'text',
-                text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
-              },
-            ],
-            isError: true,
-          };
-        }
-      } else if (name === 'get_current_rate') {
-        try {
-          const response = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
-          const data = await response.json();
-          const rate = data.rates.INR;
-          
-          result = {
-            content: [
-              {
-                type: 'text',
-                text: `Current USD to INR rate: ${rate}`,
-              },
-            ],
-          };
-        } catch (error) {
-          result = {
-            content: [
-              {
-                type: 'text',
-                text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
-              },
-            ],
-            isError: true,
-          };
-        }
-      } else {
-        throw new Error(`Unknown tool: ${name}`);
+        },
+      ],
+    };
+  } else if (method === 'tools/call') {
+    const { name, arguments: args } = params;
+
+    if (name === 'convert_usd_to_inr') {
+      const amount = args?.amount || 100;
+      try {
+        const rate = await getUsdRate('INR');
+        const converted = amount * rate;
+        
+        result = {
+          content: [
+            {
+              type: 'text',
+              text: `$${amount} USD = ₹${converted.toFixed(2)} INR (Rate: ${rate})`,
+            },
+          ],
+        };
+      } catch (error) {
+        result = {
+          content: [
+            {
+              type: 'text',
+              text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
+            },
+          ],
+          isError: true,
+        };
       }
+    } else if (name === 'get_current_rate') {
+      try {
+        const rate = await getUsdRate('INR');
+        
+        result = {
+          content: [
+            {
+              type: 'text',
+              text: `Current USD to INR rate: ${rate}`,
+            },
+          ],
+        };
+      } catch (error) {
+        result = {
+          content: [
+            {
+              type: 'text',
+              text: `Error fetching exchange rate: ${error instanceof Error ? error.message : String(error)}`,
+            },
+          ],
+          isError: true,
+        };
+      }
+    } else if (name === 'convert_batch') {
+      result = await convertBatch(args);
+    } else if (name === 'convert_currency') {
+      result = await convertCurrencies(args);
     } else {
-      throw new Error(`Unknown method: ${method}`);
+      throw new Error(`Unknown tool: ${name}`);
     }
+  } else {
+    throw new Error(`Unknown method: ${method}`);
+  }
+
+  return result;
+}
+
+// Label values are limited to known methods and tools, so arbitrary
+// client input cannot blow up the number of metric series
+const METERED_METHODS = new Set(['initialize', 'tools/list', 'tools/call']);
+const METERED_TOOLS = new Set(['convert_usd_to_inr', 'get_current_rate', 'convert_batch', 'convert_currency']);
+
+function requestLabels(message: JsonRpcMessage) {
+  const method = METERED_METHODS.has(message?.method ?? '') ? message.method! : 'other';
+  let tool = '';
+  if (method === 'tools/call') {
+    const name = message.params?.name;
+    tool = METERED_TOOLS.has(name) ? name : 'unknown';
+  }
+  return { method, tool };
+}
 
-    // Send response in SSE format
-    const response = {
+// Handle one JSON-RPC message, turning failures into JSON-RPC errors
+async function handleMessage(message: JsonRpcMessage) {
+  const endTimer = requestDuration.startTimer(requestLabels(message));
+  try {
+    const result = await handleMethod(message?.method, message?.params);
+    endTimer({ outcome: (result as { isError?: boolean }).isError ? 'error' : 'ok' });
+    return {
       jsonrpc: '2.0',
-      id: id,
+      id: message.id,
       result: result,
     };
-
-    res.write(`data: ${JSON.stringify(response)}\n\n`);
-    res.end();
-
   } catch (error) {
-    const errorResponse = {
+    endTimer({ outcome: 'error' });
+    return {
       jsonrpc: '2.0',
-      id: req.body.id || null,
+      id: message?.id ?? null,
       error: {
         code: -32601,
         message: error instanceof Error ? error.message : String(error),
       },
     };
+  }
+}
+
+// Note arrival time before authentication, so auth shows up in Server-Timing
+function markReceived(req: express.Request, res: express.Response, next: express.NextFunction) {
+  res.locals.receivedAt = performance.now();
+  next();
+}
+
+// Count requests to the MCP endpoint until their response is closed
+function trackInFlight(req: express.Request, res: express.Response, next: express.NextFunction) {
+  requestsInFlight.inc();
+  res.once('close', () => requestsInFlight.dec());
+  next();
+}
+
+// Answer a W3C traceparent with a traceresponse carrying the same trace id,
+// so client and server spans of one call can be joined
+function echoTraceContext(req: express.Request, res: express.Response) {
+  const match = /^00-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$/.exec(req.get('traceparent') || '');
+  const traceId = match ? match[1] : randomBytes(16).toString('hex');
+  res.setHeader('traceresponse', `00-${traceId}-${randomBytes(8).toString('hex')}-01`);
+}
 
-    res.write(`data: ${JSON.stringify(errorResponse)}\n\n`);
-    res.end();
+function serverTiming(authMs: number, appMs: number, timing?: RateTiming) {
+  const metrics = [`auth;dur=${authMs.toFixed(1)}`];
+  if (timing?.cache) {
+    metrics.push(`rates;dur=${timing.upstreamMs.toFixed(1)};desc="${timing.cache}"`);
   }
+  metrics.push(`app;dur=${appMs.toFixed(1)}`);
+  return metrics.join(', ');
+}
+
+// MCP endpoint - handle JSON-RPC requests and batches
+app.post(`${BASE_PATH}/mcp`, markReceived, trackInFlight, authenticateToken, async (req, res) => {
+  const handlerStart = performance.now();
+  const authMs = handlerStart - res.locals.receivedAt;
+  const timing: RateTiming = { upstreamMs: 0 };
+  echoTraceContext(req, res);
+
+  // Notifications (e.g. notifications/initialized) are acknowledged with no body
+  if (
+    !Array.isArray(req.body) &&
+    req.body?.id === undefined &&
+    typeof req.body?.method === 'string' &&
+    req.body.method.startsWith('notifications/')
+  ) {
+    res.setHeader('Server-Timing', serverTiming(authMs, 0));
+    res.status(202).end();
+    return;
+  }
+
+  // Set SSE headers for streaming response
+  res.setHeader('Content-Type', 'text/event-stream');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.setHeader('Connection', 'keep-alive');
+  res.setHeader('Access-Control-Allow-Origin', '*');
+  res.setHeader('Access-Control-Expose-Headers', 'Server-Timing, traceresponse');
+
+  // Responses with an id get an event; notifications in a batch get none
+  const expectedEvents = Array.isArray(req.body)
+    ? req.body.filter((message: JsonRpcMessage) => message?.id !== undefined && message?.id !== null).length || 1
+    : 1;
+  const stream = new EventStreamWriter(res, negotiateEncoding(req.get('accept-encoding')), expectedEvents);
+
+  // Send each response as its own SSE event. Headers go out with the first
+  // event, so Server-Timing covers the work done before the first response.
+  const writeMessage = (message: object) => {
+    if (!res.headersSent) {
+      res.setHeader('Server-Timing', serverTiming(authMs, performance.now() - handlerStart, timing));
+    }
+    stream.write(`data: ${JSON.stringify(message)}\n\n`);
+  };
+
+  if (Array.isArray(req.body)) {
+    if (req.body.length === 0) {
+      writeMessage({
+        jsonrpc: '2.0',
+        id: null,
+        error: { code: -32600, message: 'Invalid Request: empty batch' },
+      });
+      stream.end();
+      return;
+    }
+
+    // Run batch entries concurrently and stream each response as it completes.
+    // Notifications (no id) get no response, per JSON-RPC 2.0.
+    await Promise.all(
+      req.body.map(async (message: JsonRpcMessage) => {
+        const response = await rateTiming.run(timing, () => handleMessage(message));
+        if (message?.id !== undefined && message?.id !== null) {
+          writeMessage(response);
+        }
+      })
+    );
+    stream.end();
+    return;
+  }
+
+  writeMessage(await rateTiming.run(timing, () => handleMessage(req.body)));
+  stream.end();
 });
 
 app.listen(PORT, () => {
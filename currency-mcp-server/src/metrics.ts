@@ -0,0 +1,214 @@
+/**
+ * Minimal Prometheus metrics for the currency server.
+ * Renders the text exposition format served at /metrics.
+ */
+
+import { monitorEventLoopDelay } from 'perf_hooks';
+
+type Labels = Record<string, string>;
+
+// Latency buckets in seconds, from cache-hit fast paths to slow upstream calls
+const DEFAULT_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function formatLabels(labels: Labels): string {
+  const pairs = Object.entries(labels).map(([name, value]) => `${name}="${escapeLabel(value)}"`);
+  return pairs.length ? `{${pairs.join(',')}}` : '';
+}
+
+abstract class Metric {
+  constructor(
+    readonly name: string,
+    readonly help: string,
+    readonly type: 'counter' | 'gauge' | 'histogram',
+    readonly labelNames: string[] = []
+  ) {
+    registry.register(this);
+  }
+
+  protected key(labels: Labels): string {
+    return JSON.stringify(this.labelNames.map((name) => labels[name] ?? ''));
+  }
+
+  protected labelsFor(key: string): Labels {
+    const values = JSON.parse(key) as string[];
+    return Object.fromEntries(this.labelNames.map((name, i) => [name, values[i]]));
+  }
+
+  abstract samples(): string[];
+
+  render(): string {
+    return [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`, ...this.samples()].join('\n');
+  }
+}
+
+export class Counter extends Metric {
+  private values = new Map<string, number>();
+
+  constructor(name: string, help: string, labelNames: string[] = []) {
+    super(name, help, 'counter', labelNames);
+  }
+
+  inc(labels: Labels = {}, value = 1): void {
+    const key = this.key(labels);
+    this.values.set(key, (this.values.get(key) ?? 0) + value);
+  }
+
+  samples(): string[] {
+    return [...this.values].map(([key, value]) => `${this.name}${formatLabels(this.labelsFor(key))} ${value}`);
+  }
+}
+
+export class Gauge extends Metric {
+  private values = new Map<string, number>();
+
+  constructor(name: string, help: string, labelNames: string[] = [], private collect?: (gauge: Gauge) => void) {
+    super(name, help, 'gauge', labelNames);
+  }
+
+  set(labels: Labels, value: number): void {
+    this.values.set(this.key(labels), value);
+  }
+
+  inc(labels: Labels = {}, value = 1): void {
+    const key = this.key(labels);
+    this.values.set(key, (this.values.get(key) ?? 0) + value);
+  }
+
+  dec(labels: Labels = {}, value = 1): void {
+    this.inc(labels, -value);
+  }
+
+  samples(): string[] {
+    this.collect?.(this);
+    return [...this.values].map(([key, value]) => `${this.name}${formatLabels(this.labelsFor(key))} ${value}`);
+  }
+}
+
+export class Histogram extends Metric {
+  private series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+  constructor(name: string, help: string, labelNames: string[] = [], readonly buckets = DEFAULT_BUCKETS) {
+    super(name, help, 'histogram', labelNames);
+  }
+
+  observe(labels: Labels, seconds: number): void {
+    const key = this.key(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    for (let i = 0; i < this.buckets.length; i++) {
+      if (seconds <= this.buckets[i]) {
+        series.counts[i]++;
+      }
+    }
+    series.sum += seconds;
+    series.count++;
+  }
+
+  /**
+   * Start timing; call the returned function with any labels only known at the end.
+   */
+  startTimer(labels: Labels = {}): (endLabels?: Labels) => number {
+    const started = performance.now();
+    return (endLabels: Labels = {}) => {
+      const seconds = (performance.now() - started) / 1000;
+      this.observe({ ...labels, ...endLabels }, seconds);
+      return seconds;
+    };
+  }
+
+  samples(): string[] {
+    const lines: string[] = [];
+    for (const [key, series] of this.series) {
+      const labels = this.labelsFor(key);
+      this.buckets.forEach((bound, i) => {
+        lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: String(bound) })} ${series.counts[i]}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: '+Inf' })} ${series.count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${series.sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${series.count}`);
+    }
+    return lines;
+  }
+}
+
+class Registry {
+  private metrics: Metric[] = [];
+
+  register(metric: Metric): void {
+    this.metrics.push(metric);
+  }
+
+  render(): string {
+    return this.metrics.map((metric) => metric.render()).join('\n') + '\n';
+  }
+}
+
+export const registry = new Registry();
+
+export const CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+export const requestDuration = new Histogram(
+  'mcp_request_duration_seconds',
+  'Time to handle one JSON-RPC message, by method and tool',
+  ['method', 'tool', 'outcome']
+);
+
+export const requestsInFlight = new Gauge(
+  'mcp_requests_in_flight',
+  'HTTP requests to the MCP endpoint currently being served'
+);
+requestsInFlight.set({}, 0);
+
+export const rateFetchDuration = new Histogram(
+  'exchange_rate_fetch_duration_seconds',
+  'Upstream exchange-rate API fetch latency',
+  ['outcome']
+);
+
+export const rateCacheLookups = new Counter(
+  'exchange_rate_cache_lookups_total',
+  'Exchange-rate lookups by how they were served (hit, stale or miss)',
+  ['result']
+);
+
+export const tokenVerificationDuration = new Histogram(
+  'token_verification_duration_seconds',
+  'Cognito access token verification latency',
+  ['result', 'cached']
+);
+
+export const responseBytes = new Counter(
+  'mcp_response_bytes_total',
+  'MCP response body bytes before compression, by content encoding',
+  ['encoding']
+);
+
+export const responseEncodedBytes = new Counter(
+  'mcp_response_encoded_bytes_total',
+  'MCP response body bytes as sent, by content encoding',
+  ['encoding']
+);
+
+// Sampled continuously; each scrape reports the window since the previous one
+const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+loopDelay.enable();
+
+new Gauge(
+  'nodejs_eventloop_lag_seconds',
+  'Event loop delay since the last scrape, by statistic (mean, p99, max)',
+  ['stat'],
+  (gauge) => {
+    const seconds = (ns: number) => (Number.isFinite(ns) ? ns / 1e9 : 0);
+    gauge.set({ stat: 'mean' }, seconds(loopDelay.mean));
+    gauge.set({ stat: 'p99' }, seconds(loopDelay.percentile(99)));
+    gauge.set({ stat: 'max' }, seconds(loopDelay.max));
+    loopDelay.reset();
+  }
+);
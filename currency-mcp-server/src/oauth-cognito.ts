@@ -3,47 +3,157 @@
  * Provides OAuth 2.0 authorization code flow implementation.
  */
 
+import { createHash } from "crypto";
 import * as jose from "jose";
 import fetch from "node-fetch";
 import { Request, Response, NextFunction } from "express";
+import { tokenVerificationDuration } from "./metrics.js";
+
+// How long fetched signing keys are trusted before the JWKS is re-read
+const JWKS_TTL_MS = Number(process.env.JWKS_TTL_MS || 3_600_000);
+// Minimum gap between JWKS fetches triggered by an unknown kid
+const JWKS_MIN_REFRESH_MS = Number(process.env.JWKS_MIN_REFRESH_MS || 30_000);
+// Upper bound on verified tokens remembered between requests
+const TOKEN_CACHE_SIZE = Number(process.env.TOKEN_CACHE_SIZE || 1000);
+
+type SigningKey = Awaited<ReturnType<typeof jose.importJWK>>;
+type VerifiedToken = { claims: jose.JWTPayload; kid: string; expiresAt: number };
+
+let signingKeys = new Map<string, SigningKey>();
+let jwksFetchedAt = 0;
+let jwksRefresh: Promise<void> | null = null;
+
+// Insertion-ordered, so the first entry is always the least recently used
+const verifiedTokens = new Map<string, VerifiedToken>();
+
+function cognitoIssuer(): string {
+  const region = process.env.AWS_REGION || "us-west-2";
+  const user_pool_id = process.env.COGNITO_USER_POOL_ID;
+  return `https://cognito-idp.${region}.amazonaws.com/${user_pool_id}`;
+}
+
+/**
+ * Re-read the JWKS and import every key. Concurrent callers share one fetch.
+ * Keys missing from the new document have been rotated out and are dropped.
+ */
+function refreshSigningKeys(): Promise<void> {
+  if (!jwksRefresh) {
+    jwksRefresh = (async () => {
+      try {
+        const jwks_response = await fetch(`${cognitoIssuer()}/.well-known/jwks.json`);
+        if (!jwks_response.ok) {
+          throw new Error(`JWKS request failed with ${jwks_response.status}`);
+        }
+        const jwks = (await jwks_response.json()) as { keys: any[] };
+
+        const keys = new Map<string, SigningKey>();
+        for (const key of jwks.keys) {
+          if (key.kid) {
+            keys.set(key.kid, await jose.importJWK(key, key.alg));
+          }
+        }
+        signingKeys = keys;
+      } finally {
+        // Failed fetches also count, so a bad kid can't hammer the endpoint
+        jwksFetchedAt = Date.now();
+        jwksRefresh = null;
+      }
+    })();
+  }
+  return jwksRefresh;
+}
+
+/**
+ * Find the imported key for `kid`, re-reading the JWKS when the cached set
+ * has expired or doesn't know the kid (Cognito rotated its keys).
+ */
+async function getSigningKey(kid: string): Promise<SigningKey | undefined> {
+  const age = Date.now() - jwksFetchedAt;
+  if (age >= JWKS_TTL_MS || (!signingKeys.has(kid) && age >= JWKS_MIN_REFRESH_MS)) {
+    try {
+      await refreshSigningKeys();
+    } catch (error) {
+      // Keep verifying with the keys we already have
+      console.error("JWKS refresh error:", error);
+    }
+  }
+  return signingKeys.get(kid);
+}
+
+function tokenDigest(token: string): string {
+  return createHash("sha256").update(token).digest("hex");
+}
+
+function cachedClaims(digest: string): jose.JWTPayload | undefined {
+  const entry = verifiedTokens.get(digest);
+  if (!entry) {
+    return undefined;
+  }
+  verifiedTokens.delete(digest);
+  if (entry.expiresAt <= Date.now() || !signingKeys.has(entry.kid)) {
+    // Expired, or signed by a key that has since been rotated out
+    return undefined;
+  }
+  verifiedTokens.set(digest, entry);
+  return entry.claims;
+}
+
+function rememberToken(digest: string, kid: string, claims: jose.JWTPayload) {
+  if (typeof claims.exp !== "number") {
+    return;
+  }
+  verifiedTokens.set(digest, { claims, kid, expiresAt: claims.exp * 1000 });
+  while (verifiedTokens.size > TOKEN_CACHE_SIZE) {
+    const oldest = verifiedTokens.keys().next().value as string;
+    verifiedTokens.delete(oldest);
+  }
+}
 
 /**
  * Validate a Cognito access token.
+ *
+ * Signing keys are cached by kid, and tokens that already passed
+ * verification are remembered until their exp claim.
  */
 export async function validateCognitoToken(
   token: string
 ): Promise<{ isValid: boolean; claims: any }> {
-  const region = process.env.AWS_REGION || "us-west-2";
-  const user_pool_id = process.env.COGNITO_USER_POOL_ID;
+  const endTimer = tokenVerificationDuration.startTimer();
+  const digest = tokenDigest(token);
+  const cached = cachedClaims(digest);
+  if (cached) {
+    endTimer({ result: "valid", cached: "true" });
+    return { isValid: true, claims: cached };
+  }
 
-  // Get the JWKs from Cognito
-  const jwks_url = `https://cognito-idp.${region}.amazonaws.com/${user_pool_id}/.well-known/jwks.json`;
+  const result = await verifyToken(token, digest);
+  endTimer({ result: result.isValid ? "valid" : "invalid", cached: "false" });
+  return result;
+}
 
+async function verifyToken(
+  token: string,
+  digest: string
+): Promise<{ isValid: boolean; claims: any }> {
   try {
-    // Fetch the JWKS
-    const jwks_response = await fetch(jwks_url);
-    const jwks = (await jwks_response.json()) as { keys: any[] };
-
     // Get the key ID from the token header
-    const { kid } = await jose.decodeProtectedHeader(token);
+    const { kid } = jose.decodeProtectedHeader(token);
     if (!kid) {
       return { isValid: false, claims: {} };
     }
 
     // Find the correct key
-    const key = jwks.keys.find((k) => k.kid === kid);
+    const key = await getSigningKey(kid);
     if (!key) {
       return { isValid: false, claims: {} };
     }
 
-    // Import the key
-    const publicKey = await jose.importJWK(key, key.alg);
-
     // Verify the token
-    const { payload } = await jose.jwtVerify(token, publicKey, {
-      issuer: `https://cognito-idp.${region}.amazonaws.com/${user_pool_id}`,
+    const { payload } = await jose.jwtVerify(token, key, {
+      issuer: cognitoIssuer(),
     });
 
+    rememberToken(digest, kid, payload);
     return { isValid: true, claims: payload };
   } catch (error) {
     console.error("Token validation error:", error);
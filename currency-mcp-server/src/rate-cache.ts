@@ -0,0 +1,184 @@
+/**
+ * Exchange-rate cache for the currency tools.
+ * Keeps upstream latency and traffic bursts off the request path.
+ */
+
+import { AsyncLocalStorage } from 'async_hooks';
+import { rateCacheLookups, rateFetchDuration } from './metrics.js';
+
+const RATES_URL = process.env.RATES_URL || 'https://api.exchangerate-api.com/v4/latest/USD';
+
+// Rates younger than this are served without touching the upstream API
+const RATE_TTL_MS = Number(process.env.RATE_TTL_MS || 60_000);
+// Past the TTL but within this age, serve stale rates and refresh in the background
+const RATE_MAX_STALE_MS = Number(process.env.RATE_MAX_STALE_MS || 3_600_000);
+// After a failed fetch, wait this long before trying the upstream again
+const RATE_RETRY_MS = Number(process.env.RATE_RETRY_MS || 5_000);
+const RATE_FETCH_TIMEOUT_MS = Number(process.env.RATE_FETCH_TIMEOUT_MS || 5_000);
+
+export type RateSnapshot = {
+  base: string;
+  rates: Record<string, number>;
+  fetchedAt: number;
+  matrix: CrossRateMatrix;
+};
+
+/**
+ * Every pairwise rate, precomputed once per refresh.
+ * rates[index(from) * size + index(to)] converts one unit of `from` into `to`.
+ */
+export type CrossRateMatrix = {
+  currencies: string[];
+  index: Map<string, number>;
+  size: number;
+  rates: Float64Array;
+};
+
+function buildCrossRates(rates: Record<string, number>): CrossRateMatrix {
+  const currencies = Object.keys(rates).filter(
+    (currency) => Number.isFinite(rates[currency]) && rates[currency] > 0
+  );
+  const size = currencies.length;
+  const index = new Map(currencies.map((currency, i) => [currency, i] as [string, number]));
+  const matrix = new Float64Array(size * size);
+  for (let from = 0; from < size; from++) {
+    const fromRate = rates[currencies[from]];
+    for (let to = 0; to < size; to++) {
+      matrix[from * size + to] = rates[currencies[to]] / fromRate;
+    }
+  }
+  return { currencies, index, size, rates: matrix };
+}
+
+/**
+ * Look up the rate from one currency to another, or undefined if either is unknown.
+ */
+export function crossRate(matrix: CrossRateMatrix, from: string, to: string): number | undefined {
+  const i = matrix.index.get(from);
+  const j = matrix.index.get(to);
+  if (i === undefined || j === undefined) {
+    return undefined;
+  }
+  return matrix.rates[i * matrix.size + j];
+}
+
+/**
+ * How the rate lookups of one request were served, for its Server-Timing header.
+ * A miss is any lookup that waited on the upstream API.
+ */
+export type RateTiming = {
+  upstreamMs: number;
+  cache?: 'hit' | 'stale' | 'miss';
+};
+
+export const rateTiming = new AsyncLocalStorage<RateTiming>();
+
+function noteLookup(cache: 'hit' | 'stale'): void {
+  rateCacheLookups.inc({ result: cache });
+  const timing = rateTiming.getStore();
+  if (timing && !timing.cache) {
+    timing.cache = cache;
+  }
+}
+
+let snapshot: RateSnapshot | null = null;
+let inFlight: Promise<RateSnapshot> | null = null;
+let lastFailureAt = 0;
+
+/**
+ * Fetch fresh rates. Concurrent callers share one upstream request.
+ */
+function refreshRates(): Promise<RateSnapshot> {
+  if (!inFlight) {
+    inFlight = (async () => {
+      const endTimer = rateFetchDuration.startTimer();
+      try {
+        const response = await fetch(RATES_URL, {
+          signal: AbortSignal.timeout(RATE_FETCH_TIMEOUT_MS),
+        });
+        if (!response.ok) {
+          throw new Error(`Exchange rate API returned ${response.status}`);
+        }
+        const data = (await response.json()) as { base?: string; rates?: Record<string, number> };
+        if (!data?.rates) {
+          throw new Error('Exchange rate API returned no rates');
+        }
+        snapshot = {
+          base: data.base || 'USD',
+          rates: data.rates,
+          fetchedAt: Date.now(),
+          matrix: buildCrossRates(data.rates),
+        };
+        endTimer({ outcome: 'success' });
+        return snapshot;
+      } catch (error) {
+        endTimer({ outcome: 'failure' });
+        lastFailureAt = Date.now();
+        throw error;
+      } finally {
+        inFlight = null;
+      }
+    })();
+  }
+  return inFlight;
+}
+
+/**
+ * Return the current USD rates table.
+ *
+ * Fresh rates come straight from memory. Stale rates are returned
+ * immediately while one background fetch renews them. Once rates are
+ * too old to serve blindly the caller waits for the upstream, but
+ * still gets the last good snapshot if that fetch fails.
+ */
+export async function getRates(): Promise<RateSnapshot> {
+  const now = Date.now();
+  const age = snapshot ? now - snapshot.fetchedAt : Infinity;
+
+  if (snapshot && age < RATE_TTL_MS) {
+    noteLookup('hit');
+    return snapshot;
+  }
+
+  const retryAllowed = now - lastFailureAt >= RATE_RETRY_MS;
+
+  if (snapshot && (age < RATE_MAX_STALE_MS || !retryAllowed)) {
+    if (retryAllowed) {
+      refreshRates().catch((error) => {
+        console.error('Background exchange rate refresh failed:', error);
+      });
+    }
+    noteLookup('stale');
+    return snapshot;
+  }
+
+  rateCacheLookups.inc({ result: 'miss' });
+  const timing = rateTiming.getStore();
+  const started = performance.now();
+  try {
+    return await refreshRates();
+  } catch (error) {
+    if (snapshot) {
+      console.error('Exchange rate fetch failed, serving last good rates:', error);
+      return snapshot;
+    }
+    throw error;
+  } finally {
+    if (timing) {
+      timing.cache = 'miss';
+      timing.upstreamMs += performance.now() - started;
+    }
+  }
+}
+
+/**
+ * Return the USD to `currency` rate.
+ */
+export async function getUsdRate(currency = 'INR'): Promise<number> {
+  const { rates } = await getRates();
+  const rate = rates[currency];
+  if (typeof rate !== 'number') {
+    throw new Error(`No exchange rate for ${currency}`);
+  }
+  return rate;
+}
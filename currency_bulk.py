@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Bulk USD to INR conversion for CSV files or stdin
+Streams rows in fixed-size chunks, so memory stays flat however large the input
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from cognito_auth import authenticate_user
+from currency_mcp_client import CurrencyMCPClient
+from mcp_http import SessionStore
+from mcp_retry import retry_policy_from_env
+from mcp_trace import tracer_from_env
+
+DEFAULT_CHUNK_SIZE = 10000
+# How long a fetched rate is used before asking the server again
+DEFAULT_RATE_REFRESH = 60
+# Results are rounded half-up to paise
+INR_QUANTUM = Decimal('0.01')
+
+RATE_PATTERN = re.compile(r'rate:\s*([0-9]+(?:\.[0-9]+)?)', re.IGNORECASE)
+
+
+class RateWindow:
+    """USD to INR rate from get_current_rate, fetched at most once per refresh window.
+
+    If a refresh fails the previous rate keeps being used; only a
+    failure before any rate is known is raised.
+    """
+
+    def __init__(self, client, refresh=DEFAULT_RATE_REFRESH):
+        self.client = client
+        self.refresh = refresh
+        self.rate = None
+        self.fetched_at = 0.0
+
+    def current(self):
+        if self.rate is None or time.monotonic() - self.fetched_at >= self.refresh:
+            try:
+                self.rate = self._fetch()
+                self.fetched_at = time.monotonic()
+            except RuntimeError as e:
+                if self.rate is None:
+                    raise
+                print(f"⚠️ Rate refresh failed, keeping {self.rate}: {e}", file=sys.stderr)
+                self.fetched_at = time.monotonic()
+        return self.rate
+
+    def _fetch(self):
+        result = self.client.call_mcp("tools/call", {"name": "get_current_rate", "arguments": {}})
+        if 'result' not in result or result['result'].get('isError'):
+            raise RuntimeError(f"get_current_rate failed: {result}")
+        for content in result['result'].get('content', []):
+            match = RATE_PATTERN.search(content.get('text', ''))
+            if match:
+                # Decimal from the printed text, not a float, so no binary error creeps in
+                return Decimal(match.group(1))
+        raise RuntimeError(f"No rate in get_current_rate result: {result}")
+
+
+def parse_amount(text):
+    """Parse a USD amount, tolerating '$' and thousands separators; None if invalid"""
+    try:
+        amount = Decimal(text.strip().lstrip('$').replace(',', ''))
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() else None
+
+
+def convert_chunk(amounts, rate):
+    """Convert one chunk of Decimal amounts at a single rate (None stays None)"""
+    return [
+        None if amount is None else (amount * rate).quantize(INR_QUANTUM, rounding=ROUND_HALF_UP)
+        for amount in amounts
+    ]
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def convert_stream(reader, writer, rates, column=0, header=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Copy CSV rows from reader to writer, appending inr and rate columns.
+
+    `column` is the index (or, with a header, the name) of the USD
+    amount. Returns (converted, rejected) row counts.
+    """
+    if not header and not isinstance(column, int):
+        raise ValueError(f"Column {column!r} is a name, which needs --header")
+    rows = iter(reader)
+    if header:
+        names = next(rows, None)
+        if names is None:
+            return 0, 0
+        if not isinstance(column, int):
+            if column not in names:
+                raise ValueError(f"No column named {column!r} in header")
+            column = names.index(column)
+        writer.writerow(names + ['inr', 'rate'])
+
+    converted = rejected = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        rate = rates.current()
+        amounts = [parse_amount(row[column]) if len(row) > column else None for row in chunk]
+        results = convert_chunk(amounts, rate)
+        for row, inr in zip(chunk, results):
+            if inr is None:
+                rejected += 1
+                writer.writerow(row + ['', ''])
+            else:
+                converted += 1
+                writer.writerow(row + [str(inr), str(rate)])
+    return converted, rejected
+
+
+def get_access_token():
+    if os.getenv('MCP_ACCESS_TOKEN'):
+        return os.getenv('MCP_ACCESS_TOKEN')
+    user_pool_id = os.getenv('COGNITO_USER_POOL_ID')
+    client_id = os.getenv('OAUTH_CLIENT_ID')
+    client_secret = os.getenv('OAUTH_CLIENT_SECRET')
+    username = os.getenv('COGNITO_USERNAME')
+    password = os.getenv('COGNITO_PASSWORD')
+    if user_pool_id and client_id and client_secret and username and password:
+        return authenticate_user(user_pool_id, client_id, client_secret, username, password)
+    return None
+
+
+def column_arg(value):
+    return int(value) if value.isdigit() else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert USD amounts in a CSV (or stdin) to INR")
+    parser.add_argument('input', nargs='?', default='-', help="CSV file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output CSV, or - for stdout")
+    parser.add_argument('--column', type=column_arg, default=0,
+                        help="amount column index, or name when --header is set")
+    parser.add_argument('--header', action='store_true', help="first row is a header")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--rate-refresh', type=float, default=DEFAULT_RATE_REFRESH,
+                        help="seconds a fetched rate stays in use")
+    args = parser.parse_args()
+    if not isinstance(args.column, int) and not args.header:
+        parser.error("--column NAME needs --header; without a header row give a 0-based index")
+
+    server_url = os.getenv('CURRENCY_SERVER_URL', 'https://your-endpoint/currency-nodejs/mcp')
+    access_token = get_access_token()
+    if not access_token:
+        print("❌ Failed to get access token. Check your configuration.", file=sys.stderr)
+        sys.exit(1)
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        with CurrencyMCPClient(server_url, access_token, tracer=tracer_from_env(),
+                               retry_policy=retry_policy_from_env()) as client:
+            result = client.initialize(
+                {"name": "currency-bulk", "version": "1.0.0"},
+                store=SessionStore()
+            )
+            if 'result' not in result:
+                print(f"❌ Initialization failed: {result}", file=sys.stderr)
+                sys.exit(1)
+
+            started = time.perf_counter()
+            try:
+                converted, rejected = convert_stream(
+                    csv.reader(source), csv.writer(sink), RateWindow(client, args.rate_refresh),
+                    column=args.column, header=args.header, chunk_size=args.chunk_size
+                )
+            except (RuntimeError, ValueError) as e:
+                print(f"❌ {e}", file=sys.stderr)
+                sys.exit(1)
+            elapsed = time.perf_counter() - started
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    print(f"✅ Converted {converted} rows in {elapsed:.2f}s ({rejected} rejected)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
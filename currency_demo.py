@@ -1,6 +1,21 @@
 #!/usr/bin/env python3
-import requests
-import json
+import asyncio
+import os
+
+from currency_mcp_client import AsyncCurrencyMCPClient
+from mcp_retry import retry_policy_from_env
+from mcp_trace import tracer_from_env
+
+async def run_conversions(url, amounts, access_token=None):
+    """Fan the conversions out concurrently and print them as they complete"""
+    async with AsyncCurrencyMCPClient(url, access_token, tracer=tracer_from_env(),
+                                      retry_policy=retry_policy_from_env()) as client:
+        async for amount, result in client.convert_many(amounts, timeout=5):
+            if 'result' in result:
+                conversion = result['result']['content'][0]['text']
+                print(f"✅ {conversion}")
+            else:
+                print(f"❌ Failed ${amount}: {result.get('error', result)}")
 
 def test_currency_conversions():
     url = "https://d3v422fv5soy13.cloudfront.net/currency-nodejs/mcp"
@@ -11,27 +26,7 @@ def test_currency_conversions():
     print("💱 Currency MCP Server Demo")
     print("=" * 40)
     
-    for amount in test_amounts:
-        payload = {
-            "jsonrpc": "2.0",
-            "id": amount,
-            "method": "tools/call", 
-            "params": {
-                "name": "convert_usd_to_inr",
-                "arguments": {"amount": amount}
-            }
-        }
-        
-        try:
-            response = requests.post(url, json=payload, timeout=5)
-            if response.status_code == 200:
-                result = response.json()
-                conversion = result['result']['content'][0]['text']
-                print(f"✅ {conversion}")
-            else:
-                print(f"❌ Error for ${amount}: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Failed ${amount}: {e}")
+    asyncio.run(run_conversions(url, test_amounts, os.getenv('MCP_ACCESS_TOKEN')))
     
     print("\n🎉 Currency MCP Server Demo Complete!")
 
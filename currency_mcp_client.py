@@ -2,109 +2,42 @@
 """
 Currency MCP Client - Test USD to INR converter
 """
-import requests
-import json
 import os
-import boto3
-import hmac
-import hashlib
-import base64
 import sys
-from botocore.exceptions import ClientError
 
-class CurrencyMCPClient:
-    def __init__(self, server_url, access_token):
-        self.server_url = server_url
-        self.headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json, text/event-stream'
-        }
-    
-    def parse_sse_response(self, text):
-        """Parse Server-Sent Events response"""
-        lines = text.strip().split('\n')
-        data = None
-        
-        for line in lines:
-            if line.startswith('data: '):
-                data = line[6:]  # Remove 'data: ' prefix
-                break
-        
-        if data:
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return {"error": f"Invalid JSON in SSE data: {data}"}
-        
-        return {"error": "No data found in SSE response"}
-    
-    def call_mcp(self, method, params=None):
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": method,
-            "params": params or {}
-        }
-        
-        try:
-            response = requests.post(self.server_url, 
-                headers=self.headers, 
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            # Check if response is SSE format
-            if response.text.startswith('data:') or response.text.startswith('event:'):
-                return self.parse_sse_response(response.text)
-            else:
-                return response.json()
-                
-        except requests.exceptions.RequestException as e:
-            return {"error": str(e)}
+from cognito_auth import authenticate_user
+from mcp_async import AsyncMCPHttpClient
+from mcp_http import MCPHttpClient, SessionStore
+from mcp_retry import retry_policy_from_env
+from mcp_trace import maybe_span, tracer_from_env
+from startup_profile import StartupProfiler, parse_args
+from tool_schemas import ToolSchemaCache
 
-def calculate_secret_hash(username, client_id, client_secret):
-    """Calculate SECRET_HASH for Cognito"""
-    message = username + client_id
-    dig = hmac.new(
-        client_secret.encode('utf-8'),
-        message.encode('utf-8'),
-        hashlib.sha256
-    ).digest()
-    return base64.b64encode(dig).decode()
+class CurrencyMCPClient(MCPHttpClient):
+    """Pooled MCP client for the currency server"""
 
-def authenticate_user(user_pool_id, client_id, client_secret, username, password):
-    """Authenticate user with username/password"""
-    try:
-        client = boto3.client('cognito-idp')
-        
-        # Calculate SECRET_HASH
-        secret_hash = calculate_secret_hash(username, client_id, client_secret)
-        
-        response = client.admin_initiate_auth(
-            UserPoolId=user_pool_id,
-            ClientId=client_id,
-            AuthFlow='ADMIN_NO_SRP_AUTH',
-            AuthParameters={
-                'USERNAME': username,
-                'PASSWORD': password,
-                'SECRET_HASH': secret_hash
-            }
-        )
-        return response['AuthenticationResult']['AccessToken']
-    except ClientError as e:
-        print(f"❌ Authentication failed: {e}")
-        return None
+class AsyncCurrencyMCPClient(AsyncMCPHttpClient):
+    """Async MCP client for the currency server"""
+
+    async def convert_many(self, amounts, timeout=None):
+        """Convert USD amounts concurrently, yielding (amount, result) as each completes"""
+        amounts = list(amounts)
+        calls = [("convert_usd_to_inr", {"amount": amount}) for amount in amounts]
+        async for index, result in self.call_tools(calls, timeout=timeout):
+            yield amounts[index], result
 
 def test_currency_server():
     """Test the Currency MCP server"""
     
     # Parse command line arguments
+    profile, args = parse_args(sys.argv[1:])
+    profiler = StartupProfiler(enabled=profile)
+    # MCP_TRACE=jsonl:- (or otlp:<file>) records per-phase timings of every call
+    tracer = tracer_from_env()
     amount = 100.0  # default
-    if len(sys.argv) > 1:
+    if args:
         try:
-            amount = float(sys.argv[1])
+            amount = float(args[0])
         except ValueError:
             print("❌ Invalid amount. Using default $100")
             amount = 100.0
@@ -126,7 +59,9 @@ def test_currency_server():
     access_token = None
     if user_pool_id and client_id and client_secret and username and password:
         print("🔑 Using username/password authentication...")
-        access_token = authenticate_user(user_pool_id, client_id, client_secret, username, password)
+        with maybe_span(tracer, "auth"):
+            access_token = authenticate_user(user_pool_id, client_id, client_secret, username, password)
+    profiler.mark("auth")
     
     if not access_token:
         print("❌ Failed to get access token. Check your configuration.")
@@ -134,70 +69,71 @@ def test_currency_server():
     
     print("✅ Got access token")
     
-    # Create MCP client
-    client = CurrencyMCPClient(server_url, access_token)
+    # Create MCP client (one pooled session for every call below)
+    # MCP_RETRY=off disables retries (MCP_RETRY=hedge only applies to the async client)
+    with CurrencyMCPClient(server_url, access_token, tracer=tracer,
+                           retry_policy=retry_policy_from_env()) as client:
     
-    # Test MCP calls
-    print("\n📋 Testing Currency MCP server...")
+        # Test MCP calls
+        print("\n📋 Testing Currency MCP server...")
     
-    # 1. Initialize
-    print("1. Initializing...")
-    result = client.call_mcp("initialize", {
-        "protocolVersion": "2024-11-05",
-        "capabilities": {},
-        "clientInfo": {"name": "currency-mcp-client", "version": "1.0.0"}
-    })
-    
-    if 'result' in result:
-        print(f"   ✅ Initialization successful!")
-        print(f"   Server: {result['result']['serverInfo']['name']} v{result['result']['serverInfo']['version']}")
-    else:
-        print(f"   ❌ Initialization failed: {result}")
-        return
-    
-    # 2. List tools
-    print("\n2. Listing tools...")
-    result = client.call_mcp("tools/list")
+        # 1. Initialize
+        print("1. Initializing...")
+        # Resumes a stored Mcp-Session-Id instead of re-initializing when it can
+        result = client.initialize(
+            {"name": "currency-mcp-client", "version": "1.0.0"},
+            store=SessionStore()
+        )
+        profiler.mark("first call (initialize)")
     
-    if 'result' in result and 'tools' in result['result']:
-        tools = result['result']['tools']
-        print(f"   ✅ Found {len(tools)} tools:")
-        for tool in tools:
-            print(f"      - {tool['name']}: {tool.get('description', 'No description')}")
-        
-        # 3. Get current exchange rate
-        print(f"\n3. Getting current USD to INR rate...")
-        result = client.call_mcp("tools/call", {
-            "name": "get_current_rate",
-            "arguments": {}
-        })
-        
         if 'result' in result:
-            print(f"   ✅ Current rate:")
-            for content in result['result']['content']:
-                if content['type'] == 'text':
-                    print(f"      {content['text']}")
+            print(f"   ✅ Initialization successful!")
+            print(f"   Server: {result['result']['serverInfo']['name']} v{result['result']['serverInfo']['version']}")
         else:
-            print(f"   ❌ Error: {result}")
+            print(f"   ❌ Initialization failed: {result}")
+            return
+    
+        # 2. List tools
+        print("\n2. Listing tools...")
+        # Served from the local schema cache when this server version was listed before
+        result = client.list_tools(cache=ToolSchemaCache())
+    
+        if 'result' in result and 'tools' in result['result']:
+            tools = result['result']['tools']
+            print(f"   ✅ Found {len(tools)} tools:")
+            for tool in tools:
+                print(f"      - {tool['name']}: {tool.get('description', 'No description')}")
         
-        # 4. Convert USD to INR
-        print(f"\n4. Converting ${amount} USD to INR...")
-        result = client.call_mcp("tools/call", {
-            "name": "convert_usd_to_inr",
-            "arguments": {"amount": amount}
-        })
+            # 3. Get current exchange rate
+            print(f"\n3. Getting current USD to INR rate...")
+            result = client.call_tool("get_current_rate", {})
         
-        if 'result' in result:
-            print(f"   ✅ Conversion result:")
-            for content in result['result']['content']:
-                if content['type'] == 'text':
-                    print(f"      {content['text']}")
+            if 'result' in result:
+                print(f"   ✅ Current rate:")
+                for content in result['result']['content']:
+                    if content['type'] == 'text':
+                        print(f"      {content['text']}")
+            else:
+                print(f"   ❌ Error: {result}")
+        
+            # 4. Convert USD to INR
+            print(f"\n4. Converting ${amount} USD to INR...")
+            result = client.call_tool("convert_usd_to_inr", {"amount": amount})
+        
+            if 'result' in result:
+                print(f"   ✅ Conversion result:")
+                for content in result['result']['content']:
+                    if content['type'] == 'text':
+                        print(f"      {content['text']}")
+            else:
+                print(f"   ❌ Error: {result}")
         else:
-            print(f"   ❌ Error: {result}")
-    else:
-        print(f"   ❌ Error listing tools: {result}")
+            print(f"   ❌ Error listing tools: {result}")
     
     print("\n🎉 Currency MCP client test completed!")
 
+    if not profiler.report():
+        sys.exit(1)
+
 if __name__ == "__main__":
     test_currency_server()
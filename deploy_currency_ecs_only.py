@@ -1,242 +1,174 @@
 #!/usr/bin/env python3
 """
 Deploy currency server to ECS only (skip Lambda issues)
+Incremental: the image is tagged by a hash of currency-mcp-server/ and the
+stack by a hash of its template, so unchanged parts are not rebuilt or
+redeployed
 """
 
+import argparse
 import json
-import subprocess
-import sys
 import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-def run_command(cmd, description):
-    """Run a command and return the result"""
-    print(f"🔄 {description}...")
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=True)
-        print(f"✅ {description} completed")
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed: {e.stderr}")
-        return None
-
-def main():
-    print("🚀 Deploying Currency MCP Server (ECS Only)")
-    
-    # Use CloudFormation directly to add currency server
-    template = {
-        "AWSTemplateFormatVersion": "2010-09-09",
-        "Description": "Add Currency MCP Server to existing infrastructure",
-        "Parameters": {
-            "ClusterName": {
-                "Type": "String",
-                "Default": "MCP-Server-MCPCluster399F09A9-5IC7REEeuGUi"
-            },
-            "VpcId": {
-                "Type": "String", 
-                "Default": "vpc-028ca3fccc2d82f52"
-            },
-            "PrivateSubnet1": {
-                "Type": "String",
-                "Default": "subnet-042f67a847ae8c71b"
-            },
-            "PrivateSubnet2": {
-                "Type": "String", 
-                "Default": "subnet-07a7a8ed0ca043f03"
-            },
-            "LoadBalancerArn": {
-                "Type": "String",
-                "Default": "arn:aws:elasticloadbalancing:us-east-1:039920874011:loadbalancer/app/MCP-Se-Appli-8ufFzwXfhUDS/e6accb8269ee4a75"
-            },
-            "ListenerArn": {
-                "Type": "String", 
-                "Default": "arn:aws:elasticloadbalancing:us-east-1:039920874011:listener/app/MCP-Se-Appli-8ufFzwXfhUDS/e6accb8269ee4a75/c727f12a09a34cf6"
-            }
-        },
-        "Resources": {
-            "CurrencyTaskDefinition": {
-                "Type": "AWS::ECS::TaskDefinition",
-                "Properties": {
-                    "Family": "currency-mcp-server",
-                    "NetworkMode": "awsvpc",
-                    "RequiresCompatibilities": ["FARGATE"],
-                    "Cpu": "256",
-                    "Memory": "512",
-                    "ExecutionRoleArn": {"Fn::GetAtt": ["CurrencyExecutionRole", "Arn"]},
-                    "TaskRoleArn": {"Fn::GetAtt": ["CurrencyTaskRole", "Arn"]},
-                    "ContainerDefinitions": [{
-                        "Name": "currency-server",
-                        "Image": "039920874011.dkr.ecr.us-east-1.amazonaws.com/currency-mcp:latest",
-                        "PortMappings": [{"ContainerPort": 8080}],
-                        "Environment": [
-                            {"Name": "PORT", "Value": "8080"},
-                            {"Name": "BASE_PATH", "Value": "/currency-nodejs"},
-                            {"Name": "AWS_REGION", "Value": "us-east-1"},
-                            {"Name": "COGNITO_USER_POOL_ID", "Value": "us-east-1_4ygzD9mcV"},
-                            {"Name": "COGNITO_CLIENT_ID", "Value": "2n1lel48549hho97cvcdbra0ae"}
-                        ],
-                        "LogConfiguration": {
-                            "LogDriver": "awslogs",
-                            "Options": {
-                                "awslogs-group": {"Ref": "CurrencyLogGroup"},
-                                "awslogs-region": "us-east-1",
-                                "awslogs-stream-prefix": "currency"
-                            }
-                        },
-                        "HealthCheck": {
-                            "Command": ["CMD-SHELL", "curl -f http://localhost:8080/currency-nodejs/ || exit 1"],
-                            "Interval": 30,
-                            "Timeout": 5,
-                            "Retries": 3
-                        }
-                    }]
-                }
-            },
-            "CurrencyLogGroup": {
-                "Type": "AWS::Logs::LogGroup",
-                "Properties": {
-                    "LogGroupName": "/ecs/currency-mcp-server",
-                    "RetentionInDays": 7
-                }
-            },
-            "CurrencyExecutionRole": {
-                "Type": "AWS::IAM::Role",
-                "Properties": {
-                    "AssumeRolePolicyDocument": {
-                        "Version": "2012-10-17",
-                        "Statement": [{
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ecs-tasks.amazonaws.com"},
-                            "Action": "sts:AssumeRole"
-                        }]
-                    },
-                    "ManagedPolicyArns": [
-                        "arn:aws:iam::aws:policy/service-role/AmazonECSTaskExecutionRolePolicy"
-                    ]
-                }
-            },
-            "CurrencyTaskRole": {
-                "Type": "AWS::IAM::Role", 
-                "Properties": {
-                    "AssumeRolePolicyDocument": {
-                        "Version": "2012-10-17",
-                        "Statement": [{
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ecs-tasks.amazonaws.com"},
-                            "Action": "sts:AssumeRole"
-                        }]
-                    }
-                }
-            },
-            "CurrencySecurityGroup": {
-                "Type": "AWS::EC2::SecurityGroup",
-                "Properties": {
-                    "GroupDescription": "Security group for currency MCP server",
-                    "VpcId": {"Ref": "VpcId"},
-                    "SecurityGroupIngress": [{
-                        "IpProtocol": "tcp",
-                        "FromPort": 8080,
-                        "ToPort": 8080,
-                        "SourceSecurityGroupId": "sg-0b121219e1a505160"
-                    }]
-                }
-            },
-            "CurrencyTargetGroup": {
-                "Type": "AWS::ElasticLoadBalancingV2::TargetGroup",
-                "Properties": {
-                    "Name": "currency-mcp-targets",
-                    "Port": 8080,
-                    "Protocol": "HTTP",
-                    "VpcId": {"Ref": "VpcId"},
-                    "TargetType": "ip",
-                    "HealthCheckPath": "/currency-nodejs/",
-                    "HealthCheckProtocol": "HTTP",
-                    "HealthCheckIntervalSeconds": 30,
-                    "HealthyThresholdCount": 2,
-                    "UnhealthyThresholdCount": 5
-                }
-            },
-            "CurrencyService": {
-                "Type": "AWS::ECS::Service",
-                "Properties": {
-                    "ServiceName": "currency-mcp-service",
-                    "Cluster": {"Ref": "ClusterName"},
-                    "TaskDefinition": {"Ref": "CurrencyTaskDefinition"},
-                    "DesiredCount": 1,
-                    "LaunchType": "FARGATE",
-                    "NetworkConfiguration": {
-                        "AwsvpcConfiguration": {
-                            "Subnets": [{"Ref": "PrivateSubnet1"}, {"Ref": "PrivateSubnet2"}],
-                            "SecurityGroups": [{"Ref": "CurrencySecurityGroup"}]
-                        }
-                    },
-                    "LoadBalancers": [{
-                        "TargetGroupArn": {"Ref": "CurrencyTargetGroup"},
-                        "ContainerName": "currency-server",
-                        "ContainerPort": 8080
-                    }]
-                }
-            },
-            "CurrencyListenerRule": {
-                "Type": "AWS::ElasticLoadBalancingV2::ListenerRule",
-                "Properties": {
-                    "ListenerArn": {"Ref": "ListenerArn"},
-                    "Priority": 23,
-                    "Conditions": [{
-                        "Field": "path-pattern",
-                        "Values": ["/currency-nodejs/*"]
-                    }],
-                    "Actions": [{
-                        "Type": "forward",
-                        "TargetGroupArn": {"Ref": "CurrencyTargetGroup"}
-                    }]
-                }
-            }
-        },
-        "Outputs": {
-            "CurrencyServiceArn": {
-                "Value": {"Ref": "CurrencyService"},
-                "Description": "Currency MCP Service ARN"
-            },
-            "CurrencyEndpoint": {
-                "Value": "https://d3v422fv5soy13.cloudfront.net/currency-nodejs/mcp",
-                "Description": "Currency MCP Server Endpoint"
-            }
-        }
-    }
-    
-    # Write template to file
-    with open('/tmp/currency-server.json', 'w') as f:
+import ecs_template
+from deploy_plan import (
+    DEFAULT_MAX_WORKERS,
+    DryRunRunner,
+    Stage,
+    hash_json,
+    hash_tree,
+    print_plan,
+    run_command,
+    run_stages,
+)
+
+REGION = "us-east-1"
+REGISTRY = "039920874011.dkr.ecr.us-east-1.amazonaws.com"
+REPOSITORY = "currency-mcp"
+STACK_NAME = "Currency-MCP-Server"
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "currency-mcp-server")
+TEMPLATE_PATH = "/tmp/currency-server.json"
+# Stack tag recording which template the stack was last deployed from
+TEMPLATE_HASH_TAG = "TemplateHash"
+
+# Declarative spec for ecs_template; "image" is filled in with the content-hashed tag
+CURRENCY_SERVER = {
+    "name": "currency",
+    "path": "/currency-nodejs",
+    "priority": 23,
+    "environment": {
+        "AWS_REGION": REGION,
+        "COGNITO_USER_POOL_ID": "us-east-1_4ygzD9mcV",
+        "COGNITO_CLIENT_ID": "2n1lel48549hho97cvcdbra0ae",
+    },
+}
+
+
+def image_tag(source_hash):
+    """Content-addressed image tag: the same source always maps to the same tag"""
+    return f"src-{source_hash[:12]}"
+
+
+def build_template(image_uri):
+    """CloudFormation template for the currency service running image_uri"""
+    return ecs_template.build_template(
+        [{**CURRENCY_SERVER, "image": image_uri}],
+        description="Add Currency MCP Server to existing infrastructure",
+    )
+
+
+def deployed_state(runner, tag):
+    """Whether ECR already has the image tag, and the template hash the stack was deployed with.
+
+    Both probes are read-only and run in parallel; a failed probe reads as
+    "not deployed", which at worst costs a redundant build or deploy.
+    """
+    image_probe = [
+        "aws", "ecr", "describe-images", "--repository-name", REPOSITORY,
+        "--image-ids", f"imageTag={tag}", "--region", REGION,
+        "--query", "imageDetails[0].imageDigest", "--output", "text",
+    ]
+    stack_probe = [
+        "aws", "cloudformation", "describe-stacks", "--stack-name", STACK_NAME, "--region", REGION,
+        "--query", f"Stacks[0].Tags[?Key=='{TEMPLATE_HASH_TAG}'].Value | [0]", "--output", "text",
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        image = pool.submit(runner, image_probe, "Checking ECR for the image", quiet=True)
+        stack = pool.submit(runner, stack_probe, "Checking the deployed template", quiet=True)
+        image_exists = (image.result() or "").strip() not in ("", "None")
+        stack_hash = (stack.result() or "").strip()
+    return image_exists, stack_hash
+
+
+def plan_deploy(runner, force=False, template_path=None, server_dir=None):
+    """Hash the inputs, compare with what is deployed and return the stages to run.
+
+    The template is written to template_path (default TEMPLATE_PATH) and
+    the image is built from server_dir (default SERVER_DIR). Validation
+    runs alongside the image build; the stack deploy waits for both and
+    for the push.
+    """
+    template_path = template_path or TEMPLATE_PATH
+    server_dir = server_dir or SERVER_DIR
+    tag = image_tag(hash_tree(server_dir))
+    image_uri = f"{REGISTRY}/{REPOSITORY}:{tag}"
+    template = build_template(image_uri)
+    template_hash = hash_json(template)
+    with open(template_path, "w") as f:
         json.dump(template, f, indent=2)
-    
-    print("📝 Created CloudFormation template")
-    
-    # First, build and push the Docker image
-    print("🐳 Building and pushing Docker image...")
-    
-    # Create ECR repository
-    run_command("aws ecr create-repository --repository-name currency-mcp --region us-east-1 || true", "Creating ECR repository")
-    
-    # Get ECR login
-    login_cmd = subprocess.run("aws ecr get-login-password --region us-east-1", shell=True, capture_output=True, text=True)
-    if login_cmd.returncode == 0:
-        subprocess.run(f"echo {login_cmd.stdout.strip()} | docker login --username AWS --password-stdin 039920874011.dkr.ecr.us-east-1.amazonaws.com", shell=True)
-    
-    # Build and push image
-    os.chdir("/workspaces/mcpserverdeployment-solution/currency-mcp-server")
-    run_command("docker build -t currency-mcp .", "Building Docker image")
-    run_command("docker tag currency-mcp:latest 039920874011.dkr.ecr.us-east-1.amazonaws.com/currency-mcp:latest", "Tagging image")
-    run_command("docker push 039920874011.dkr.ecr.us-east-1.amazonaws.com/currency-mcp:latest", "Pushing image to ECR")
-    
-    # Deploy CloudFormation stack
-    result = run_command("aws cloudformation deploy --template-file /tmp/currency-server.json --stack-name Currency-MCP-Server --capabilities CAPABILITY_IAM --region us-east-1", "Deploying currency server stack")
-    
-    if result is not None:
-        print("🎉 Currency server deployed successfully!")
-        print("🔗 Currency server URL: https://d3v422fv5soy13.cloudfront.net/currency-nodejs/mcp")
-        return True
-    else:
-        print("❌ Deployment failed")
+    print(f"📝 Created CloudFormation template (image {tag}, template {template_hash[:12]})")
+
+    image_exists, stack_hash = deployed_state(runner, tag)
+    build_image = force or not image_exists
+    update_stack = force or stack_hash != template_hash
+    if not build_image:
+        print(f"♻️ Image {tag} is already in ECR")
+    if not update_stack:
+        print("♻️ Stack is already deployed from this template")
+
+    return [
+        Stage("repository", "Creating ECR repository", [
+            "sh", "-c",
+            f"aws ecr describe-repositories --repository-names {REPOSITORY} --region {REGION} >/dev/null 2>&1"
+            f" || aws ecr create-repository --repository-name {REPOSITORY} --region {REGION}",
+        ], needed=build_image),
+        # The password goes through a pipe, never onto a command line
+        Stage("login", "Logging in to ECR", [
+            "sh", "-c",
+            f"aws ecr get-login-password --region {REGION}"
+            f" | docker login --username AWS --password-stdin {REGISTRY}",
+        ], needed=build_image),
+        Stage("build", "Building Docker image", ["docker", "build", "-t", image_uri, server_dir], needed=build_image),
+        Stage("push", "Pushing image to ECR", ["docker", "push", image_uri],
+              needs=("repository", "login", "build"), needed=build_image),
+        Stage("validate", "Validating template", [
+            "aws", "cloudformation", "validate-template",
+            "--template-body", f"file://{template_path}", "--region", REGION,
+        ], needed=update_stack),
+        Stage("deploy", "Deploying currency server stack", [
+            "aws", "cloudformation", "deploy", "--template-file", template_path,
+            "--stack-name", STACK_NAME, "--capabilities", "CAPABILITY_IAM", "--region", REGION,
+            "--tags", f"{TEMPLATE_HASH_TAG}={template_hash}", "--no-fail-on-empty-changeset",
+        ], needs=("push", "validate"), needed=update_stack),
+    ]
+
+
+def main(argv=None, runner=run_command):
+    parser = argparse.ArgumentParser(description="Deploy the currency MCP server to ECS")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="check what is deployed and print the commands instead of running them")
+    parser.add_argument("--force", action="store_true", help="rebuild and redeploy even if nothing changed")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="stages to run at once (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.dry_run:
+        runner = DryRunRunner(runner)
+
+    print("🚀 Deploying Currency MCP Server (ECS Only)")
+    # A dry run leaves no template behind to be mistaken for the deployed one
+    with tempfile.TemporaryDirectory() as scratch:
+        template_path = os.path.join(scratch, "currency-server.json") if args.dry_run else TEMPLATE_PATH
+        stages = plan_deploy(runner, force=args.force, template_path=template_path)
+        print("📋 Plan:")
+        print_plan(stages)
+        status = run_stages(stages, runner, max_workers=args.max_workers)
+
+    failed = [name for name, state in status.items() if state in ("failed", "blocked")]
+    if failed:
+        print(f"❌ Deployment failed ({', '.join(f'{name} {status[name]}' for name in failed)})")
         return False
+    if args.dry_run:
+        print("📝 Dry run, nothing was changed")
+    elif all(state == "skipped" for state in status.values()):
+        print("🎉 Currency server is up to date, nothing to deploy")
+    else:
+        print("🎉 Currency server deployed successfully!")
+    print("🔗 Currency server URL: https://d3v422fv5soy13.cloudfront.net/currency-nodejs/mcp")
+    return True
+
 
 if __name__ == "__main__":
     success = main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Incremental deploy planning: content hashes, stages and a parallel runner
+Stages whose inputs already match what is deployed are skipped, and
+independent stages run side by side
+"""
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Build outputs and installed packages are not inputs to the image
+HASH_IGNORED = {'node_modules', 'dist', '.git', '__pycache__'}
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def hash_tree(root, ignored=HASH_IGNORED):
+    """SHA-256 over every file's relative path and content under root"""
+    digest = hashlib.sha256()
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d not in ignored)
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).replace(os.sep, '/').encode() + b'\0')
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 16), b''):
+                    digest.update(block)
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def hash_json(document):
+    """SHA-256 of a JSON document, independent of key order"""
+    return hashlib.sha256(json.dumps(document, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def run_command(cmd, description, input=None, quiet=False):
+    """Run a command (argument list) and return its stdout, or None if it failed.
+
+    quiet skips the progress lines, for probes where failure is an answer.
+    """
+    if not quiet:
+        print(f"🔄 {description}...")
+    try:
+        result = subprocess.run(cmd, input=input, capture_output=True, text=True, check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        if not quiet:
+            print(f"❌ {description} failed: {getattr(e, 'stderr', None) or e}")
+        return None
+    if not quiet:
+        print(f"✅ {description} completed")
+    return result.stdout
+
+
+class StubRunner:
+    """Stands in for run_command offline: records every command and answers from a table.
+
+    `responses` maps a command prefix (tuple of leading arguments) to the
+    stdout to return, or None to fail; unmatched commands succeed with "".
+    """
+
+    def __init__(self, responses=None):
+        self.responses = {tuple(prefix): output for prefix, output in (responses or {}).items()}
+        self.calls = []
+
+    def __call__(self, cmd, description, input=None, quiet=False):
+        self.calls.append(list(cmd))
+        for prefix, output in self.responses.items():
+            if tuple(cmd[:len(prefix)]) == prefix:
+                return output
+        return ''
+
+
+class DryRunRunner:
+    """Runs read-only probes for real and only prints every other command"""
+
+    def __init__(self, runner=run_command):
+        self.runner = runner
+
+    def __call__(self, cmd, description, input=None, quiet=False):
+        if quiet:
+            return self.runner(cmd, description, input=input, quiet=quiet)
+        print(f"📝 Would run: {' '.join(cmd)}")
+        return ''
+
+
+class Stage:
+    """One deploy step: a command, the stages it waits for, and whether it is needed.
+
+    A stage with needed=False is skipped, but still counts as done for the
+    stages after it. `input` is fed to the command's stdin.
+    """
+
+    def __init__(self, name, description, cmd, needs=(), needed=True, input=None):
+        self.name = name
+        self.description = description
+        self.cmd = cmd
+        self.needs = tuple(needs)
+        self.needed = needed
+        self.input = input
+
+
+def print_plan(stages):
+    for stage in stages:
+        after = f" (after {', '.join(stage.needs)})" if stage.needs else ''
+        print(f"   {'▶️ run' if stage.needed else '⏭️ skip'} {stage.name}{after}")
+
+
+def run_stages(stages, runner=run_command, max_workers=DEFAULT_MAX_WORKERS):
+    """Run stages as soon as their dependencies finish, up to max_workers at once.
+
+    A failed stage stops everything that depends on it; stages already
+    running are left to finish. Returns {name: "done" | "skipped" |
+    "failed" | "blocked"}.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [need for need in stage.needs if need not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' needs unknown stages: {', '.join(missing)}")
+
+    status = {}
+    waiting = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while waiting or running:
+            progressed = False
+            for stage in list(waiting):
+                needs = [status.get(need) for need in stage.needs]
+                if any(state in ('failed', 'blocked') for state in needs):
+                    status[stage.name] = 'blocked'
+                elif all(state in ('done', 'skipped') for state in needs):
+                    if stage.needed:
+                        running[pool.submit(runner, stage.cmd, stage.description, input=stage.input)] = stage
+                    else:
+                        status[stage.name] = 'skipped'
+                else:
+                    continue
+                waiting.remove(stage)
+                progressed = True
+            if not running:
+                if not progressed:
+                    raise ValueError(f"Stages wait on each other: {', '.join(stage.name for stage in waiting)}")
+                # Skips and blocks can unlock more stages without anything running
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                status[stage.name] = 'failed' if future.result() is None else 'done'
+    return status
+
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+CloudFormation for N MCP servers on one ECS cluster and ALB, from a declarative spec
+Each server gets its Fargate service, target group and listener rule, plus
+target-tracking autoscaling on ALB requests per task and on CPU
+"""
+import argparse
+import copy
+import json
+import re
+import sys
+
+# Parameters shared by every server; defaults are the existing MCP-Server stack
+PARAMETERS = {
+    "ClusterName": "MCP-Server-MCPCluster399F09A9-5IC7REEeuGUi",
+    "VpcId": "vpc-028ca3fccc2d82f52",
+    "PrivateSubnet1": "subnet-042f67a847ae8c71b",
+    "PrivateSubnet2": "subnet-07a7a8ed0ca043f03",
+    "LoadBalancerArn": "arn:aws:elasticloadbalancing:us-east-1:039920874011:loadbalancer/app/MCP-Se-Appli-8ufFzwXfhUDS/e6accb8269ee4a75",
+    "ListenerArn": "arn:aws:elasticloadbalancing:us-east-1:039920874011:listener/app/MCP-Se-Appli-8ufFzwXfhUDS/e6accb8269ee4a75/c727f12a09a34cf6",
+    "AlbSecurityGroupId": "sg-0b121219e1a505160",
+}
+
+DEFAULT_BASE_URL = "https://d3v422fv5soy13.cloudfront.net"
+
+# Every server spec is merged over these. One Node process uses about one
+# vCPU at most, so scale out with tasks rather than up with task size.
+SERVER_DEFAULTS = {
+    "port": 8080,
+    "cpu": 512,
+    "memory": 1024,
+    "environment": {},
+    "scaling": {
+        "min_tasks": 2,
+        "max_tasks": 10,
+        # ALBRequestCountPerTarget is a per-minute sum: 1200 is about 20 req/s per task
+        "requests_per_target_per_minute": 1200,
+        "cpu_target_percent": 60,
+        # Add tasks quickly, remove them slowly so a burst doesn't flap the service
+        "scale_out_cooldown": 60,
+        "scale_in_cooldown": 300,
+    },
+    # Tuned for a container that listens within a few seconds of starting
+    "health_check": {
+        "interval": 10,
+        "timeout": 5,
+        "healthy_threshold": 2,
+        "unhealthy_threshold": 3,
+        "start_period": 15,
+        "grace_period": 30,
+        # Responses are short SSE streams, so draining needs seconds, not the 300s default
+        "deregistration_delay": 30,
+    },
+}
+
+# Fargate CPU units and the memory sizes (MiB) each one allows
+FARGATE_MEMORY = {
+    256: (512, 1024, 2048),
+    512: tuple(range(1024, 4097, 1024)),
+    1024: tuple(range(2048, 8193, 1024)),
+    2048: tuple(range(4096, 16385, 1024)),
+    4096: tuple(range(8192, 30721, 1024)),
+}
+
+REQUIRED_KEYS = ("name", "path", "image", "priority")
+
+
+def _merge(defaults, overrides):
+    merged = copy.deepcopy(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def normalize_server(spec):
+    """A server spec with defaults filled in; raises ValueError if it can't be deployed"""
+    missing = [key for key in REQUIRED_KEYS if key not in spec]
+    if missing:
+        raise ValueError(f"Server spec {spec.get('name', '?')!r} is missing {', '.join(missing)}")
+    server = _merge(SERVER_DEFAULTS, spec)
+    if not re.fullmatch(r"[a-z][a-z0-9-]*", server["name"]):
+        raise ValueError(f"Server name {server['name']!r} must be lowercase letters, digits and dashes")
+    server["path"] = "/" + server["path"].strip("/")
+    if server["memory"] not in FARGATE_MEMORY.get(server["cpu"], ()):
+        raise ValueError(f"{server['name']}: Fargate has no {server['cpu']} CPU / {server['memory']} MiB task size")
+    scaling = server["scaling"]
+    if not 1 <= scaling["min_tasks"] <= scaling["max_tasks"]:
+        raise ValueError(f"{server['name']}: need 1 <= min_tasks <= max_tasks")
+    health = server["health_check"]
+    if health["timeout"] >= health["interval"]:
+        raise ValueError(f"{server['name']}: health check timeout must be shorter than its interval")
+    return server
+
+
+def logical_prefix(name):
+    """CloudFormation logical id prefix for a server: "currency" -> "Currency" """
+    return "".join(part.capitalize() for part in name.split("-"))
+
+
+def _health_command(server):
+    # node is in every Node.js image; curl is not (node:18-alpine lacks it)
+    url = f"http://localhost:{server['port']}{server['path']}/"
+    script = f"fetch('{url}').then(r => process.exit(r.ok ? 0 : 1), () => process.exit(1))"
+    return ["CMD-SHELL", f'node -e "{script}"']
+
+
+def server_resources(server):
+    """Resources for one normalized server spec, keyed by logical id"""
+    prefix = logical_prefix(server["name"])
+    name = server["name"]
+    port = server["port"]
+    health = server["health_check"]
+    scaling = server["scaling"]
+    assume_ecs_tasks = {
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow",
+            "Principal": {"Service": "ecs-tasks.amazonaws.com"},
+            "Action": "sts:AssumeRole"
+        }]
+    }
+    resources = {
+        f"{prefix}TaskDefinition": {
+            "Type": "AWS::ECS::TaskDefinition",
+            "Properties": {
+                "Family": f"{name}-mcp-server",
+                "NetworkMode": "awsvpc",
+                "RequiresCompatibilities": ["FARGATE"],
+                "Cpu": str(server["cpu"]),
+                "Memory": str(server["memory"]),
+                "ExecutionRoleArn": {"Fn::GetAtt": [f"{prefix}ExecutionRole", "Arn"]},
+                "TaskRoleArn": {"Fn::GetAtt": [f"{prefix}TaskRole", "Arn"]},
+                "ContainerDefinitions": [{
+                    "Name": f"{name}-server",
+                    "Image": server["image"],
+                    "PortMappings": [{"ContainerPort": port}],
+                    "Environment": [
+                        {"Name": "PORT", "Value": str(port)},
+                        {"Name": "BASE_PATH", "Value": server["path"]},
+                        *({"Name": key, "Value": str(value)} for key, value in server["environment"].items()),
+                    ],
+                    "LogConfiguration": {
+                        "LogDriver": "awslogs",
+                        "Options": {
+                            "awslogs-group": {"Ref": f"{prefix}LogGroup"},
+                            "awslogs-region": {"Ref": "AWS::Region"},
+                            "awslogs-stream-prefix": name
+                        }
+                    },
+                    "HealthCheck": {
+                        "Command": _health_command(server),
+                        "Interval": health["interval"],
+                        "Timeout": health["timeout"],
+                        "Retries": health["unhealthy_threshold"],
+                        "StartPeriod": health["start_period"]
+                    }
+                }]
+            }
+        },
+        f"{prefix}LogGroup": {
+            "Type": "AWS::Logs::LogGroup",
+            "Properties": {
+                "LogGroupName": f"/ecs/{name}-mcp-server",
+                "RetentionInDays": 7
+            }
+        },
+        f"{prefix}ExecutionRole": {
+            "Type": "AWS::IAM::Role",
+            "Properties": {
+                "AssumeRolePolicyDocument": assume_ecs_tasks,
+                "ManagedPolicyArns": [
+                    "arn:aws:iam::aws:policy/service-role/AmazonECSTaskExecutionRolePolicy"
+                ]
+            }
+        },
+        f"{prefix}TaskRole": {
+            "Type": "AWS::IAM::Role",
+            "Properties": {
+                "AssumeRolePolicyDocument": assume_ecs_tasks
+            }
+        },
+        f"{prefix}SecurityGroup": {
+            "Type": "AWS::EC2::SecurityGroup",
+            "Properties": {
+                "GroupDescription": f"Security group for {name} MCP server",
+                "VpcId": {"Ref": "VpcId"},
+                "SecurityGroupIngress": [{
+                    "IpProtocol": "tcp",
+                    "FromPort": port,
+                    "ToPort": port,
+                    "SourceSecurityGroupId": {"Ref": "AlbSecurityGroupId"}
+                }]
+            }
+        },
+        f"{prefix}TargetGroup": {
+            "Type": "AWS::ElasticLoadBalancingV2::TargetGroup",
+            "Properties": {
+                "Name": f"{name}-mcp-targets",
+                "Port": port,
+                "Protocol": "HTTP",
+                "VpcId": {"Ref": "VpcId"},
+                "TargetType": "ip",
+                "HealthCheckPath": f"{server['path']}/",
+                "HealthCheckProtocol": "HTTP",
+                "HealthCheckIntervalSeconds": health["interval"],
+                "HealthCheckTimeoutSeconds": health["timeout"],
+                "HealthyThresholdCount": health["healthy_threshold"],
+                "UnhealthyThresholdCount": health["unhealthy_threshold"],
+                "TargetGroupAttributes": [{
+                    "Key": "deregistration_delay.timeout_seconds",
+                    "Value": str(health["deregistration_delay"])
+                }]
+            }
+        },
+        f"{prefix}ListenerRule": {
+            "Type": "AWS::ElasticLoadBalancingV2::ListenerRule",
+            "Properties": {
+                "ListenerArn": {"Ref": "ListenerArn"},
+                "Priority": server["priority"],
+                "Conditions": [{
+                    "Field": "path-pattern",
+                    "Values": [f"{server['path']}/*"]
+                }],
+                "Actions": [{
+                    "Type": "forward",
+                    "TargetGroupArn": {"Ref": f"{prefix}TargetGroup"}
+                }]
+            }
+        },
+        f"{prefix}Service": {
+            "Type": "AWS::ECS::Service",
+            # ECS rejects a target group that no listener forwards to yet
+            "DependsOn": f"{prefix}ListenerRule",
+            "Properties": {
+                "ServiceName": f"{name}-mcp-service",
+                "Cluster": {"Ref": "ClusterName"},
+                "TaskDefinition": {"Ref": f"{prefix}TaskDefinition"},
+                # No DesiredCount: autoscaling owns it, and a fixed value would reset the
+                # task count on every stack update (the scalable target enforces min_tasks)
+                "LaunchType": "FARGATE",
+                "HealthCheckGracePeriodSeconds": health["grace_period"],
+                "DeploymentConfiguration": {
+                    "MinimumHealthyPercent": 100,
+                    "MaximumPercent": 200,
+                    "DeploymentCircuitBreaker": {"Enable": True, "Rollback": True}
+                },
+                "NetworkConfiguration": {
+                    "AwsvpcConfiguration": {
+                        "Subnets": [{"Ref": "PrivateSubnet1"}, {"Ref": "PrivateSubnet2"}],
+                        "SecurityGroups": [{"Ref": f"{prefix}SecurityGroup"}]
+                    }
+                },
+                "LoadBalancers": [{
+                    "TargetGroupArn": {"Ref": f"{prefix}TargetGroup"},
+                    "ContainerName": f"{name}-server",
+                    "ContainerPort": port
+                }]
+            }
+        },
+        f"{prefix}ScalableTarget": {
+            "Type": "AWS::ApplicationAutoScaling::ScalableTarget",
+            "Properties": {
+                "ServiceNamespace": "ecs",
+                "ScalableDimension": "ecs:service:DesiredCount",
+                "ResourceId": {"Fn::Join": ["/", [
+                    "service", {"Ref": "ClusterName"}, {"Fn::GetAtt": [f"{prefix}Service", "Name"]}
+                ]]},
+                "MinCapacity": scaling["min_tasks"],
+                "MaxCapacity": scaling["max_tasks"]
+            }
+        },
+        f"{prefix}RequestCountScaling": {
+            "Type": "AWS::ApplicationAutoScaling::ScalingPolicy",
+            "Properties": {
+                "PolicyName": f"{name}-requests-per-target",
+                "PolicyType": "TargetTrackingScaling",
+                "ScalingTargetId": {"Ref": f"{prefix}ScalableTarget"},
+                "TargetTrackingScalingPolicyConfiguration": {
+                    "PredefinedMetricSpecification": {
+                        "PredefinedMetricType": "ALBRequestCountPerTarget",
+                        # app/<lb-name>/<lb-id>/targetgroup/<tg-name>/<tg-id>
+                        "ResourceLabel": {"Fn::Join": ["/", [
+                            {"Fn::Select": [1, {"Fn::Split": ["loadbalancer/", {"Ref": "LoadBalancerArn"}]}]},
+                            {"Fn::GetAtt": [f"{prefix}TargetGroup", "TargetGroupFullName"]}
+                        ]]}
+                    },
+                    "TargetValue": scaling["requests_per_target_per_minute"],
+                    "ScaleOutCooldown": scaling["scale_out_cooldown"],
+                    "ScaleInCooldown": scaling["scale_in_cooldown"]
+                }
+            }
+        },
+        f"{prefix}CpuScaling": {
+            "Type": "AWS::ApplicationAutoScaling::ScalingPolicy",
+            "Properties": {
+                "PolicyName": f"{name}-cpu",
+                "PolicyType": "TargetTrackingScaling",
+                "ScalingTargetId": {"Ref": f"{prefix}ScalableTarget"},
+                "TargetTrackingScalingPolicyConfiguration": {
+                    "PredefinedMetricSpecification": {
+                        "PredefinedMetricType": "ECSServiceAverageCPUUtilization"
+                    },
+                    "TargetValue": scaling["cpu_target_percent"],
+                    "ScaleOutCooldown": scaling["scale_out_cooldown"],
+                    "ScaleInCooldown": scaling["scale_in_cooldown"]
+                }
+            }
+        },
+    }
+    return resources
+
+
+def build_template(servers, base_url=DEFAULT_BASE_URL, description="MCP servers on ECS Fargate"):
+    """CloudFormation template (a dict) for a list of server specs"""
+    servers = [normalize_server(spec) for spec in servers]
+    if not servers:
+        raise ValueError("No servers in spec")
+    for key in ("name", "path", "priority"):
+        values = [server[key] for server in servers]
+        duplicates = sorted({str(value) for value in values if values.count(value) > 1})
+        if duplicates:
+            raise ValueError(f"Servers share a {key}: {', '.join(duplicates)}")
+
+    resources = {}
+    outputs = {}
+    for server in servers:
+        prefix = logical_prefix(server["name"])
+        resources.update(server_resources(server))
+        outputs[f"{prefix}ServiceArn"] = {
+            "Value": {"Ref": f"{prefix}Service"},
+            "Description": f"{prefix} MCP Service ARN"
+        }
+        outputs[f"{prefix}Endpoint"] = {
+            "Value": f"{base_url}{server['path']}/mcp",
+            "Description": f"{prefix} MCP Server Endpoint"
+        }
+    return {
+        "AWSTemplateFormatVersion": "2010-09-09",
+        "Description": description,
+        "Parameters": {name: {"Type": "String", "Default": default} for name, default in PARAMETERS.items()},
+        "Resources": resources,
+        "Outputs": outputs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CloudFormation for MCP servers from a JSON spec")
+    parser.add_argument("spec", help='JSON file: {"base_url": ..., "servers": [{"name", "path", "image", "priority", ...}]}')
+    parser.add_argument("-o", "--output", help="write the template here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    try:
+        template = build_template(spec["servers"], spec.get("base_url", DEFAULT_BASE_URL))
+    except (KeyError, ValueError) as e:
+        print(f"❌ Invalid spec: {e}", file=sys.stderr)
+        return 1
+    text = json.dumps(template, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"📝 Wrote template for {len(spec['servers'])} servers to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
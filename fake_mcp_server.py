@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the currency MCP server and its Cognito user pool
+Speaks the same JSON-RPC/SSE framing as currency-mcp-server/src/index.ts,
+so the clients and mcp-bench can run end-to-end with no network
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from cognito_auth import CognitoError, calculate_secret_hash
+
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$')
+
+DEFAULT_RATE = 83.0
+# USD-based rates for convert_currency; INR always follows `rate`
+DEFAULT_RATES = {'USD': 1.0, 'EUR': 0.92, 'GBP': 0.79, 'JPY': 150.0, 'AED': 3.6725}
+TOKEN_LIFETIME = 3600
+# Same default as COMPRESSION_MIN_BYTES in currency-mcp-server/src/compression.ts
+COMPRESSION_MIN_BYTES = 1024
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64url_decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class LocalSigner:
+    """Mints and verifies HS256 JWTs shaped like Cognito access tokens.
+
+    Cognito signs with RS256; a shared-secret key keeps this stdlib-only.
+    The key is published as an "oct" JWK so JWKS consumers still work.
+    """
+
+    def __init__(self, user_pool_id, client_id):
+        self.user_pool_id = user_pool_id
+        self.client_id = client_id
+        self.issuer = f"https://cognito-idp.local/{user_pool_id}"
+        self.kid = secrets.token_hex(8)
+        self._key = secrets.token_bytes(32)
+
+    def jwks(self):
+        return {"keys": [{"kty": "oct", "kid": self.kid, "alg": "HS256", "use": "sig", "k": _b64url(self._key)}]}
+
+    def _sign(self, signing_input):
+        return _b64url(hmac.new(self._key, signing_input.encode(), hashlib.sha256).digest())
+
+    def mint(self, username, lifetime=TOKEN_LIFETIME):
+        now = int(time.time())
+        header = {"alg": "HS256", "kid": self.kid, "typ": "JWT"}
+        claims = {
+            "sub": hashlib.sha256(username.encode()).hexdigest()[:32],
+            "username": username,
+            "iss": self.issuer,
+            "client_id": self.client_id,
+            "token_use": "access",
+            "iat": now,
+            "exp": now + lifetime,
+        }
+        signing_input = f"{_b64url(json.dumps(header).encode())}.{_b64url(json.dumps(claims).encode())}"
+        return f"{signing_input}.{self._sign(signing_input)}"
+
+    def verify(self, token):
+        """Return the token's claims, or None if it is forged, foreign or expired"""
+        try:
+            header_b64, claims_b64, signature = token.split('.')
+            header = json.loads(_b64url_decode(header_b64))
+            claims = json.loads(_b64url_decode(claims_b64))
+        except ValueError:
+            return None
+        if header.get("kid") != self.kid or header.get("alg") != "HS256":
+            return None
+        if not hmac.compare_digest(signature, self._sign(f"{header_b64}.{claims_b64}")):
+            return None
+        if claims.get("iss") != self.issuer or claims.get("exp", 0) <= time.time():
+            return None
+        return claims
+
+
+class FakeCognito:
+    """The slice of boto3's cognito-idp client that cognito_auth uses.
+
+    Install with cognito_auth.use_cognito_client(server.cognito).
+    """
+
+    def __init__(self, signer, client_secret, users):
+        self.signer = signer
+        self.client_secret = client_secret
+        self.users = dict(users)
+        self._refresh_tokens = {}
+        self.calls = 0
+
+    def admin_initiate_auth(self, UserPoolId, ClientId, AuthFlow, AuthParameters):
+        self.calls += 1
+        if UserPoolId != self.signer.user_pool_id or ClientId != self.signer.client_id:
+            raise CognitoError("ResourceNotFoundException: unknown user pool or client")
+
+        if AuthFlow == 'ADMIN_NO_SRP_AUTH':
+            username = AuthParameters.get('USERNAME', '')
+            if self.users.get(username) != AuthParameters.get('PASSWORD'):
+                raise CognitoError("NotAuthorizedException: Incorrect username or password.")
+            self._check_secret_hash(username, AuthParameters)
+            refresh_token = secrets.token_urlsafe(32)
+            self._refresh_tokens[refresh_token] = username
+            return {'AuthenticationResult': {
+                'AccessToken': self.signer.mint(username),
+                'RefreshToken': refresh_token,
+                'ExpiresIn': TOKEN_LIFETIME,
+                'TokenType': 'Bearer',
+            }}
+
+        if AuthFlow == 'REFRESH_TOKEN_AUTH':
+            username = self._refresh_tokens.get(AuthParameters.get('REFRESH_TOKEN'))
+            if username is None:
+                raise CognitoError("NotAuthorizedException: Invalid Refresh Token")
+            self._check_secret_hash(username, AuthParameters)
+            return {'AuthenticationResult': {
+                'AccessToken': self.signer.mint(username),
+                'ExpiresIn': TOKEN_LIFETIME,
+                'TokenType': 'Bearer',
+            }}
+
+        raise CognitoError(f"InvalidParameterException: unsupported AuthFlow {AuthFlow}")
+
+    def _check_secret_hash(self, username, params):
+        expected = calculate_secret_hash(username, self.signer.client_id, self.client_secret)
+        if not hmac.compare_digest(params.get('SECRET_HASH', ''), expected):
+            raise CognitoError("NotAuthorizedException: Unable to verify secret hash for client")
+
+
+class FakeCurrencyServer:
+    """In-process currency MCP server with injectable latency, jitter and errors.
+
+    Every request to /mcp sleeps for `latency` plus up to `jitter` seconds
+    and fails with HTTP 503 with probability `error_rate`. Like index.ts,
+    responses are gzipped when the client accepts gzip and the body is at
+    least `compression_min_bytes`. Use as a context manager; `url` is the
+    MCP endpoint once started.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, base_path='/currency-nodejs',
+                 latency=0.0, jitter=0.0, error_rate=0.0, rate=DEFAULT_RATE,
+                 user_pool_id='local_pool', client_id='local-client', client_secret='local-secret',
+                 users=None, seed=None, compression_min_bytes=COMPRESSION_MIN_BYTES):
+        self.host = host
+        self.port = port
+        self.base_path = base_path.rstrip('/')
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate = rate
+        self.compression_min_bytes = compression_min_bytes
+        self.rates = {**DEFAULT_RATES, 'INR': rate}
+        self.signer = LocalSigner(user_pool_id, client_id)
+        self.cognito = FakeCognito(self.signer, client_secret, users or {'mcptest': 'TestPass123!'})
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}{self.base_path}/mcp"
+
+    @property
+    def jwks_url(self):
+        return f"http://{self.host}:{self.port}/{self.signer.user_pool_id}/.well-known/jwks.json"
+
+    def mint_token(self, username='mcptest'):
+        return self.signer.mint(username)
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _delay_and_fail(self):
+        """Apply injected latency; returns True if this request should fail"""
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    # JSON-RPC handling mirrors handleMethod()/handleMessage() in index.ts
+
+    def tools(self):
+        return [
+            {
+                'name': 'convert_usd_to_inr',
+                'description': 'Convert USD amount to INR using current exchange rate',
+                'inputSchema': {
+                    'type': 'object',
+                    'properties': {'amount': {'type': 'number', 'description': 'USD amount to convert'}},
+                    'required': ['amount'],
+                },
+            },
+            {
+                'name': 'get_current_rate',
+                'description': 'Get current USD to INR exchange rate',
+                'inputSchema': {'type': 'object', 'properties': {}},
+            },
+            {
+                'name': 'convert_currency',
+                'description': 'Convert amounts between any two supported currencies (ISO 4217 codes)',
+                'inputSchema': {
+                    'type': 'object',
+                    'properties': {'conversions': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'from': {'type': 'string'}, 'to': {'type': 'string'}, 'amount': {'type': 'number'},
+                            },
+                            'required': ['from', 'to', 'amount'],
+                        },
+                    }},
+                    'required': ['conversions'],
+                },
+            },
+            {
+                'name': 'convert_batch',
+                'description': 'Convert many USD amounts to INR at one exchange rate',
+                'inputSchema': {
+                    'type': 'object',
+                    'properties': {'amounts': {
+                        'type': 'array', 'items': {'type': 'number'}, 'description': 'USD amounts to convert',
+                    }},
+                    'required': ['amounts'],
+                },
+            },
+        ]
+
+    def handle_method(self, method, params):
+        if method == 'initialize':
+            return {
+                'protocolVersion': '2024-11-05',
+                'capabilities': {'tools': {}},
+                'serverInfo': {'name': 'currency-converter', 'version': '1.0.0'},
+            }
+        if method == 'tools/list':
+            return {'tools': self.tools()}
+        if method == 'tools/call':
+            name = (params or {}).get('name')
+            args = (params or {}).get('arguments') or {}
+            if name == 'convert_usd_to_inr':
+                amount = args.get('amount') or 100
+                return {'content': [{
+                    'type': 'text',
+                    'text': f"${amount} USD = ₹{amount * self.rate:.2f} INR (Rate: {self.rate})",
+                }]}
+            if name == 'get_current_rate':
+                return {'content': [{'type': 'text', 'text': f"Current USD to INR rate: {self.rate}"}]}
+            if name == 'convert_batch':
+                amounts = args.get('amounts')
+                if not isinstance(amounts, list) or not all(
+                        isinstance(amount, (int, float)) and not isinstance(amount, bool) for amount in amounts):
+                    return {'content': [{'type': 'text', 'text': 'amounts must be an array of numbers'}], 'isError': True}
+                converted = [f"{amount * self.rate:.2f}" for amount in amounts]
+                return {'content': [{'type': 'text', 'text': json.dumps({'rate': self.rate, 'converted': converted})}]}
+            if name == 'convert_currency':
+                conversions = args.get('conversions')
+                if not isinstance(conversions, list):
+                    return {'content': [{'type': 'text', 'text': 'conversions must be an array of {from, to, amount}'}],
+                            'isError': True}
+                results = [self._convert(conversion) for conversion in conversions]
+                text = json.dumps({'asOf': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'results': results})
+                return {'content': [{'type': 'text', 'text': text}]}
+            raise ValueError(f"Unknown tool: {name}")
+        raise ValueError(f"Unknown method: {method}")
+
+    def _convert(self, conversion):
+        conversion = conversion if isinstance(conversion, dict) else {}
+        source = str(conversion.get('from', '')).upper()
+        target = str(conversion.get('to', '')).upper()
+        amount = conversion.get('amount')
+        if not isinstance(amount, (int, float)) or isinstance(amount, bool):
+            return {'from': source, 'to': target, 'error': 'amount must be a number'}
+        if source not in self.rates or target not in self.rates:
+            return {'from': source, 'to': target, 'amount': amount, 'error': f"Unsupported currency pair {source}/{target}"}
+        rate = self.rates[target] / self.rates[source]
+        return {'from': source, 'to': target, 'amount': amount, 'rate': rate, 'converted': f"{amount * rate:.2f}"}
+
+    def handle_message(self, message):
+        message_id = message.get('id') if isinstance(message, dict) else None
+        try:
+            if not isinstance(message, dict):
+                raise ValueError("Unknown method: undefined")
+            result = self.handle_method(message.get('method'), message.get('params'))
+            return {'jsonrpc': '2.0', 'id': message_id, 'result': result}
+        except ValueError as e:
+            return {'jsonrpc': '2.0', 'id': message_id, 'error': {'code': -32601, 'message': str(e)}}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Like Node, send small SSE writes at once instead of waiting on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == f"{server.base_path}/":
+                    self._send_json(200, {'status': 'healthy', 'service': 'currency-mcp-server'})
+                elif path == f"/{server.signer.user_pool_id}/.well-known/jwks.json":
+                    self._send_json(200, server.signer.jwks())
+                else:
+                    self._send_json(404, {'error': 'Not found'})
+
+            def _send_timing(self, auth_ms, app_ms):
+                # Same Server-Timing and traceresponse headers as index.ts
+                self.send_header('Server-Timing', f"auth;dur={auth_ms:.1f}, app;dur={app_ms:.1f}")
+                match = TRACEPARENT.match(self.headers.get('traceparent', ''))
+                trace_id = match.group(1) if match else secrets.token_hex(16)
+                self.send_header('traceresponse', f"00-{trace_id}-{secrets.token_hex(8)}-01")
+
+            def do_POST(self):
+                received = time.perf_counter()
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length)
+                if urlparse(self.path).path != f"{server.base_path}/mcp":
+                    self._send_json(404, {'error': 'Not found'})
+                    return
+
+                # Same responses as authenticateToken in oauth-cognito.ts
+                auth = self.headers.get('Authorization', '')
+                token = auth.split(' ')[1] if ' ' in auth else None
+                if not token:
+                    self._send_json(401, {'error': 'Access token required'})
+                    return
+                if server.signer.verify(token) is None:
+                    self._send_json(403, {'error': 'Invalid or expired token'})
+                    return
+                handler_start = time.perf_counter()
+                auth_ms = (handler_start - received) * 1000
+
+                if server._delay_and_fail():
+                    self._send_json(503, {'error': 'Injected failure'})
+                    return
+
+                try:
+                    body = json.loads(raw or b'null')
+                except ValueError:
+                    self._send_json(400, {'error': 'Invalid JSON'})
+                    return
+
+                if (not isinstance(body, list) and isinstance(body, dict) and 'id' not in body
+                        and str(body.get('method', '')).startswith('notifications/')):
+                    self.send_response(202)
+                    self._send_timing(auth_ms, 0)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                if isinstance(body, list):
+                    if not body:
+                        responses = [{'jsonrpc': '2.0', 'id': None,
+                                      'error': {'code': -32600, 'message': 'Invalid Request: empty batch'}}]
+                    else:
+                        responses = [
+                            server.handle_message(message) for message in body
+                            if isinstance(message, dict) and message.get('id') is not None
+                        ]
+                else:
+                    responses = [server.handle_message(body)]
+
+                events = [f"data: {json.dumps(response)}\n\n".encode() for response in responses]
+                accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+                # Decided on the first event, like EventStreamWriter in compression.ts
+                compressor = None
+                if accepts_gzip and events and len(events[0]) * len(events) >= server.compression_min_bytes:
+                    compressor = zlib.compressobj(wbits=31)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'keep-alive')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.send_header('Vary', 'Accept-Encoding')
+                if compressor is not None:
+                    self.send_header('Content-Encoding', 'gzip')
+                self._send_timing(auth_ms, (time.perf_counter() - handler_start) * 1000)
+                self.end_headers()
+
+                try:
+                    for event in events:
+                        if compressor is not None:
+                            # Flush per event so the client can decode it straight away
+                            event = compressor.compress(event) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                        self._write_chunk(event)
+                    if compressor is not None:
+                        self._write_chunk(compressor.flush())
+                    self._write_chunk(b'')
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. a per-call timeout); nothing left to tell it
+                    self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline currency MCP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeCurrencyServer(
+        host=args.host, port=args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate
+    ).start()
+    print(f"💱 Fake currency MCP server on {server.url}")
+    print(f"🔑 JWKS: {server.jwks_url}")
+    print(f"export CURRENCY_SERVER_URL={server.url}")
+    print(f"export MCP_ACCESS_TOKEN={server.mint_token()}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
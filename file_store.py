@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Small on-disk JSON stores shared by every client process on a host
+Used for the Cognito token cache and MCP session cache
+simple-auth-client-python/mcp_simple_auth_client/json_store.py carries the
+same store for that separately installed package; change both together
+"""
+import contextlib
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the store still works per process
+    fcntl = None
+
+CACHE_DIR = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'mcp-clients'
+)
+
+
+class LockedJsonStore:
+    """Keyed JSON file guarded by an advisory lock.
+
+    Reads take a shared lock and writes an exclusive one on a sidecar
+    .lock file; the store itself is replaced atomically so readers never
+    see a partial write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = self.path + '.lock'
+
+    @contextlib.contextmanager
+    def locked(self, exclusive=False, blocking=True):
+        """Hold the store lock; yields False if a non-blocking lock was busy"""
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is None:
+                yield True
+                return
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_all(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        """Read one entry; call while holding the lock"""
+        return self._read_all().get(key)
+
+    def put(self, key, entry):
+        """Write one entry atomically; call while holding the exclusive lock"""
+        entries = self._read_all()
+        entries[key] = entry
+        self._write_all(entries)
+
+    def delete(self, key):
+        """Drop one entry; call while holding the exclusive lock"""
+        entries = self._read_all()
+        if entries.pop(key, None) is not None:
+            self._write_all(entries)
+
+    def _write_all(self, entries):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.store-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Asyncio MCP client for StreamableHTTP servers
+Pipelines many calls over one logical session and one connection pool
+"""
+import asyncio
+import time
+
+from mcp_http import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    PROTOCOL_VERSION,
+    MCPClientBase,
+    SessionExpired,
+    body_messages,
+    is_reply,
+)
+from mcp_retry import RETRY_STATUSES, CircuitOpenError
+from mcp_sse import SSEDecoder, event_messages, is_event_stream
+
+DEFAULT_MAX_CONCURRENCY = 20
+
+
+def _httpx():
+    # Deferred so sync-only importers of this module don't pay for httpx
+    import httpx
+    return httpx
+
+
+def is_retryable(error):
+    """Transport failures and overload statuses are worth another try; bad requests are not"""
+    httpx = _httpx()
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+def http2_available():
+    """httpx only negotiates HTTP/2 when the optional h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AsyncMCPHttpClient(MCPClientBase):
+    """Async JSON-RPC client for a StreamableHTTP MCP endpoint.
+
+    All calls share one httpx.AsyncClient connection pool. A semaphore
+    bounds how many requests are in flight at once, and every call can
+    carry its own overall timeout.
+
+    Each in-flight request has a future in a pending table keyed by its
+    JSON-RPC id. Replies resolve their future whichever stream carries
+    them: the call's own POST stream, another call's, or the
+    server-initiated stream opened by start_listening().
+    """
+
+    def __init__(self, server_url, access_token=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 http2=None,
+                 tracer=None,
+                 retry_policy=None):
+        super().__init__(server_url, access_token, tracer, retry_policy)
+        if http2 is None:
+            http2 = http2_available()
+        httpx = _httpx()
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        self._connect_timeout = connect_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = {}
+        self._listener = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def aclose(self):
+        """Stop listening and release pooled connections held by this client"""
+        if self._listener is not None:
+            self._listener.cancel()
+        await self._client.aclose()
+
+    async def aiter_messages(self, response, span=None):
+        """Yield JSON-RPC messages from a streamed response as they arrive.
+
+        With a span, time spent waiting on the network is its body phase.
+        """
+        if is_event_stream(response):
+            decoder = SSEDecoder()
+            chunks = response.aiter_bytes()
+            if span is not None:
+                chunks = span.atimed(chunks, 'body')
+            async for chunk in chunks:
+                for event in decoder.feed(chunk):
+                    for message in event_messages(event):
+                        yield message
+            for event in decoder.close():
+                for message in event_messages(event):
+                    yield message
+        else:
+            if span is not None:
+                with span.phase('body'):
+                    await response.aread()
+            else:
+                await response.aread()
+            for message in body_messages(response.text):
+                yield message
+
+    def _dispatch(self, message):
+        """Resolve the pending call a message answers, or route it as a notification"""
+        if isinstance(message, dict) and 'method' not in message:
+            future = self._pending.get(message.get('id'))
+            if future is not None:
+                if not future.done():
+                    future.set_result(message)
+                return
+        self.handle_notification(message)
+
+    async def _exchange(self, body, ids):
+        """POST a request or batch, dispatching every message streamed back.
+
+        Returns an id-less error if the server rejected the whole request.
+        """
+        span = self._start_span(body)
+        if span is None:
+            return await self._exchange_traced(body, ids, None)
+        try:
+            fallback = await self._exchange_traced(body, ids, span)
+        except BaseException as e:
+            # Includes cancellation by a per-call timeout
+            span.finish(e)
+            raise
+        span.finish()
+        return fallback
+
+    async def _exchange_traced(self, body, ids, span):
+        fallback = None
+        headers = self.request_headers()
+        extensions = None
+        if span is not None:
+            headers = {**headers, 'traceparent': span.traceparent()}
+            extensions = {"trace": span.httpcore_trace}
+        started = time.time_ns()
+        async with self._client.stream(
+            "POST", self.server_url, json=body, headers=headers, extensions=extensions
+        ) as response:
+            if span is not None:
+                span.add_phase('ttfb', started)
+                self._span_response(span, response)
+            if response.status_code == 404 and self.session_id is not None:
+                raise SessionExpired(f"Session {self.session_id} expired")
+            response.raise_for_status()
+            self._update_session(response)
+            streamed = time.time_ns()
+            async for message in self.aiter_messages(response, span):
+                if is_reply(message, ids) and message.get('id') is None:
+                    fallback = fallback or message
+                else:
+                    self._dispatch(message)
+            if span is not None:
+                # Whatever wasn't spent waiting on the network went to decoding
+                body_ns = span.phases.get('body', (0, 0))[1]
+                span.add_phase('parse', streamed, streamed + max(time.time_ns() - streamed - body_ns, 0))
+        return fallback
+
+    async def _request(self, body, payloads):
+        """Send one request or a batch and wait for a reply to every payload"""
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for payload in payloads:
+            futures[payload["id"]] = self._pending[payload["id"]] = loop.create_future()
+
+        try:
+            try:
+                fallback = await self._exchange(body, set(futures))
+            except SessionExpired:
+                if self._init_params is None or 'result' not in await self._handshake():
+                    raise
+                fallback = await self._exchange(body, set(futures))
+
+            results = []
+            for request_id, future in futures.items():
+                if not future.done() and fallback is None and self._listener is not None:
+                    # The reply may still arrive on the server-initiated stream
+                    await asyncio.wait([future, self._listener], return_when=asyncio.FIRST_COMPLETED)
+                if future.done():
+                    results.append(future.result())
+                else:
+                    results.append(fallback or {"error": f"No response for request id {request_id}"})
+            return results
+        finally:
+            for request_id in futures:
+                self._pending.pop(request_id, None)
+
+    async def initialize(self, client_info, capabilities=None, protocol_version=PROTOCOL_VERSION, store=None):
+        """Run the initialize handshake, or resume a stored session"""
+        self._prepare_initialize(client_info, capabilities, protocol_version, store)
+        return self._resume_session() or await self._handshake(retry=True)
+
+    async def _handshake(self, retry=False):
+        # Bypasses the semaphore: it may run from inside an admitted call.
+        # Re-negotiation inside a call skips the policy; the call is already under it.
+        self.session_id = None
+
+        async def attempt():
+            payload = self.build_request("initialize", self._init_params)
+            return (await self._request(payload, [payload]))[0]
+
+        try:
+            result = await (self._with_policy("initialize", None, attempt) if retry else attempt())
+        except (_httpx().HTTPError, ValueError, CircuitOpenError) as e:
+            result = {"error": str(e)}
+
+        if 'result' in result:
+            await self.send_notification("notifications/initialized")
+        self._remember_server(result)
+        self._save_session(result)
+        return result
+
+    async def send_notification(self, method, params=None):
+        """Send a JSON-RPC notification; returns False if it wasn't accepted"""
+        try:
+            response = await self._client.post(
+                self.server_url,
+                json=self.build_notification(method, params),
+                headers=self.request_headers()
+            )
+            return response.is_success
+        except _httpx().HTTPError:
+            return False
+
+    async def start_listening(self):
+        """Open the server-initiated SSE stream (GET) if the server offers one.
+
+        Replies and notifications on it are dispatched like those on POST
+        streams. Returns False when the server doesn't support it.
+        """
+        if self._listener is not None:
+            return True
+        ready = asyncio.get_running_loop().create_future()
+        self._listener = asyncio.ensure_future(self._listen(ready))
+        return await ready
+
+    async def _listen(self, ready):
+        httpx = _httpx()
+        headers = {**self.request_headers(), 'Accept': 'text/event-stream'}
+        try:
+            # No read timeout: the stream idles between server messages
+            async with self._client.stream(
+                "GET", self.server_url, headers=headers,
+                timeout=httpx.Timeout(None, connect=self._connect_timeout)
+            ) as response:
+                if not response.is_success or not is_event_stream(response):
+                    ready.set_result(False)
+                    return
+                ready.set_result(True)
+                async for message in self.aiter_messages(response):
+                    self._dispatch(message)
+        except httpx.HTTPError:
+            if not ready.done():
+                ready.set_result(False)
+        finally:
+            self._listener = None
+
+    async def _with_policy(self, method, params, attempt, idempotent=None):
+        """Await attempt() under the retry policy, if there is one"""
+        if self.retry_policy is None:
+            return await attempt()
+        if idempotent is None:
+            idempotent = self.retry_policy.is_idempotent(method, params)
+        key = self.retry_policy.latency_key(method, params)
+        return await self.retry_policy.acall(key, attempt, is_retryable, idempotent)
+
+    async def call_mcp(self, method, params=None, timeout=None):
+        """Send one JSON-RPC request; timeout bounds the call (retries included) once it is admitted"""
+        # Each attempt gets its own id: hedged copies are pending at the same time
+        async def attempt():
+            payload = self.build_request(method, params)
+            return (await self._request(payload, [payload]))[0]
+
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(self._with_policy(method, params, attempt), timeout)
+            except asyncio.TimeoutError:
+                return {"error": f"{method} timed out after {timeout}s"}
+            except (_httpx().HTTPError, ValueError, SessionExpired, CircuitOpenError) as e:
+                return {"error": str(e)}
+
+    async def call_mcp_batch(self, calls, timeout=None):
+        """Send (method, params) pairs as one JSON-RPC batch, results in call order"""
+        calls = list(calls)
+        if not calls:
+            return []
+
+        async def attempt():
+            payloads = [self.build_request(method, params) for method, params in calls]
+            return await self._request(payloads, payloads)
+
+        # A batch is only retried when every call in it is idempotent
+        idempotent = self.retry_policy is not None and all(
+            self.retry_policy.is_idempotent(method, params) for method, params in calls
+        )
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(self._with_policy("batch", None, attempt, idempotent), timeout)
+            except asyncio.TimeoutError:
+                return [{"error": f"Batch timed out after {timeout}s"} for _ in calls]
+            except (_httpx().HTTPError, ValueError, SessionExpired, CircuitOpenError) as e:
+                return [{"error": str(e)} for _ in calls]
+
+    async def list_tools(self, cache=None, timeout=None):
+        """tools/list, answered from a ToolSchemaCache when this server version was listed before"""
+        cached = self._cached_tools(cache)
+        if cached is not None:
+            return cached
+        result = await self.call_mcp("tools/list", timeout=timeout)
+        self._tools_listed(result, cache)
+        return result
+
+    async def call_tool(self, name, arguments=None, timeout=None):
+        """tools/call; arguments that fail a known inputSchema are rejected without a round trip"""
+        params, error = self._tool_call_params(name, arguments)
+        if error:
+            return error
+        return await self.call_mcp("tools/call", params, timeout=timeout)
+
+    async def call_tools(self, calls, timeout=None):
+        """Run (name, arguments) tool calls concurrently.
+
+        Yields (index, result) pairs in completion order, where index is
+        the position of the call in `calls`.
+        """
+        async def indexed(index, name, arguments):
+            return index, await self.call_tool(name, arguments, timeout=timeout)
+
+        tasks = [
+            asyncio.ensure_future(indexed(index, name, arguments))
+            for index, (name, arguments) in enumerate(calls)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Caller stopped early; don't leave requests running on the pool
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP plumbing for the direct-auth MCP clients
+Pooled keep-alive sessions for JSON-RPC over StreamableHTTP
+"""
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import time
+import warnings
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from file_store import CACHE_DIR, LockedJsonStore
+from mcp_retry import RETRY_STATUSES, CircuitOpenError
+from mcp_sse import is_event_stream, iter_jsonrpc_messages, iter_sse_events
+from mcp_trace import activate, current_span
+from tool_schemas import validate_arguments
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+
+# Body prefixes that mark a response as Server-Sent Events
+SSE_PREFIXES = ('data:', 'event:')
+
+PROTOCOL_VERSION = '2024-11-05'
+SESSION_HEADER = 'Mcp-Session-Id'
+
+COMPRESSION_ENV = 'MCP_COMPRESSION'
+
+DEFAULT_SESSION_PATH = os.path.join(CACHE_DIR, 'mcp-sessions.json')
+# Stored sessions older than this are re-negotiated rather than resumed
+SESSION_TTL = 3600
+
+
+class _TimedConnect:
+    """Reports DNS + TCP + TLS setup of a new pooled connection to the active trace span"""
+
+    def connect(self):
+        span = current_span()
+        if span is None:
+            return super().connect()
+        started = time.time_ns()
+        try:
+            return super().connect()
+        finally:
+            span.add_phase('connect', started)
+
+
+class _TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, pool_block=False):
+    """Create a requests Session with a keep-alive connection pool.
+
+    requests/urllib3 only speak HTTP/1.1, so reuse comes from keeping
+    TCP/TLS connections open across calls rather than from multiplexing.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        pool_block=pool_block,
+        max_retries=0
+    )
+    adapter.poolmanager.pool_classes_by_scheme = {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool,
+    }
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def parse_sse_messages(text):
+    """Parse every JSON-RPC message out of a complete Server-Sent Events body"""
+    # The trailing blank line dispatches a final event the server left unterminated
+    return list(iter_jsonrpc_messages(iter_sse_events([text, '\n\n'])))
+
+
+def parse_sse_response(text):
+    """Parse Server-Sent Events response"""
+    messages = parse_sse_messages(text)
+    if messages:
+        return messages[0]
+    return {"error": "No data found in SSE response"}
+
+
+def body_messages(text):
+    """Parse the JSON-RPC messages out of a fully read, non-streamed body.
+
+    Sniffs for SSE framing so servers that mislabel their event stream
+    still parse.
+    """
+    if text.lstrip().startswith(SSE_PREFIXES):
+        return parse_sse_messages(text)
+    parsed = json.loads(text)
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+def is_reply(message, ids):
+    """True if message answers one of `ids`.
+
+    An error without an id (e.g. a parse error) answers the whole request.
+    """
+    if not isinstance(message, dict) or 'method' in message:
+        return False
+    if message.get('id') is not None:
+        return message['id'] in ids
+    return 'error' in message
+
+
+def match_batch_responses(payloads, messages):
+    """Order responses to line up with the request payloads by id"""
+    by_id = {}
+    fallback = None
+    for message in messages:
+        if message.get("id") is not None:
+            by_id[message["id"]] = message
+        elif fallback is None:
+            fallback = message
+    if fallback is None:
+        return [
+            by_id.get(payload["id"], {"error": f"No response for request id {payload['id']}"})
+            for payload in payloads
+        ]
+    return [by_id.get(payload["id"], fallback) for payload in payloads]
+
+
+def is_retryable(error):
+    """Transport failures and overload statuses are worth another try; bad requests are not"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    ))
+
+
+class SessionExpired(Exception):
+    """The server no longer recognises our Mcp-Session-Id"""
+
+
+class SessionStore(LockedJsonStore):
+    """Negotiated MCP sessions, so later runs can skip initialize.
+
+    Only sessions the server identified with Mcp-Session-Id are kept,
+    keyed by server URL and credentials.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(path or os.getenv('MCP_SESSION_CACHE', DEFAULT_SESSION_PATH))
+
+    @staticmethod
+    def key(server_url, authorization):
+        raw = f"{server_url}|{authorization}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """Return a fresh stored session; call while holding the lock"""
+        entry = self.get(key)
+        if entry and time.time() - entry['saved_at'] < SESSION_TTL:
+            return entry
+        return None
+
+    def save(self, key, session_id, result):
+        """Store a session; call while holding the exclusive lock"""
+        self.put(key, {'session_id': session_id, 'result': result, 'saved_at': time.time()})
+
+
+def accept_encoding():
+    """Accept-Encoding for MCP requests: what both requests and httpx decode as the stream arrives.
+
+    Brotli needs the optional brotli (or brotlicffi) package; gzip is
+    always available. MCP_COMPRESSION=off asks for uncompressed bodies.
+    """
+    if os.getenv(COMPRESSION_ENV, 'on') == 'off':
+        return 'identity'
+    if any(importlib.util.find_spec(name) for name in ('brotli', 'brotlicffi')):
+        return 'br, gzip'
+    return 'gzip'
+
+
+class MCPClientBase:
+    """Transport-independent state shared by the sync and async clients.
+
+    Tracks the negotiated Mcp-Session-Id, allocates monotonic request
+    ids and routes server notifications to registered callbacks. With a
+    mcp_trace.Tracer, every HTTP exchange is recorded as a span; with a
+    mcp_retry.RetryPolicy, idempotent calls are retried (and, on the
+    async client, optionally hedged) and an unhealthy endpoint fails fast.
+    """
+
+    def __init__(self, server_url, access_token=None, tracer=None, retry_policy=None):
+        self.server_url = server_url
+        self.tracer = tracer
+        self.retry_policy = retry_policy
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json, text/event-stream',
+            'Accept-Encoding': accept_encoding()
+        }
+        if access_token:
+            self.headers['Authorization'] = f'Bearer {access_token}'
+        self.session_id = None
+        self.server_info = None
+        self.tool_schemas = {}
+        self._init_params = None
+        self._store = None
+        self._ids = itertools.count(1)
+        self._notification_handlers = {}
+
+    def build_request(self, method, params=None):
+        """Build a JSON-RPC request with a fresh id"""
+        return {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params or {}
+        }
+
+    def build_notification(self, method, params=None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params:
+            message["params"] = params
+        return message
+
+    def _start_span(self, body):
+        """Open a trace span for one POST, or None when tracing is off"""
+        if self.tracer is None:
+            return None
+        if isinstance(body, list):
+            return self.tracer.start("mcp batch", **{"mcp.method": "batch", "mcp.batch_size": len(body)})
+        return self.tracer.start(f"mcp {body.get('method')}", **{"mcp.method": body.get('method')})
+
+    def _span_response(self, span, response):
+        """Note headers-received time, status and the server's own timings on span"""
+        span.attributes["http.status_code"] = response.status_code
+        if response.headers.get('Content-Encoding'):
+            span.attributes["http.content_encoding"] = response.headers['Content-Encoding']
+        span.record_server_timing(response.headers.get('Server-Timing'))
+        if response.headers.get('traceresponse'):
+            span.attributes["server.traceresponse"] = response.headers['traceresponse']
+
+    def request_headers(self):
+        """Headers for the next request, carrying the session id once negotiated"""
+        if self.session_id is None:
+            return self.headers
+        return {**self.headers, SESSION_HEADER: self.session_id}
+
+    def _update_session(self, response):
+        self.session_id = response.headers.get(SESSION_HEADER, self.session_id)
+
+    def on_notification(self, method, callback):
+        """Call callback(message) for server notifications of `method` ("*" for all)"""
+        self._notification_handlers.setdefault(method, []).append(callback)
+
+    def handle_notification(self, message):
+        """Route a server message that doesn't answer a request.
+
+        Progress and logging notifications arrive here while a call is
+        streaming.
+        """
+        method = message.get('method') if isinstance(message, dict) else None
+        for callback in self._notification_handlers.get(method, []) + self._notification_handlers.get('*', []):
+            callback(message)
+
+    def _prepare_initialize(self, client_info, capabilities, protocol_version, store):
+        self._init_params = {
+            "protocolVersion": protocol_version,
+            "capabilities": capabilities or {},
+            "clientInfo": client_info
+        }
+        self._store = store
+
+    def _remember_server(self, result):
+        """Note serverInfo from an initialize response (fresh or resumed)"""
+        self.server_info = result.get('result', {}).get('serverInfo')
+
+    def _cached_tools(self, cache):
+        """Tools from `cache` for this server version, or None to ask the server"""
+        tools = cache.load(self.server_url, self.server_info) if cache else None
+        if tools is not None:
+            self._remember_tools(tools)
+            return {"jsonrpc": "2.0", "id": None, "result": {"tools": tools}}
+        return None
+
+    def _tools_listed(self, result, cache):
+        tools = result.get('result', {}).get('tools')
+        if tools is None:
+            return
+        self._remember_tools(tools)
+        if cache:
+            cache.save_listing(self.server_url, self.server_info, result['result'])
+
+    def _remember_tools(self, tools):
+        self.tool_schemas = {tool['name']: tool.get('inputSchema') for tool in tools}
+
+    def check_arguments(self, name, arguments):
+        """Problems with `arguments` per the tool's inputSchema; [] if unknown"""
+        return validate_arguments(self.tool_schemas.get(name), arguments)
+
+    def _tool_call_params(self, name, arguments):
+        """tools/call params, or an error result if the arguments fail validation"""
+        arguments = arguments or {}
+        problems = self.check_arguments(name, arguments)
+        if problems:
+            return None, {"error": f"Invalid arguments for {name}: {'; '.join(problems)}"}
+        return {"name": name, "arguments": arguments}, None
+
+    def _store_key(self):
+        return SessionStore.key(self.server_url, self.headers.get('Authorization', ''))
+
+    def _resume_session(self):
+        """Adopt a stored session; returns its initialize response or None"""
+        if self._store is None:
+            return None
+        with self._store.locked():
+            entry = self._store.load(self._store_key())
+        if entry is None:
+            return None
+        self.session_id = entry['session_id']
+        result = {"jsonrpc": "2.0", "id": None, "result": entry['result']}
+        self._remember_server(result)
+        return result
+
+    def _save_session(self, result):
+        if self._store is None:
+            return
+        with self._store.locked(exclusive=True):
+            if self.session_id is not None and 'result' in result:
+                self._store.save(self._store_key(), self.session_id, result['result'])
+            else:
+                self._store.delete(self._store_key())
+
+
+class MCPHttpClient(MCPClientBase):
+    """JSON-RPC client for a StreamableHTTP MCP endpoint.
+
+    One instance owns one pooled session, so it can be reused for any
+    number of calls. Use it as a context manager (or call close()) to
+    release the pooled connections.
+    """
+
+    def __init__(self, server_url, access_token,
+                 pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 session=None,
+                 tracer=None,
+                 retry_policy=None):
+        super().__init__(server_url, access_token, tracer, retry_policy)
+        self.timeout = (connect_timeout, read_timeout)
+        # Only close sessions we created; a shared session belongs to the caller
+        self._owns_session = session is None
+        self.session = session if session is not None else create_session(pool_size)
+        if retry_policy is not None and retry_policy.hedge:
+            # A warning rather than an error: MCP_RETRY=hedge is shared by sync and async scripts
+            warnings.warn("Hedging needs the async client (mcp_async); this client only retries",
+                          RuntimeWarning, stacklevel=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Release pooled connections held by this client"""
+        if self._owns_session and self.session is not None:
+            self.session.close()
+        self.session = None
+
+    def parse_sse_response(self, text):
+        """Parse Server-Sent Events response"""
+        return parse_sse_response(text)
+
+    def iter_messages(self, response, span=None):
+        """Yield JSON-RPC messages from a streamed response as they arrive.
+
+        With a span, time spent waiting on the network is its body phase.
+        """
+        if is_event_stream(response):
+            chunks = response.iter_content(chunk_size=None)
+            if span is not None:
+                chunks = span.timed(chunks, 'body')
+            yield from iter_jsonrpc_messages(iter_sse_events(chunks))
+        elif span is not None:
+            with span.phase('body'):
+                text = response.text
+            yield from body_messages(text)
+        else:
+            yield from body_messages(response.text)
+
+    def initialize(self, client_info, capabilities=None, protocol_version=PROTOCOL_VERSION, store=None):
+        """Run the initialize handshake, or resume a stored session.
+
+        With a SessionStore, a session the server identified with
+        Mcp-Session-Id is saved for later runs, which then skip the round
+        trip. Returns the initialize response.
+        """
+        self._prepare_initialize(client_info, capabilities, protocol_version, store)
+        return self._resume_session() or self._handshake(retry=True)
+
+    def _handshake(self, retry=False):
+        # Re-negotiation inside a call skips the policy; the call itself is already under it
+        self.session_id = None
+
+        def attempt():
+            payload = self.build_request("initialize", self._init_params)
+            return match_batch_responses([payload], self._exchange(payload, {payload["id"]}))[0]
+
+        try:
+            result = self._with_policy("initialize", None, attempt) if retry else attempt()
+        except (requests.exceptions.RequestException, ValueError, CircuitOpenError) as e:
+            return {"error": str(e)}
+
+        if 'result' in result:
+            self.send_notification("notifications/initialized")
+        self._remember_server(result)
+        self._save_session(result)
+        return result
+
+    def send_notification(self, method, params=None):
+        """Send a JSON-RPC notification; returns False if it wasn't accepted"""
+        if self.session is None:
+            return False
+        try:
+            response = self.session.post(self.server_url,
+                headers=self.request_headers(),
+                json=self.build_notification(method, params),
+                timeout=self.timeout
+            )
+            response.close()
+            return response.ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def _exchange(self, body, ids):
+        """POST a request or batch and collect the replies to `ids`.
+
+        The stream is read to the end so the connection goes back to the
+        pool; anything that isn't a reply goes to handle_notification().
+        """
+        span = self._start_span(body)
+        if span is None:
+            return self._exchange_traced(body, ids, None)
+        try:
+            with activate(span):
+                replies = self._exchange_traced(body, ids, span)
+        except Exception as e:
+            span.finish(e)
+            raise
+        span.finish()
+        return replies
+
+    def _exchange_traced(self, body, ids, span):
+        replies = []
+        headers = self.request_headers()
+        if span is not None:
+            headers = {**headers, 'traceparent': span.traceparent()}
+        started = time.time_ns()
+        with self.session.post(self.server_url,
+            headers=headers,
+            json=body,
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            if span is not None:
+                span.add_phase('ttfb', started)
+                self._span_response(span, response)
+            if response.status_code == 404 and self.session_id is not None:
+                raise SessionExpired(f"Session {self.session_id} expired")
+            response.raise_for_status()
+            self._update_session(response)
+            streamed = time.time_ns()
+            for message in self.iter_messages(response, span):
+                if is_reply(message, ids):
+                    replies.append(message)
+                else:
+                    self.handle_notification(message)
+            if span is not None:
+                # Whatever wasn't spent waiting on the network went to decoding
+                body_ns = span.phases.get('body', (0, 0))[1]
+                span.add_phase('parse', streamed, streamed + max(time.time_ns() - streamed - body_ns, 0))
+        return replies
+
+    def _send(self, body, ids):
+        """Exchange, re-negotiating once if the server dropped our session"""
+        try:
+            return self._exchange(body, ids)
+        except SessionExpired:
+            if self._init_params is None:
+                raise
+            if 'result' not in self._handshake():
+                raise
+            return self._exchange(body, ids)
+
+    def _with_policy(self, method, params, attempt, idempotent=None):
+        """Run attempt() under the retry policy, if there is one"""
+        if self.retry_policy is None:
+            return attempt()
+        if idempotent is None:
+            idempotent = self.retry_policy.is_idempotent(method, params)
+        key = self.retry_policy.latency_key(method, params)
+        return self.retry_policy.call(key, attempt, is_retryable, idempotent)
+
+    def call_mcp(self, method, params=None):
+        if self.session is None:
+            return {"error": "Client is closed"}
+
+        # Every attempt is a fresh request id, so a late reply to an
+        # abandoned attempt can't be mistaken for the current one
+        def attempt():
+            payload = self.build_request(method, params)
+            return match_batch_responses([payload], self._send(payload, {payload["id"]}))[0]
+
+        try:
+            return self._with_policy(method, params, attempt)
+        except (requests.exceptions.RequestException, ValueError, SessionExpired, CircuitOpenError) as e:
+            return {"error": str(e)}
+
+    def call_mcp_batch(self, calls):
+        """Send (method, params) pairs as one JSON-RPC batch.
+
+        Returns one result per call, in the order of `calls`.
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+        if self.session is None:
+            return [{"error": "Client is closed"} for _ in calls]
+
+        def attempt():
+            payloads = [self.build_request(method, params) for method, params in calls]
+            replies = self._send(payloads, {payload["id"] for payload in payloads})
+            return match_batch_responses(payloads, replies)
+
+        # A batch is only retried when every call in it is idempotent
+        idempotent = self.retry_policy is not None and all(
+            self.retry_policy.is_idempotent(method, params) for method, params in calls
+        )
+        try:
+            return self._with_policy("batch", None, attempt, idempotent)
+        except (requests.exceptions.RequestException, ValueError, SessionExpired, CircuitOpenError) as e:
+            return [{"error": str(e)} for _ in calls]
+
+    def list_tools(self, cache=None):
+        """tools/list, answered from a ToolSchemaCache when this server version was listed before"""
+        cached = self._cached_tools(cache)
+        if cached is not None:
+            return cached
+        result = self.call_mcp("tools/list")
+        self._tools_listed(result, cache)
+        return result
+
+    def call_tool(self, name, arguments=None):
+        """tools/call; arguments that fail a known inputSchema are rejected without a round trip"""
+        params, error = self._tool_call_params(name, arguments)
+        if error:
+            return error
+        return self.call_mcp("tools/call", params)
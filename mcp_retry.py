@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Retry, hedging and circuit breaking for the MCP clients
+Cuts tail latency on idempotent calls without piling load on a sick endpoint
+"""
+import asyncio
+import collections
+import os
+import random
+import threading
+import time
+
+# MCP_RETRY=off | on (default) | hedge
+RETRY_ENV = 'MCP_RETRY'
+
+# Calls that are safe to send twice: they read state but never change it
+IDEMPOTENT_METHODS = ('initialize', 'tools/list')
+IDEMPOTENT_TOOLS = ('get_current_rate',)
+
+# HTTP statuses that mean "try again", as opposed to a bad request
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """The endpoint failed repeatedly; calls fail fast until it cools down"""
+
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of calls.
+
+    Every call deposits `ratio` tokens and every retry or hedge spends
+    one, so during an outage retries add at most ~ratio extra load
+    instead of multiplying it. `reserve` tokens let a quiet client retry
+    before it has built up any credit.
+    """
+
+    def __init__(self, ratio=0.1, reserve=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self):
+        """Spend one token; False when the budget is exhausted"""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open after `cooldown`.
+
+    While open every call fails fast. Half-open lets a single probe
+    through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = 'half-open'
+            if self.state == 'closed':
+                return
+            if self.state == 'half-open' and not self._probing:
+                self._probing = True
+                return
+            retry_in = max(self.cooldown - (time.monotonic() - self._opened_at), 0)
+        raise CircuitOpenError(f"Circuit open after {self.threshold} failures; retry in {retry_in:.1f}s")
+
+    def abandon(self):
+        """An attempt ended without an outcome (cancelled or interrupted); free the probe slot"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, healthy):
+        """Note one attempt's outcome; any reply from the server counts as healthy"""
+        with self._lock:
+            self._probing = False
+            if healthy:
+                self._failures = 0
+                self.state = 'closed'
+                return
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful latencies per key (see RetryPolicy.latency_key), for picking a hedge delay"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def quantile(self, key, q):
+        """The q-quantile of recent latencies for key, or None until warmed up"""
+        with self._lock:
+            samples = sorted(self._samples[key])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+class RetryPolicy:
+    """When and how to retry, hedge and fail fast.
+
+    Only idempotent calls (see IDEMPOTENT_METHODS / IDEMPOTENT_TOOLS)
+    are retried or hedged; every call goes through the circuit breaker.
+    Retries wait a fully jittered exponential backoff and spend from the
+    retry budget. With hedge=True an idempotent call that hasn't
+    answered by its recent p95 latency (or hedge_after seconds before
+    that is known) gets one duplicate, and the first reply wins; only
+    acall() hedges, see call().
+
+    One policy may be shared by several clients of the same endpoint so
+    they share budget, breaker and latency history.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.05, max_delay=1.0,
+                 budget=None, breaker=None, latency=None,
+                 hedge=False, hedge_quantile=0.95, hedge_after=None,
+                 idempotent_methods=IDEMPOTENT_METHODS,
+                 idempotent_tools=IDEMPOTENT_TOOLS):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_after = hedge_after
+        self.idempotent_methods = set(idempotent_methods)
+        self.idempotent_tools = set(idempotent_tools)
+
+    def is_idempotent(self, method, params=None):
+        if method in self.idempotent_methods:
+            return True
+        return method == 'tools/call' and (params or {}).get('name') in self.idempotent_tools
+
+    @staticmethod
+    def latency_key(method, params=None):
+        """What latency is tracked under: the method, and for tools/call the tool too"""
+        # Tools differ wildly in cost, so one p95 for every tools/call would
+        # hedge slow tools too early and fast ones too late
+        if method == 'tools/call':
+            return f"tools/call:{(params or {}).get('name')}"
+        return method
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def hedge_delay(self, key):
+        """Seconds to wait before hedging `key`, or None to not hedge"""
+        if not self.hedge or self.breaker.state != 'closed':
+            return None
+        delay = self.latency.quantile(key, self.hedge_quantile)
+        return delay if delay is not None else self.hedge_after
+
+    def _may_retry(self, attempt, idempotent, error, retryable):
+        return (idempotent and attempt < self.max_attempts and retryable(error)
+                and self.budget.withdraw())
+
+    # Sync clients
+
+    def call(self, key, send, retryable, idempotent):
+        """Run send() under this policy; key labels it for latency tracking.
+
+        Blocking calls are never hedged: a losing copy can't be abandoned
+        mid-read, and would keep using the client's session (and its
+        Mcp-Session-Id) after the caller has moved on.
+        """
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            self.breaker.allow()
+            try:
+                return self._observed(key, send, retryable)
+            except Exception as e:
+                if not self._may_retry(attempt, idempotent, e, retryable):
+                    raise
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def _observed(self, key, send, retryable):
+        started = time.monotonic()
+        try:
+            result = send()
+        except Exception as e:
+            self.breaker.record(not retryable(e))
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self.breaker.record(True)
+        self.latency.observe(key, time.monotonic() - started)
+        return result
+
+    # Async clients
+
+    async def acall(self, key, send, retryable, idempotent):
+        """Async twin of call(); send is a zero-argument coroutine function"""
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            self.breaker.allow()
+            try:
+                if idempotent:
+                    return await self._ahedged(key, send, retryable)
+                return await self._aobserved(key, send, retryable)
+            except Exception as e:
+                if not self._may_retry(attempt, idempotent, e, retryable):
+                    raise
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+
+    async def _aobserved(self, key, send, retryable):
+        started = time.monotonic()
+        try:
+            result = await send()
+        except Exception as e:
+            self.breaker.record(not retryable(e))
+            raise
+        except BaseException:
+            # A timeout or a lost hedge cancels the attempt; without this a
+            # cancelled half-open probe would keep the circuit shut for good
+            self.breaker.abandon()
+            raise
+        self.breaker.record(True)
+        self.latency.observe(key, time.monotonic() - started)
+        return result
+
+    async def _ahedged(self, key, send, retryable):
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return await self._aobserved(key, send, retryable)
+        tasks = {asyncio.ensure_future(self._aobserved(key, send, retryable))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.budget.withdraw():
+                tasks.add(asyncio.ensure_future(self._aobserved(key, send, retryable)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing request really is cancelled
+            for task in tasks:
+                task.cancel()
+
+
+def retry_policy_from_env():
+    """Build a RetryPolicy from MCP_RETRY ("on", "hedge" or "off"); None when off"""
+    setting = os.getenv(RETRY_ENV, 'on').lower()
+    if setting == 'off':
+        return None
+    if setting not in ('on', 'hedge'):
+        print(f"⚠️ Unknown {RETRY_ENV} setting {setting!r}; expected on, hedge or off")
+    # Short-lived scripts never collect 20 samples, so hedge after 1s until they do
+    return RetryPolicy(hedge=setting == 'hedge', hedge_after=1.0)
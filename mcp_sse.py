@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Incremental Server-Sent Events decoder for StreamableHTTP MCP responses
+Consumes bytes as they arrive and yields fully framed events
+"""
+import codecs
+import json
+import re
+from collections import namedtuple
+
+# One dispatched SSE event. `id` is the last event id seen on the stream
+# and `retry` the reconnection delay in ms, if the server sent one.
+SSEEvent = namedtuple('SSEEvent', ['event', 'data', 'id', 'retry'])
+
+_LINE_END = re.compile(r'\r\n|\r|\n')
+
+
+class SSEDecoder:
+    """Decode an SSE byte stream chunk by chunk.
+
+    Only the current partial line and the current event's fields are
+    held in memory, so long-lived streams decode in constant space.
+    Follows the WHATWG framing rules: CRLF/CR/LF line endings, comment
+    lines, multi-line data fields and the event/id/retry fields.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._line = ''
+        self._skip_lf = False
+        self._started = False
+        self.last_event_id = ''
+        self.retry = None
+        self._reset_event()
+
+    def _reset_event(self):
+        self._event_type = ''
+        self._data = []
+
+    def feed(self, chunk):
+        """Feed bytes (or text) and return the events completed by them"""
+        text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if not text:
+            return []
+
+        if not self._started:
+            self._started = True
+            text = text.lstrip('\ufeff')
+
+        # A CR ending the previous chunk may be the first half of CRLF
+        if self._skip_lf and text.startswith('\n'):
+            text = text[1:]
+        self._skip_lf = text.endswith('\r')
+
+        text = self._line + text
+        events = []
+        pos = 0
+        for match in _LINE_END.finditer(text):
+            event = self._process_line(text[pos:match.start()])
+            if event is not None:
+                events.append(event)
+            pos = match.end()
+        self._line = text[pos:]
+        return events
+
+    def close(self):
+        """Flush the decoder at end of stream.
+
+        A trailing event without its terminating blank line is
+        incomplete and is discarded, as the SSE spec requires.
+        """
+        events = self.feed(self._decoder.decode(b'', final=True))
+        self._line = ''
+        self._reset_event()
+        return events
+
+    def _process_line(self, line):
+        if not line:
+            return self._dispatch()
+        if line.startswith(':'):
+            return None  # Comment / keep-alive
+
+        field, sep, value = line.partition(':')
+        if sep and value.startswith(' '):
+            value = value[1:]
+
+        if field == 'data':
+            self._data.append(value)
+        elif field == 'event':
+            self._event_type = value
+        elif field == 'id':
+            if '\0' not in value:
+                self.last_event_id = value
+        elif field == 'retry':
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self):
+        if not self._data:
+            self._reset_event()
+            return None
+        event = SSEEvent(
+            event=self._event_type or 'message',
+            data='\n'.join(self._data),
+            id=self.last_event_id or None,
+            retry=self.retry
+        )
+        self._reset_event()
+        return event
+
+
+def iter_sse_events(chunks):
+    """Yield SSE events from an iterable of byte chunks as they complete"""
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+def event_messages(event):
+    """Return the JSON-RPC messages carried by one SSE event.
+
+    An event may carry a single message or a batch array. Undecodable
+    data is reported as an error dict rather than raised.
+    """
+    try:
+        parsed = json.loads(event.data)
+    except json.JSONDecodeError:
+        return [{"error": f"Invalid JSON in SSE data: {event.data}"}]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+def iter_jsonrpc_messages(events):
+    """Yield JSON-RPC messages from a stream of SSE events"""
+    for event in events:
+        yield from event_messages(event)
+
+
+def is_event_stream(response):
+    """True when the response's Content-Type says it is framed as SSE"""
+    content_type = response.headers.get('Content-Type', '')
+    return 'text/event-stream' in content_type
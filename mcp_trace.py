@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Per-request latency tracing for the MCP clients
+Splits each call into auth, connect, time-to-first-byte, body and parse
+phases and exports them as JSON lines or OTLP/JSON
+"""
+import contextlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+
+# MCP_TRACE=jsonl:<path> or otlp:<path> ("-" is stderr)
+TRACE_ENV = 'MCP_TRACE'
+
+_local = threading.local()
+
+
+def parse_server_timing(value):
+    """Parse a Server-Timing header into {metric: {'dur': ms, 'desc': text}}"""
+    metrics = {}
+    for entry in (value or '').split(','):
+        name, *params = [part.strip() for part in entry.split(';')]
+        if not name:
+            continue
+        metric = metrics.setdefault(name, {})
+        for param in params:
+            key, _, raw = param.partition('=')
+            raw = raw.strip('"')
+            if key == 'dur':
+                try:
+                    metric['dur'] = float(raw)
+                except ValueError:
+                    pass
+            elif key == 'desc':
+                metric['desc'] = raw
+    return metrics
+
+
+class Span:
+    """One timed operation with its phases.
+
+    Phases may repeat (body reads interleave with parsing), so each
+    phase keeps its first start time and the sum of its durations.
+    """
+
+    def __init__(self, name, tracer, attributes=None):
+        self.name = name
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes = dict(attributes or {})
+        self.phases = {}
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._connect_mark = None
+
+    def traceparent(self):
+        """W3C traceparent header value, so the server can tag its side of the call"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def add_phase(self, phase, start_ns, end_ns=None):
+        end_ns = time.time_ns() if end_ns is None else end_ns
+        first_start, total = self.phases.get(phase, (start_ns, 0))
+        self.phases[phase] = (min(first_start, start_ns), total + end_ns - start_ns)
+
+    @contextlib.contextmanager
+    def phase(self, phase):
+        started = time.time_ns()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, started)
+
+    def timed(self, iterable, phase):
+        """Yield from iterable, counting time spent waiting on it as `phase`"""
+        iterator = iter(iterable)
+        while True:
+            started = time.time_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_phase(phase, started)
+                return
+            self.add_phase(phase, started)
+            yield item
+
+    async def atimed(self, iterable, phase):
+        """Async twin of timed()"""
+        iterator = iterable.__aiter__()
+        while True:
+            started = time.time_ns()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.add_phase(phase, started)
+                return
+            self.add_phase(phase, started)
+            yield item
+
+    async def httpcore_trace(self, event, info):
+        """httpx "trace" extension hook: turns TCP connect and TLS handshake events into the connect phase"""
+        if not event.startswith('connection.'):
+            return
+        if event.endswith('.started'):
+            self._connect_mark = time.time_ns()
+        elif event.endswith(('.complete', '.failed')) and self._connect_mark is not None:
+            self.add_phase('connect', self._connect_mark)
+            self._connect_mark = None
+
+    def record_server_timing(self, header):
+        """Attach the server's Server-Timing metrics as server.<name>_ms attributes"""
+        for name, metric in parse_server_timing(header).items():
+            if 'dur' in metric:
+                self.attributes[f'server.{name}_ms'] = metric['dur']
+            if 'desc' in metric:
+                self.attributes[f'server.{name}'] = metric['desc']
+
+    def finish(self, error=None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+        self.tracer.export(self)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'start': self.start_ns / 1e9,
+            'duration_ms': (self.end_ns - self.start_ns) / 1e6,
+            'phases_ms': {phase: total / 1e6 for phase, (_, total) in self.phases.items()},
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class Tracer:
+    """Creates spans and hands each finished one to every exporter.
+
+    An exporter is any callable taking a Span, so tests and tools can
+    plug in their own next to JsonLinesExporter and OTLPJsonExporter.
+    """
+
+    def __init__(self, *exporters, service_name='mcp-client'):
+        self.exporters = list(exporters)
+        self.service_name = service_name
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def start(self, name, **attributes):
+        return Span(name, self, attributes)
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """Time a block (e.g. token acquisition) as its own span"""
+        span = self.start(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.finish(e)
+            raise
+        span.finish()
+
+    def export(self, span):
+        for exporter in self.exporters:
+            exporter(span)
+
+
+def maybe_span(tracer, name, **attributes):
+    """tracer.span(name) when tracing is on, otherwise a no-op context"""
+    return tracer.span(name, **attributes) if tracer is not None else contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def activate(span):
+    """Make span the current one on this thread (for connection-level hooks)"""
+    previous = getattr(_local, 'span', None)
+    _local.span = span
+    try:
+        yield span
+    finally:
+        _local.span = previous
+
+
+def current_span():
+    return getattr(_local, 'span', None)
+
+
+class _LineWriter:
+    def __init__(self, target):
+        self._lock = threading.Lock()
+        if target in (None, '-'):
+            self._stream, self._owned = sys.stderr, False
+        elif isinstance(target, str):
+            self._stream, self._owned = open(target, 'a'), True
+        else:
+            self._stream, self._owned = target, False
+
+    def write_line(self, record):
+        line = json.dumps(record)
+        with self._lock:
+            self._stream.write(line + '\n')
+            self._stream.flush()
+
+    def close(self):
+        if self._owned:
+            self._stream.close()
+
+
+class JsonLinesExporter(_LineWriter):
+    """One JSON object per finished span, phases in milliseconds"""
+
+    def __call__(self, span):
+        self.write_line(span.to_dict())
+
+
+class OTLPJsonExporter(_LineWriter):
+    """OTLP/JSON ExportTraceServiceRequest per line, as the OpenTelemetry file exporter writes.
+
+    Each request becomes a CLIENT span with one child span per phase,
+    ready for a collector's otlpjsonfile receiver.
+    """
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+    def _attributes(self, attributes):
+        return [{'key': key, 'value': self._value(value)} for key, value in attributes.items()]
+
+    def __call__(self, span):
+        spans = [{
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 3,  # SPAN_KIND_CLIENT
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': self._attributes(span.attributes),
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        }]
+        for phase, (start_ns, total) in span.phases.items():
+            spans.append({
+                'traceId': span.trace_id,
+                'spanId': secrets.token_hex(8),
+                'parentSpanId': span.span_id,
+                'name': phase,
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(start_ns + total),
+            })
+        self.write_line({'resourceSpans': [{
+            'resource': {'attributes': self._attributes({'service.name': span.tracer.service_name})},
+            'scopeSpans': [{'scope': {'name': 'mcp_trace'}, 'spans': spans}],
+        }]})
+
+
+EXPORTERS = {'jsonl': JsonLinesExporter, 'otlp': OTLPJsonExporter}
+
+
+def tracer_from_env(service_name='mcp-client'):
+    """Build a Tracer from MCP_TRACE (e.g. "jsonl:-" or "otlp:/tmp/spans.jsonl"); None when unset"""
+    setting = os.getenv(TRACE_ENV)
+    if not setting:
+        return None
+    kind, _, target = setting.partition(':')
+    exporter = EXPORTERS.get(kind)
+    if exporter is None:
+        print(f"⚠️ Unknown {TRACE_ENV} exporter {kind!r}; expected one of {', '.join(EXPORTERS)}")
+        return None
+    return Tracer(exporter(target or '-'), service_name=service_name)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+mcp-bench: load generation and latency benchmark for MCP endpoints.
+
+Drives concurrent virtual users through initialize → tools/list → tools/call
+mixes, either closed-loop (each user sends as soon as its previous call
+returns) or open-loop at a target request rate, and reports throughput,
+latency percentiles and error rates as a text table and/or JSON.
+
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import click
+import httpx
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+METHODS = ("initialize", "tools/list", "tools/call")
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with ~1% relative precision.
+
+    Memory is bounded by the dynamic range of the samples rather than
+    their number, so long runs at high rates stay cheap.
+    """
+
+    def __init__(self, precision: float = 0.01):
+        self._log_base = math.log1p(precision)
+        self._counts: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(seconds * 1_000_000, 1.0)
+        self._counts[int(math.log(micros) / self._log_base)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def record_corrected(self, seconds: float, expected_interval: float | None) -> None:
+        """Record a sample plus the samples a stalled closed loop failed to send.
+
+        This is HdrHistogram's coordinated-omission correction: while a
+        request takes longer than the expected interval between requests,
+        the requests that should have been sent meanwhile would have seen
+        linearly decreasing latencies.
+        """
+        self.record(seconds)
+        if not expected_interval or expected_interval <= 0:
+            return
+        missing = seconds - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def percentile(self, percent: float) -> float:
+        """Latency in seconds at or below which `percent` of samples fall"""
+        if not self.count:
+            return 0.0
+        threshold = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= threshold:
+                return min(math.exp((bucket + 1) * self._log_base) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        """Percentiles, mean and max in milliseconds"""
+        summary: dict[str, Any] = {"count": self.count}
+        for percent in PERCENTILES:
+            summary[f"p{percent:g}"] = round(self.percentile(percent) * 1000, 3)
+        summary["mean"] = round(self.total / self.count * 1000, 3) if self.count else 0.0
+        summary["max"] = round(self.max * 1000, 3)
+        return summary
+
+
+@dataclass
+class BenchConfig:
+    url: str
+    token: str | None
+    users: int
+    duration: float
+    max_requests: int | None
+    rate: float | None
+    mix: list[tuple[str, float]]
+    tool: str | None
+    arguments: dict[str, Any]
+    timeout: float
+    expected_interval: float | None
+
+
+@dataclass
+class BenchStats:
+    # Time from actually sending to completion
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    # Time from when the request should have been sent (open loop) or
+    # CO-corrected service time (closed loop)
+    response: LatencyHistogram = field(default_factory=LatencyHistogram)
+    per_method: dict[str, LatencyHistogram] = field(default_factory=lambda: defaultdict(LatencyHistogram))
+    method_errors: Counter[str] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def record(self, method: str, service: float, response: float, error: str | None,
+               expected_interval: float | None = None) -> None:
+        self.service.record(service)
+        self.response.record_corrected(response, expected_interval)
+        self.per_method[method].record(service)
+        if error:
+            self.errors[error] += 1
+            self.method_errors[method] += 1
+
+
+def parse_mix(spec: str) -> list[tuple[str, float]]:
+    """Parse "tools/list=1,tools/call=9" into (method, weight) pairs"""
+    mix = []
+    for part in spec.split(","):
+        method, _, weight = part.strip().partition("=")
+        if method not in METHODS:
+            raise click.BadParameter(f"unknown method {method!r}; expected one of {', '.join(METHODS)}")
+        try:
+            parsed = float(weight or 1)
+        except ValueError:
+            raise click.BadParameter(f"invalid weight in {part!r}") from None
+        if not parsed >= 0 or math.isinf(parsed):
+            raise click.BadParameter(f"weight in {part!r} must be a finite number >= 0")
+        mix.append((method, parsed))
+    # random.choices can't pick from weights that are all zero
+    if not sum(weight for _, weight in mix) > 0:
+        raise click.BadParameter(f"mix {spec!r} needs at least one weight above 0")
+    return mix
+
+
+def _first_message(response: httpx.Response) -> dict[str, Any]:
+    """Extract the JSON-RPC reply from a JSON or SSE-framed body"""
+    if "text/event-stream" in response.headers.get("content-type", ""):
+        for block in response.text.replace("\r\n", "\n").split("\n\n"):
+            data = "\n".join(line[5:].lstrip() for line in block.split("\n") if line.startswith("data:"))
+            if data:
+                message = json.loads(data)
+                if isinstance(message, dict) and "method" not in message:
+                    return message
+        raise ValueError("no response in event stream")
+    return response.json()
+
+
+class VirtualUser:
+    """One simulated client: its own MCP session over the shared connection pool."""
+
+    def __init__(self, client: httpx.AsyncClient, config: BenchConfig):
+        self.client = client
+        self.config = config
+        self.session_id: str | None = None
+        self._ids = itertools.count(1)
+
+    def params_for(self, method: str) -> dict[str, Any]:
+        if method == "initialize":
+            return {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-bench", "version": "0.1.0"},
+            }
+        if method == "tools/call":
+            return {"name": self.config.tool, "arguments": self.config.arguments}
+        return {}
+
+    async def send(self, method: str) -> str | None:
+        """Send one request; returns an error label, or None on success"""
+        headers = {SESSION_HEADER: self.session_id} if self.session_id else {}
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": self.params_for(method)}
+        try:
+            response = await self.client.post(self.config.url, json=payload, headers=headers)
+            if response.status_code >= 400:
+                return f"http_{response.status_code}"
+            if method == "initialize":
+                self.session_id = response.headers.get(SESSION_HEADER, self.session_id)
+            message = _first_message(response)
+        except httpx.TimeoutException:
+            return "timeout"
+        except httpx.TransportError:
+            return "connection"
+        except ValueError:
+            return "bad_response"
+        if "error" in message:
+            return f"rpc_{message['error'].get('code', 'error')}"
+        if isinstance(message.get("result"), dict) and message["result"].get("isError"):
+            return "tool_error"
+        return None
+
+
+class RequestBudget:
+    """Shared cap on the number of requests across all virtual users"""
+
+    def __init__(self, limit: int | None):
+        self.remaining = limit
+
+    def take(self) -> bool:
+        if self.remaining is None:
+            return True
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def _choose(mix: list[tuple[str, float]]) -> str:
+    methods, weights = zip(*mix)
+    return random.choices(methods, weights=weights)[0]
+
+
+async def _timed(user: VirtualUser, method: str) -> tuple[float, str | None]:
+    start = time.perf_counter()
+    error = await user.send(method)
+    return time.perf_counter() - start, error
+
+
+async def _closed_loop_user(user: VirtualUser, config: BenchConfig, stats: BenchStats,
+                            budget: RequestBudget, deadline: float) -> None:
+    elapsed, error = await _timed(user, "initialize")
+    stats.record("initialize", elapsed, elapsed, error)
+    while time.perf_counter() < deadline and budget.take():
+        method = _choose(config.mix)
+        elapsed, error = await _timed(user, method)
+        stats.record(method, elapsed, elapsed, error, config.expected_interval)
+
+
+async def _open_loop(users: list[VirtualUser], config: BenchConfig, stats: BenchStats,
+                     budget: RequestBudget, deadline: float) -> None:
+    """Issue requests on a fixed schedule, independent of how fast replies come back.
+
+    Response time is measured from each request's scheduled send time, so
+    queueing behind slow requests shows up in the latency instead of
+    silently lowering the offered load.
+    """
+    assert config.rate
+    queue: asyncio.Queue[float | None] = asyncio.Queue()
+
+    async def worker(user: VirtualUser) -> None:
+        elapsed, error = await _timed(user, "initialize")
+        stats.record("initialize", elapsed, elapsed, error)
+        while (intended := await queue.get()) is not None:
+            method = _choose(config.mix)
+            elapsed, error = await _timed(user, method)
+            stats.record(method, elapsed, time.perf_counter() - intended, error)
+
+    workers = [asyncio.create_task(worker(user)) for user in users]
+    start = time.perf_counter()
+    for index in itertools.count():
+        intended = start + index / config.rate
+        if intended >= deadline or not budget.take():
+            break
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        queue.put_nowait(intended)
+    for _ in workers:
+        queue.put_nowait(None)
+    await asyncio.gather(*workers)
+
+
+async def run_benchmark(config: BenchConfig) -> dict[str, Any]:
+    """Run one benchmark and return its report"""
+    headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+    if config.token:
+        headers["Authorization"] = f"Bearer {config.token}"
+    limits = httpx.Limits(max_connections=config.users, max_keepalive_connections=config.users)
+
+    stats = BenchStats()
+    budget = RequestBudget(config.max_requests)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=config.timeout) as client:
+        users = [VirtualUser(client, config) for _ in range(config.users)]
+        start = time.perf_counter()
+        deadline = start + config.duration
+        if config.rate:
+            await _open_loop(users, config, stats, budget, deadline)
+        else:
+            await asyncio.gather(*(_closed_loop_user(user, config, stats, budget, deadline) for user in users))
+        elapsed = time.perf_counter() - start
+
+    total = stats.service.count
+    error_count = sum(stats.errors.values())
+    return {
+        "url": config.url,
+        "mode": "open" if config.rate else "closed",
+        "users": config.users,
+        "target_rate": config.rate,
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "errors": error_count,
+        "error_rate": round(error_count / total, 6) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "service": stats.service.summary(),
+            "response_co_corrected": stats.response.summary(),
+        },
+        "methods": {
+            method: {**histogram.summary(), "errors": stats.method_errors[method]}
+            for method, histogram in stats.per_method.items()
+        },
+        "error_kinds": dict(stats.errors),
+    }
+
+
+def format_table(report: dict[str, Any]) -> str:
+    """Render a report as a fixed-width text table"""
+    columns = ["count", "errors"] + [f"p{percent:g}" for percent in PERCENTILES] + ["max"]
+    lines = [
+        f"mcp-bench: {report['url']}",
+        f"mode: {report['mode']} loop, {report['users']} users"
+        + (f", target {report['target_rate']:g} req/s" if report["target_rate"] else ""),
+        f"requests: {report['requests']}  errors: {report['errors']} ({report['error_rate']:.2%})"
+        f"  throughput: {report['throughput_rps']:.1f} req/s  elapsed: {report['elapsed_s']:.1f}s",
+        "",
+        f"{'latency (ms)':<24}" + "".join(f"{column:>10}" for column in columns),
+    ]
+
+    def row(label: str, summary: dict[str, Any], errors: Any = "") -> str:
+        cells = [summary["count"], errors] + [summary[column] for column in columns[2:]]
+        return f"{label:<24}" + "".join(
+            f"{cell:>10.2f}" if isinstance(cell, float) else f"{cell:>10}" for cell in cells
+        )
+
+    for method, summary in report["methods"].items():
+        lines.append(row(method, summary, summary["errors"]))
+    lines.append(row("all (service)", report["latency_ms"]["service"], report["errors"]))
+    lines.append(row("all (CO-corrected)", report["latency_ms"]["response_co_corrected"]))
+    if report["error_kinds"]:
+        kinds = ", ".join(f"{kind}: {count}" for kind, count in sorted(report["error_kinds"].items()))
+        lines.extend(["", f"errors by kind: {kinds}"])
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("--url", envvar="MCP_SERVER_URL", required=True, help="MCP endpoint (defaults to $MCP_SERVER_URL)")
+@click.option("--token", envvar="MCP_ACCESS_TOKEN", default=None, help="Bearer token (defaults to $MCP_ACCESS_TOKEN)")
+@click.option(
+    "--users", "-u", type=click.IntRange(min=1), default=10, show_default=True, help="Concurrent virtual users"
+)
+@click.option("--duration", "-d", default=30.0, show_default=True, help="Run time in seconds")
+@click.option("--requests", "-n", "max_requests", type=int, default=None, help="Stop after this many requests")
+@click.option("--rate", "-r", type=float, default=None, help="Target req/s (open loop); omit for closed loop")
+@click.option("--mix", default="tools/list=1,tools/call=9", show_default=True, help="Weighted method mix")
+@click.option("--tool", default=None, help="Tool to call for tools/call")
+@click.option("--arguments", default="{}", show_default=True, help="JSON arguments for --tool")
+@click.option("--timeout", default=30.0, show_default=True, help="Per-request timeout in seconds")
+@click.option(
+    "--expected-interval-ms",
+    type=float,
+    default=None,
+    help="Closed loop: intended gap between a user's requests, for coordinated-omission correction",
+)
+@click.option(
+    "--format", "output_format", type=click.Choice(["table", "json", "both"]), default="table", show_default=True
+)
+@click.option("--json-out", type=click.Path(dir_okay=False, writable=True), default=None, help="Also write JSON here")
+def cli(
+    url: str,
+    token: str | None,
+    users: int,
+    duration: float,
+    max_requests: int | None,
+    rate: float | None,
+    mix: str,
+    tool: str | None,
+    arguments: str,
+    timeout: float,
+    expected_interval_ms: float | None,
+    output_format: str,
+    json_out: str | None,
+):
+    """Benchmark an MCP endpoint with concurrent virtual users."""
+    parsed_mix = parse_mix(mix)
+    if tool is None and any(method == "tools/call" for method, _ in parsed_mix):
+        raise click.UsageError("--tool is required when the mix includes tools/call")
+    try:
+        parsed_arguments = json.loads(arguments)
+    except json.JSONDecodeError as e:
+        raise click.BadParameter(f"--arguments is not valid JSON: {e}") from None
+
+    config = BenchConfig(
+        url=url,
+        token=token,
+        users=users,
+        duration=duration,
+        max_requests=max_requests,
+        rate=rate,
+        mix=parsed_mix,
+        tool=tool,
+        arguments=parsed_arguments,
+        timeout=timeout,
+        expected_interval=expected_interval_ms / 1000 if expected_interval_ms else None,
+    )
+    report = asyncio.run(run_benchmark(config))
+
+    if output_format in ("table", "both"):
+        click.echo(format_table(report))
+    if output_format in ("json", "both"):
+        click.echo(json.dumps(report, indent=2))
+    if json_out:
+        with open(json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if report["requests"] and report["errors"] == report["requests"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,113 @@
+"""
+Keyed JSON file shared safely by concurrent client processes.
+
+The same store as the root file_store.LockedJsonStore, and it must
+behave identically: this package is built and installed on its own (the
+wheel ships only mcp_simple_auth_client), so it cannot import the root
+scripts.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterator
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the store still works per process
+    fcntl = None
+
+CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "mcp-clients")
+
+
+class LockedJsonStore:
+    """Keyed JSON file guarded by an advisory lock.
+
+    Reads take a shared lock and writes an exclusive one on a sidecar
+    .lock file; the store itself is replaced atomically so readers never
+    see a partial write.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = self.path + ".lock"
+
+    @contextlib.contextmanager
+    def locked(self, exclusive: bool = False, blocking: bool = True) -> Iterator[bool]:
+        """Hold the store lock; yields False if a non-blocking lock was busy."""
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is None:
+                yield True
+                return
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_all(self) -> dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Any:
+        """Read one entry; call while holding the lock."""
+        return self._read_all().get(key)
+
+    def put(self, key: str, entry: Any) -> None:
+        """Write one entry atomically; call while holding the exclusive lock."""
+        entries = self._read_all()
+        entries[key] = entry
+        self._write_all(entries)
+
+    def delete(self, key: str) -> None:
+        """Drop one entry; call while holding the exclusive lock."""
+        entries = self._read_all()
+        if entries.pop(key, None) is not None:
+            self._write_all(entries)
+
+    def _write_all(self, entries: dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".store-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+def read_entry(store: LockedJsonStore, key: str) -> Any:
+    """One entry under a shared lock, or None if the store can't be read."""
+    try:
+        with store.locked():
+            return store.get(key)
+    except OSError:
+        return None
+
+
+def write_or_warn(store: LockedJsonStore, what: str, cost: str, write: Callable[[], None]) -> None:
+    """Run write() under the exclusive lock; an unwritable store only warns.
+
+    Every store here is a cache, so failing to write it (e.g. a read-only
+    cache dir) costs the next run `cost` and nothing else.
+    """
+    try:
+        with store.locked(exclusive=True):
+            write()
+    except OSError as e:
+        print(f"⚠️ Could not write {what}, which costs the next run {cost}: {e}")
@@ -7,20 +7,29 @@ This client connects to an MCP server using streamable HTTP transport with OAuth
 """
 
 import asyncio
+import contextlib
+import html
+import json
 import os
-import threading
+import sys
 import time
 import webbrowser
 from datetime import timedelta
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any
+from typing import Any, TextIO
 from urllib.parse import parse_qs, urlparse
 
-from mcp.client.auth import OAuthClientProvider, TokenStorage
+import click
+from mcp.client.auth import TokenStorage
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.shared.auth import OAuthClientInformationFull, OAuthClientMetadata, OAuthToken
+from mcp.types import Implementation, Tool
+
+from .pool import SessionPool
+from .schema_cache import ToolSchemaCache, validate_arguments
+from .token_storage import FileTokenStorage, StoredTokenOAuthProvider
+from .transport_select import TRANSPORTS, TransportChoiceCache, authenticate, fastest, format_probe, probe_transports
 
 
 class InMemoryTokenStorage(TokenStorage):
@@ -43,26 +52,7 @@ class InMemoryTokenStorage(TokenStorage):
         self._client_info = client_info
 
 
-class CallbackHandler(BaseHTTPRequestHandler):
-    """Simple HTTP handler to capture OAuth callback."""
-
-    def __init__(self, request, client_address, server, callback_data):
-        """Initialize with callback data storage."""
-        self.callback_data = callback_data
-        super().__init__(request, client_address, server)
-
-    def do_GET(self):
-        """Handle GET request from OAuth redirect."""
-        parsed = urlparse(self.path)
-        query_params = parse_qs(parsed.query)
-
-        if "code" in query_params:
-            self.callback_data["authorization_code"] = query_params["code"][0]
-            self.callback_data["state"] = query_params.get("state", [None])[0]
-            self.send_response(200)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
-            self.wfile.write(b"""
+SUCCESS_PAGE = b"""
             <html>
             <body>
                 <h1>Authorization Successful!</h1>
@@ -70,124 +60,243 @@ class CallbackHandler(BaseHTTPRequestHandler):
                 <script>setTimeout(() => window.close(), 2000);</script>
             </body>
             </html>
-            """)
-        elif "error" in query_params:
-            self.callback_data["error"] = query_params["error"][0]
-            self.send_response(400)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
-            self.wfile.write(
-                f"""
+            """
+
+ERROR_PAGE = """
             <html>
             <body>
                 <h1>Authorization Failed</h1>
-                <p>Error: {query_params["error"][0]}</p>
+                <p>Error: {error}</p>
                 <p>You can close this window and return to the terminal.</p>
             </body>
             </html>
-            """.encode()
-            )
-        else:
-            self.send_response(404)
-            self.end_headers()
+            """
 
-    def log_message(self, format, *args):
-        """Suppress default logging."""
-        pass
+# How long a connected browser gets to send its request line and headers
+REQUEST_READ_TIMEOUT = 10
 
 
 class CallbackServer:
-    """Simple server to handle OAuth callbacks."""
-
-    def __init__(self, port=3000):
-        self.port = port
-        self.server = None
-        self.thread = None
-        self.callback_data = {"authorization_code": None, "state": None, "error": None}
-
-    def _create_handler_with_data(self):
-        """Create a handler class with access to callback data."""
-        callback_data = self.callback_data
+    """Asyncio listener for the OAuth redirect.
 
-        class DataCallbackHandler(CallbackHandler):
-            def __init__(self, request, client_address, server):
-                super().__init__(request, client_address, server, callback_data)
+    The first redirect carrying a code (or an error) resolves a future,
+    so waiting for authorization never blocks the event loop and other
+    sessions keep running meanwhile.
+    """
 
-        return DataCallbackHandler
+    def __init__(self, port=3000, host="localhost"):
+        self.port = port
+        self.host = host
+        self.server: asyncio.Server | None = None
+        self._callback: asyncio.Future[tuple[str, str | None]] | None = None
 
-    def start(self):
-        """Start the callback server in a background thread."""
-        handler_class = self._create_handler_with_data()
-        self.server = HTTPServer(("localhost", self.port), handler_class)
-        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-        self.thread.start()
-        print(f"🖥️  Started callback server on http://localhost:{self.port}")
+    async def start(self):
+        """Start listening on the event loop."""
+        self._callback = asyncio.get_running_loop().create_future()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"🖥️  Started callback server on http://{self.host}:{self.port}")
 
-    def stop(self):
+    async def stop(self):
         """Stop the callback server."""
         if self.server:
-            self.server.shutdown()
-            self.server.server_close()
-        if self.thread:
-            self.thread.join(timeout=1)
-
-    def wait_for_callback(self, timeout=300):
-        """Wait for OAuth callback with timeout."""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.callback_data["authorization_code"]:
-                return self.callback_data["authorization_code"]
-            elif self.callback_data["error"]:
-                raise Exception(f"OAuth error: {self.callback_data['error']}")
-            time.sleep(0.1)
-        raise Exception("Timeout waiting for OAuth callback")
-
-    def get_state(self):
-        """Get the received state parameter."""
-        return self.callback_data["state"]
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def wait_for_callback(self, timeout=300) -> tuple[str, str | None]:
+        """Wait for the OAuth callback; returns the authorization code and state."""
+        if self._callback is None:
+            raise RuntimeError("Callback server is not started")
+        try:
+            # Shielded so a timed-out wait leaves the callback future intact
+            return await asyncio.wait_for(asyncio.shield(self._callback), timeout)
+        except asyncio.TimeoutError:
+            raise Exception("Timeout waiting for OAuth callback") from None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer one HTTP request from the browser."""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_READ_TIMEOUT)
+            while (await asyncio.wait_for(reader.readline(), REQUEST_READ_TIMEOUT)) not in (b"\r\n", b"\n", b""):
+                pass  # Headers carry nothing we need
+            status, reason, body = self._handle_request(request_line.decode("latin-1"))
+            writer.write(
+                f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: text/html\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _handle_request(self, request_line: str) -> tuple[int, str, bytes]:
+        """Capture code/state or error from the redirect; returns status, reason and body."""
+        parts = request_line.split()
+        if len(parts) < 2 or parts[0] != "GET":
+            return 405, "Method Not Allowed", b""
+        query_params = parse_qs(urlparse(parts[1]).query)
+
+        if "code" in query_params:
+            if not self._callback.done():
+                self._callback.set_result((query_params["code"][0], query_params.get("state", [None])[0]))
+            return 200, "OK", SUCCESS_PAGE
+        elif "error" in query_params:
+            error = query_params["error"][0]
+            if not self._callback.done():
+                self._callback.set_exception(Exception(f"OAuth error: {error}"))
+            return 400, "Bad Request", ERROR_PAGE.format(error=html.escape(error)).encode()
+        return 404, "Not Found", b""
 
 
 class SimpleAuthClient:
     """Simple MCP client with auth support."""
 
-    def __init__(self, server_url: str, transport_type: str = "streamable_http"):
-        self.server_url = server_url
+    def __init__(
+        self,
+        server_url: str | list[str],
+        transport_type: str = "streamable_http",
+        batch_input: TextIO | None = None,
+        batch_output: TextIO | None = None,
+        concurrency: int = 10,
+        probe_only: bool = False,
+    ):
+        # Several URLs connect a SessionPool that routes calls by tool name
+        self.server_urls = [server_url] if isinstance(server_url, str) else list(server_url)
+        self.server_url = self.server_urls[0]
         self.transport_type = transport_type
-        self.session: ClientSession | None = None
+        self.session: ClientSession | SessionPool | None = None
+        # Set once initialize() succeeds; until then a failed transport can fall back
+        self.connected = False
+        self.server_info: Implementation | None = None
+        self.schema_cache = ToolSchemaCache()
+        self.transport_cache = TransportChoiceCache()
+        self.tools: dict[str, Tool] = {}
+        # With batch_input, tool calls come from JSONL instead of the prompt
+        self.batch_input = batch_input
+        self.batch_output = batch_output or sys.stdout
+        self.concurrency = concurrency
+        # Measure each transport, cache the winner and exit
+        self.probe_only = probe_only
+        self.batch_failures: int | None = None
+
+    def _token_storage(self) -> TokenStorage:
+        """Tokens persist across runs unless MCP_TOKEN_STORE=memory."""
+        if os.getenv("MCP_TOKEN_STORE") == "memory":
+            return InMemoryTokenStorage()
+        if len(self.server_urls) > 1:
+            # Servers behind one CloudFront/ALB share a Cognito login, so a
+            # pool keys its tokens by origin and every server reuses them
+            parsed = urlparse(self.server_url)
+            return FileTokenStorage(f"{parsed.scheme}://{parsed.netloc}")
+        return FileTokenStorage(self.server_url)
+
+    def _oauth_provider(
+        self, server_url: str, storage: TokenStorage, callback_server: CallbackServer
+    ) -> StoredTokenOAuthProvider:
+        """OAuth handler for one server; logins go through the shared callback server."""
+
+        async def callback_handler() -> tuple[str, str | None]:
+            """Wait for OAuth callback and return auth code and state."""
+            print("⏳ Waiting for authorization callback...")
+            try:
+                return await callback_server.wait_for_callback(timeout=300)
+            finally:
+                await callback_server.stop()
+
+        client_metadata_dict = {
+            "client_name": "Simple Auth Client",
+            "redirect_uris": ["http://localhost:2299/callback"],
+            "grant_types": ["authorization_code", "refresh_token"],
+            "response_types": ["code"],
+            "token_endpoint_auth_method": "client_secret_post",
+            "scope": "openid email profile",  # Add this line
+        }
+
+        async def _default_redirect_handler(authorization_url: str) -> None:
+            """Default redirect handler that opens the URL in a browser."""
+            # Only listen once a login is actually needed
+            if callback_server.server is None:
+                await callback_server.start()
+            print(f"Opening browser for authorization: {authorization_url}")
+            webbrowser.open(authorization_url)
+
+        # Create OAuth authentication handler using the new interface
+        return StoredTokenOAuthProvider(
+            server_url=server_url.replace("/mcp", ""),
+            client_metadata=OAuthClientMetadata.model_validate(client_metadata_dict),
+            storage=storage,
+            redirect_handler=_default_redirect_handler,
+            callback_handler=callback_handler,
+        )
+
+    @contextlib.asynccontextmanager
+    async def _transport(self, server_url: str, auth: StoredTokenOAuthProvider, transport_type: str):
+        """Open a transport; yields (read_stream, write_stream, get_session_id)."""
+        if transport_type == "sse":
+            print(f"📡 Opening SSE transport connection with auth to {server_url}...")
+            async with sse_client(
+                url=server_url,
+                auth=auth,
+                timeout=60,
+            ) as (read_stream, write_stream):
+                yield read_stream, write_stream, None
+        else:
+            print(f"📡 Opening StreamableHTTP transport connection with auth to {server_url}...")
+            async with streamablehttp_client(
+                url=server_url,
+                auth=auth,
+                timeout=timedelta(seconds=60),
+            ) as (read_stream, write_stream, get_session_id):
+                yield read_stream, write_stream, get_session_id
+
+    async def probe(
+        self, server_url: str, auth: StoredTokenOAuthProvider, storage: TokenStorage
+    ) -> dict[str, dict[str, Any]]:
+        """Measure every transport against server_url and remember the fastest."""
+
+        def open_transport(transport: str):
+            return self._transport(server_url, auth, transport)
+
+        if await storage.get_tokens() is None:
+            # A browser login must not be timed (or timed out) as part of a probe
+            print(f"🔑 Logging in to {server_url} before probing...")
+            await authenticate(open_transport)
+        print(f"🔬 Probing transports for {server_url}...")
+        results = await probe_transports(open_transport)
+        print(format_probe(results))
+        choice = fastest(results)
+        if choice:
+            print(f"   Using {choice}")
+            self.transport_cache.put(server_url, choice, results)
+        return results
+
+    async def _transport_candidates(
+        self, server_url: str, auth: StoredTokenOAuthProvider, storage: TokenStorage
+    ) -> list[str]:
+        """Transports to try, best first: the configured one, or in auto mode the cached/probed winner.
+
+        The others follow as fallbacks, so a server that only speaks SSE
+        still connects with the default setting.
+        """
+        if self.transport_type != "auto":
+            choice = self.transport_type
+        else:
+            choice = self.transport_cache.get(server_url)
+            if choice is None:
+                choice = fastest(await self.probe(server_url, auth, storage)) or TRANSPORTS[0]
+        return [choice] + [transport for transport in TRANSPORTS if transport != choice]
 
     async def connect(self):
-        """Connect to the MCP server."""
-        print(f"🔗 Attempting to connect to {self.server_url}...")
+        """Connect to the MCP server (or every server, in pool mode)."""
+        print(f"🔗 Attempting to connect to {', '.join(self.server_urls)}...")
 
+        callback_server = CallbackServer(port=2299)
         try:
-            callback_server = CallbackServer(port=2299)
-            callback_server.start()
-
-            async def callback_handler() -> tuple[str, str | None]:
-                """Wait for OAuth callback and return auth code and state."""
-                print("⏳ Waiting for authorization callback...")
-                try:
-                    auth_code = callback_server.wait_for_callback(timeout=300)
-                    return auth_code, callback_server.get_state()
-                finally:
-                    callback_server.stop()
-
-            client_metadata_dict = {
-                "client_name": "Simple Auth Client",
-                "redirect_uris": ["http://localhost:2299/callback"],
-                "grant_types": ["authorization_code", "refresh_token"],
-                "response_types": ["code"],
-                "token_endpoint_auth_method": "client_secret_post",
-                "scope": "openid email profile",  # Add this line
-            }
-
-            async def _default_redirect_handler(authorization_url: str) -> None:
-                """Default redirect handler that opens the URL in a browser."""
-                print(f"Opening browser for authorization: {authorization_url}")
-                webbrowser.open(authorization_url)
-
             # Create storage and set client credentials
-            storage = InMemoryTokenStorage()
+            storage = self._token_storage()
             client_info = OAuthClientInformationFull(
                 client_id=os.getenv("OAUTH_CLIENT_ID"),
                 client_secret=os.getenv("OAUTH_CLIENT_SECRET"),
@@ -199,46 +308,75 @@ class SimpleAuthClient:
             )
             await storage.set_client_info(client_info)
 
-            # Create OAuth authentication handler using the new interface
-            oauth_auth = OAuthClientProvider(
-                server_url=self.server_url.replace("/mcp", ""),
-                client_metadata=OAuthClientMetadata.model_validate(client_metadata_dict),
-                storage=storage,
-                redirect_handler=_default_redirect_handler,
-                callback_handler=callback_handler,
-            )
+            if len(self.server_urls) > 1:
+                await self._run_pool(storage, callback_server)
+                return
 
-            # Create transport with auth handler based on transport type
-            if self.transport_type == "sse":
-                print("📡 Opening SSE transport connection with auth...")
-                async with sse_client(
-                    url=self.server_url,
-                    auth=oauth_auth,
-                    timeout=60,
-                ) as (read_stream, write_stream):
-                    await self._run_session(read_stream, write_stream, None)
-            else:
-                print("📡 Opening StreamableHTTP transport connection with auth...")
-                async with streamablehttp_client(
-                    url=self.server_url,
-                    auth=oauth_auth,
-                    timeout=timedelta(seconds=60),
-                ) as (read_stream, write_stream, get_session_id):
-                    await self._run_session(read_stream, write_stream, get_session_id)
+            oauth_auth = self._oauth_provider(self.server_url, storage, callback_server)
+            if self.probe_only:
+                await self.probe(self.server_url, oauth_auth, storage)
+                return
+            candidates = await self._transport_candidates(self.server_url, oauth_auth, storage)
+            for transport in candidates:
+                try:
+                    async with self._transport(self.server_url, oauth_auth, transport) as streams:
+                        await self._run_session(*streams)
+                    return
+                except Exception as e:
+                    # Only fall back while connecting; a session that got going failed for other reasons
+                    if self.connected or transport == candidates[-1]:
+                        raise
+                    print(f"⚠️ {transport} transport failed ({e}); falling back")
+                    self.transport_cache.forget(self.server_url)
 
         except Exception as e:
             print(f"❌ Failed to connect: {e}")
             import traceback
 
             traceback.print_exc()
+        finally:
+            # Still listening if a login was abandoned
+            await callback_server.stop()
+
+    async def _run_pool(self, storage: TokenStorage, callback_server: CallbackServer):
+        """Connect every server and route tool calls by name across them."""
+
+        @contextlib.asynccontextmanager
+        async def open_session(server_url: str):
+            auth = self._oauth_provider(server_url, storage, callback_server)
+            transport = (await self._transport_candidates(server_url, auth, storage))[0]
+            try:
+                async with self._transport(server_url, auth, transport) as (read_stream, write_stream, _):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        yield session
+            except Exception:
+                # The pool reconnects; make that attempt re-probe instead of repeating a bad choice
+                self.transport_cache.forget(server_url)
+                raise
+
+        if self.probe_only:
+            for server_url in self.server_urls:
+                await self.probe(server_url, self._oauth_provider(server_url, storage, callback_server), storage)
+            return
+
+        async with SessionPool(self.server_urls, open_session, self.schema_cache) as pool:
+            self.session = pool
+            self.connected = True
+            self.tools = dict(pool.tools)
+            print(f"\n✅ Connected to {len(pool.sessions)} of {len(self.server_urls)} MCP servers")
+            for tool_name, server_url in pool.routes.items():
+                print(f"   {tool_name} -> {server_url}")
+            await self._run_commands()
 
     async def _run_session(self, read_stream, write_stream, get_session_id):
         """Run the MCP session with the given streams."""
         print("🤝 Initializing MCP session...")
         async with ClientSession(read_stream, write_stream) as session:
-            self.session = session
             print("⚡ Starting session initialization...")
-            await session.initialize()
+            init_result = await session.initialize()
+            self.session = session
+            self.connected = True
+            self.server_info = init_result.serverInfo
             print("✨ Session initialization complete!")
 
             print(f"\n✅ Connected to MCP server at {self.server_url}")
@@ -247,20 +385,37 @@ class SimpleAuthClient:
                 if session_id:
                     print(f"Session ID: {session_id}")
 
-            # Run interactive loop
+            await self._run_commands()
+
+    async def _run_commands(self):
+        """Drive the connected session(s) from the batch input or the interactive prompt."""
+        if self.batch_input is not None:
+            self.batch_failures = await self.run_batch(self.batch_input, self.batch_output, self.concurrency)
+        else:
             await self.interactive_loop()
 
-    async def list_tools(self):
+    async def fetch_tools(self, refresh: bool = False) -> list[Tool]:
+        """Return the server's tools, from the schema cache unless this server version is new."""
+        if isinstance(self.session, SessionPool):
+            # The pool keeps its own per-server cache and merged index
+            tools = await self.session.refresh_tools() if refresh else list(self.session.tools.values())
+            self.tools = {tool.name: tool for tool in tools}
+            return tools
+        tools = await self.schema_cache.list_tools(self.session, self.server_url, self.server_info, refresh)
+        self.tools = {tool.name: tool for tool in tools}
+        return tools
+
+    async def list_tools(self, refresh: bool = False):
         """List available tools from the server."""
         if not self.session:
             print("❌ Not connected to server")
             return
 
         try:
-            result = await self.session.list_tools()
-            if hasattr(result, "tools") and result.tools:
+            tools = await self.fetch_tools(refresh)
+            if tools:
                 print("\n📋 Available tools:")
-                for i, tool in enumerate(result.tools, 1):
+                for i, tool in enumerate(tools, 1):
                     print(f"{i}. {tool.name}")
                     if tool.description:
                         print(f"   Description: {tool.description}")
@@ -276,6 +431,18 @@ class SimpleAuthClient:
             print("❌ Not connected to server")
             return
 
+        if not self.tools:
+            try:
+                await self.fetch_tools()
+            except Exception:
+                pass  # Without schemas the call still goes out; the server validates it
+
+        tool = self.tools.get(tool_name)
+        problem = validate_arguments(tool, arguments or {}) if tool else None
+        if problem:
+            print(f"❌ Invalid arguments for '{tool_name}': {problem}")
+            return
+
         try:
             result = await self.session.call_tool(tool_name, arguments or {})
             print(f"\n🔧 Tool '{tool_name}' result:")
@@ -290,11 +457,88 @@ class SimpleAuthClient:
         except Exception as e:
             print(f"❌ Failed to call tool '{tool_name}': {e}")
 
+    async def _batch_call(self, line_number: int, line: str) -> dict[str, Any]:
+        """Run one JSONL tool call; failures are reported in the record, never raised."""
+        started = time.perf_counter()
+        record: dict[str, Any] = {"id": line_number}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or not isinstance(request.get("tool"), str):
+                raise ValueError('expected {"tool": "<name>", "arguments": {...}}')
+            record["id"] = request.get("id", line_number)
+            record["tool"] = request["tool"]
+            arguments = request.get("arguments") or {}
+            tool = self.tools.get(request["tool"])
+            problem = validate_arguments(tool, arguments) if tool else None
+            if problem:
+                raise ValueError(f"Invalid arguments: {problem}")
+
+            result = await self.session.call_tool(request["tool"], arguments)
+            record["ok"] = not result.isError
+            record["content"] = [
+                content.model_dump(mode="json", by_alias=True, exclude_none=True) for content in result.content
+            ]
+            structured = getattr(result, "structuredContent", None)
+            if structured is not None:
+                record["structuredContent"] = structured
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = str(e)
+        record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return record
+
+    async def run_batch(self, lines: TextIO, output: TextIO, concurrency: int = 10) -> int:
+        """Run JSONL tool calls concurrently over this session; returns how many failed.
+
+        Each input line is {"tool": ..., "arguments": {...}} with an optional
+        "id" (the line number otherwise). Results are written as JSON lines
+        in completion order, with at most `concurrency` calls in flight; input
+        is only read as slots free up, so any amount of it runs in flat memory.
+        """
+        if not self.tools:
+            try:
+                await self.fetch_tools()
+            except Exception:
+                pass  # Without schemas the calls still go out; the server validates them
+
+        slots = asyncio.Semaphore(concurrency)
+        running: set[asyncio.Task] = set()
+        counts = {"ok": 0, "failed": 0}
+
+        async def run(line_number: int, line: str):
+            try:
+                record = await self._batch_call(line_number, line)
+            finally:
+                slots.release()
+            counts["ok" if record["ok"] else "failed"] += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+        print(f"📦 Running batch with up to {concurrency} calls in flight...")
+        line_number = 0
+        while True:
+            # A blocking read (stdin may be a pipe) must not stall the calls in flight
+            line = await asyncio.to_thread(lines.readline)
+            if not line:
+                break
+            line_number += 1
+            if not line.strip():
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(run(line_number, line))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        if running:
+            await asyncio.gather(*running)
+
+        print(f"✅ {counts['ok']} succeeded, ❌ {counts['failed']} failed")
+        return counts["failed"]
+
     async def interactive_loop(self):
         """Run interactive command loop."""
         print("\n🎯 Interactive MCP Client")
         print("Commands:")
-        print("  list - List available tools")
+        print("  list [--refresh] - List available tools (--refresh bypasses the schema cache)")
         print("  call <tool_name> [args] - Call a tool")
         print("  quit - Exit the client")
         print()
@@ -309,8 +553,8 @@ class SimpleAuthClient:
                 if command == "quit":
                     break
 
-                elif command == "list":
-                    await self.list_tools()
+                elif command in ("list", "list --refresh"):
+                    await self.list_tools(refresh=command.endswith("--refresh"))
 
                 elif command.startswith("call "):
                     parts = command.split(maxsplit=2)
@@ -343,25 +587,60 @@ class SimpleAuthClient:
                 break
 
 
-async def main():
-    """Main entry point."""
+async def main(
+    batch_input: TextIO | None = None,
+    batch_output: TextIO | None = None,
+    concurrency: int = 10,
+    probe_only: bool = False,
+) -> int:
+    """Main entry point; returns the process exit code."""
     # Default server URL - can be overridden with environment variable
-    # Most MCP streamable HTTP servers use /mcp as the endpoint
-    server_url = os.environ["MCP_SERVER_URL"]
+    # Most MCP streamable HTTP servers use /mcp as the endpoint. A
+    # comma-separated list connects to every server at once.
+    server_urls = [url.strip() for url in os.environ["MCP_SERVER_URL"].split(",") if url.strip()]
+    # The other transport is always the fallback; "auto" (opt-in) also probes
+    # each transport once per endpoint and caches the fastest
     transport_type = os.getenv("MCP_TRANSPORT_TYPE", "streamable_http")
 
     print("🚀 Simple MCP Auth Client")
-    print(f"Connecting to: {server_url}")
+    print(f"Connecting to: {', '.join(server_urls)}")
     print(f"Transport type: {transport_type}")
 
     # Start connection flow - OAuth will be handled automatically
-    client = SimpleAuthClient(server_url, transport_type)
+    client = SimpleAuthClient(server_urls, transport_type, batch_input, batch_output, concurrency, probe_only)
     await client.connect()
-
-
-def cli():
+    if batch_input is None:
+        return 0
+    # None means the session never got as far as running the batch
+    return 0 if client.batch_failures == 0 else 1
+
+
+@click.command()
+@click.option(
+    "--batch",
+    "batch_input",
+    type=click.File("r"),
+    default=None,
+    help='Run tool calls from a JSONL file ("-" for stdin) instead of the interactive prompt',
+)
+@click.option(
+    "--output", "-o", type=click.File("w"), default="-", show_default=True, help="Where batch results go, one JSON line each"
+)
+@click.option(
+    "--concurrency", "-c", type=click.IntRange(min=1), default=10, show_default=True, help="Batch calls in flight at once"
+)
+@click.option(
+    "--probe-transports",
+    is_flag=True,
+    help="Measure streamable HTTP and SSE against each server, cache the fastest and exit",
+)
+def cli(batch_input: TextIO | None, output: TextIO, concurrency: int, probe_transports: bool):
     """CLI entry point for uv script."""
-    asyncio.run(main())
+    if batch_input is None:
+        sys.exit(asyncio.run(main(probe_only=probe_transports)))
+    # Keep stdout clean for JSONL results; progress messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        sys.exit(asyncio.run(main(batch_input, output, concurrency)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""
+Warm sessions to several MCP servers behind one login, routed by tool name.
+
+The weather and currency servers sit behind the same CloudFront and ALB
+and accept the same Cognito token, so one pool connects to all of them
+once and sends each tool call straight to the session that serves it.
+"""
+
+import asyncio
+import contextlib
+from collections.abc import Callable
+from typing import Any
+
+from mcp.client.session import ClientSession
+from mcp.types import CallToolResult, Implementation, ListToolsResult, Tool
+
+from .schema_cache import ToolSchemaCache
+
+# Ping idle sessions this often so proxies and the server keep them open
+KEEPALIVE_INTERVAL = 30.0
+# Reconnect backoff after a session drops
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+
+class SessionPool:
+    """Initialized ClientSessions to several servers with a merged tool index.
+
+    `open_session(url)` is an async context manager yielding a not yet
+    initialized ClientSession; the pool owns one per server for its
+    whole lifetime. Each session lives in its own task (transports must
+    be entered and exited on the same task), pings the server every
+    `keepalive_interval` seconds and reconnects if it drops.
+
+    The first server connects alone, so at most one browser login runs;
+    the rest connect concurrently and reuse the stored token. When two
+    servers offer the same tool name, the one listed first wins.
+
+    list_tools() and call_tool() mirror ClientSession, so the pool can
+    stand in for a single session.
+    """
+
+    def __init__(
+        self,
+        server_urls: list[str],
+        open_session: Callable[[str], contextlib.AbstractAsyncContextManager[ClientSession]],
+        schema_cache: ToolSchemaCache | None = None,
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+    ):
+        self.server_urls = list(server_urls)
+        self._open_session = open_session
+        self.schema_cache = schema_cache or ToolSchemaCache()
+        self.keepalive_interval = keepalive_interval
+        self.sessions: dict[str, ClientSession] = {}
+        self.server_info: dict[str, Implementation] = {}
+        self.tools: dict[str, Tool] = {}
+        self.routes: dict[str, str] = {}
+        self._server_tools: dict[str, list[Tool]] = {}
+        self._shadowed: set[tuple[str, str]] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    async def __aenter__(self) -> "SessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+        return False
+
+    async def start(self):
+        """Connect every server; raises only if the first one fails."""
+        first, *rest = self.server_urls
+        try:
+            await self._connect(first)
+        except BaseException:
+            await self.stop()
+            raise
+        results = await asyncio.gather(*(self._connect(url) for url in rest), return_exceptions=True)
+        for url, result in zip(rest, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Could not connect to {url}: {result}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _connect(self, url: str):
+        ready = asyncio.get_running_loop().create_future()
+        self._tasks.append(asyncio.create_task(self._serve(url, ready)))
+        await ready
+
+    async def _serve(self, url: str, ready: asyncio.Future):
+        """Own one server's session: connect, keep alive, reconnect until cancelled."""
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with self._open_session(url) as session:
+                    await self._attach(url, session)
+                    delay = RECONNECT_MIN_DELAY
+                    if not ready.done():
+                        ready.set_result(None)
+                    await self._keep_alive(session)
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                    return
+                print(f"⚠️ Session to {url} dropped ({e}); reconnecting in {delay:.0f}s")
+            finally:
+                self.sessions.pop(url, None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _attach(self, url: str, session: ClientSession):
+        init_result = await session.initialize()
+        self.server_info[url] = init_result.serverInfo
+        self._server_tools[url] = await self.schema_cache.list_tools(session, url, init_result.serverInfo)
+        self.sessions[url] = session
+        self._build_index()
+
+    async def _keep_alive(self, session: ClientSession):
+        # A failed ping ends the session; _serve then reconnects
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            await session.send_ping()
+
+    def _build_index(self):
+        tools: dict[str, Tool] = {}
+        routes: dict[str, str] = {}
+        for url in self.server_urls:
+            for tool in self._server_tools.get(url, []):
+                if tool.name in routes:
+                    if (tool.name, url) not in self._shadowed:
+                        self._shadowed.add((tool.name, url))
+                        print(f"⚠️ Tool '{tool.name}' on {url} is shadowed by {routes[tool.name]}")
+                    continue
+                tools[tool.name] = tool
+                routes[tool.name] = url
+        self.tools = tools
+        self.routes = routes
+
+    async def refresh_tools(self) -> list[Tool]:
+        """Re-list every connected server's tools, bypassing the schema cache."""
+        sessions = list(self.sessions.items())
+        results = await asyncio.gather(
+            *(
+                self.schema_cache.list_tools(session, url, self.server_info.get(url), refresh=True)
+                for url, session in sessions
+            )
+        )
+        for (url, _), tools in zip(sessions, results):
+            self._server_tools[url] = tools
+        self._build_index()
+        return list(self.tools.values())
+
+    async def list_tools(self) -> ListToolsResult:
+        """The merged tool index, as one server's tools/list would return it."""
+        return ListToolsResult(tools=list(self.tools.values()))
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None) -> CallToolResult:
+        """Call a tool on whichever server provides it."""
+        url = self.routes.get(name)
+        if url is None:
+            raise ValueError(f"No connected server provides tool '{name}'")
+        session = self.sessions.get(url)
+        if session is None:
+            raise ConnectionError(f"Session to {url} is reconnecting")
+        return await session.call_tool(name, arguments or {})
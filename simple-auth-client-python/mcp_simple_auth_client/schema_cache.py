@@ -0,0 +1,89 @@
+"""
+On-disk cache of tools/list results, keyed by server URL and serverInfo version.
+
+Saves the tools/list round trip on every run and lets arguments be
+checked against each tool's inputSchema before they are sent.
+"""
+
+import hashlib
+import os
+import time
+from typing import Any
+
+from mcp.client.session import ClientSession
+from mcp.types import Implementation, Tool
+
+from .json_store import CACHE_DIR, LockedJsonStore, read_entry, write_or_warn
+
+try:
+    import jsonschema
+except ImportError:  # Argument checks are skipped; the server still validates
+    jsonschema = None
+
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "simple-auth-tool-schemas.json")
+
+
+class ToolSchemaCache:
+    """tools/list results per server URL.
+
+    An entry is only served while the server reports the same
+    serverInfo name and version it had when the entry was written.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.store = LockedJsonStore(path or os.getenv("MCP_SCHEMA_CACHE", DEFAULT_CACHE_PATH))
+
+    @staticmethod
+    def _key(server_url: str) -> str:
+        return hashlib.sha256(server_url.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _identity(server_info: Implementation) -> list[str]:
+        return [server_info.name, server_info.version]
+
+    def load(self, server_url: str, server_info: Implementation | None) -> list[Tool] | None:
+        """Return the cached tools for this server version, or None."""
+        if server_info is None:
+            return None
+        entry = read_entry(self.store, self._key(server_url))
+        if not entry or entry.get("server") != self._identity(server_info):
+            return None
+        return [Tool.model_validate(tool) for tool in entry["tools"]]
+
+    def save(self, server_url: str, server_info: Implementation | None, tools: list[Tool]) -> None:
+        if server_info is None:
+            return
+        entry = {
+            "server": self._identity(server_info),
+            "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools],
+            "saved_at": time.time(),
+        }
+        key = self._key(server_url)
+        write_or_warn(self.store, "tool schema cache", "a tools/list round trip", lambda: self.store.put(key, entry))
+
+    async def list_tools(
+        self, session: ClientSession, server_url: str, server_info: Implementation | None, refresh: bool = False
+    ) -> list[Tool]:
+        """The server's tools: from the cache for this server version, else tools/list (then cached)."""
+        tools = None if refresh else self.load(server_url, server_info)
+        if tools is not None:
+            return tools
+        result = await session.list_tools()
+        # A paginated list is incomplete, so it isn't worth caching
+        if not result.nextCursor:
+            self.save(server_url, server_info, result.tools)
+        return result.tools
+
+
+def validate_arguments(tool: Tool, arguments: dict[str, Any]) -> str | None:
+    """Check arguments against the tool's inputSchema; returns a problem or None."""
+    if jsonschema is None:
+        return None
+    try:
+        jsonschema.validate(arguments, tool.inputSchema)
+    except jsonschema.ValidationError as e:
+        return e.message
+    except jsonschema.SchemaError:
+        # A schema we can't interpret is the server's to enforce
+        return None
+    return None
@@ -0,0 +1,84 @@
+"""
+Durable OAuth token storage, shared by every client process on the host.
+
+Tokens and client registration survive restarts, so a reconnect reuses
+(or refreshes) the stored access token instead of repeating the browser
+authorization flow.
+"""
+
+import hashlib
+import os
+import time
+from typing import Any
+
+from mcp.client.auth import OAuthClientProvider, TokenStorage
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+
+from .json_store import CACHE_DIR, LockedJsonStore, read_entry, write_or_warn
+
+DEFAULT_TOKEN_PATH = os.path.join(CACHE_DIR, "simple-auth-tokens.json")
+
+# Refresh this long before the access token expires, so a request never
+# goes out with a token that lapses in flight
+REFRESH_MARGIN = 60
+
+
+class FileTokenStorage(TokenStorage):
+    """Tokens and client info for one server URL in a locked JSON file.
+
+    Writes are atomic and serialized across processes; every read goes
+    to disk, so a token refreshed by one process is picked up by the
+    next one that starts. The file is created 0600.
+    """
+
+    def __init__(self, server_url: str, path: str | None = None):
+        self.store = LockedJsonStore(path or os.getenv("MCP_TOKEN_STORE", DEFAULT_TOKEN_PATH))
+        self._key = hashlib.sha256(server_url.encode("utf-8")).hexdigest()
+
+    def _entry(self) -> dict[str, Any]:
+        return read_entry(self.store, self._key) or {}
+
+    def _update(self, **fields: Any) -> None:
+        def write():
+            self.store.put(self._key, {**(self.store.get(self._key) or {}), **fields})
+
+        write_or_warn(self.store, "token store", "an authorization round trip", write)
+
+    async def get_tokens(self) -> OAuthToken | None:
+        tokens = self._entry().get("tokens")
+        return OAuthToken.model_validate(tokens) if tokens else None
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        expires_at = time.time() + tokens.expires_in if tokens.expires_in is not None else None
+        self._update(tokens=tokens.model_dump(mode="json", exclude_none=True), expires_at=expires_at)
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        client_info = self._entry().get("client_info")
+        return OAuthClientInformationFull.model_validate(client_info) if client_info else None
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        self._update(client_info=client_info.model_dump(mode="json", exclude_none=True))
+
+    def expires_at(self) -> float | None:
+        """When the stored access token expires (epoch seconds), if the server said."""
+        return self._entry().get("expires_at")
+
+
+class StoredTokenOAuthProvider(OAuthClientProvider):
+    """OAuthClientProvider that knows when stored tokens expire.
+
+    The stock provider treats tokens loaded from storage as valid until
+    the server answers 401, which then costs a full browser flow. Seeding
+    the expiry from FileTokenStorage lets it use the refresh token
+    instead, REFRESH_MARGIN seconds before the access token runs out.
+
+    _initialize and context.token_expiry_time are SDK internals, which is
+    why pyproject.toml pins mcp to the 1.13 series.
+    """
+
+    async def _initialize(self) -> None:
+        await super()._initialize()
+        storage = self.context.storage
+        expires_at = storage.expires_at() if isinstance(storage, FileTokenStorage) else None
+        if expires_at is not None:
+            self.context.token_expiry_time = expires_at - REFRESH_MARGIN
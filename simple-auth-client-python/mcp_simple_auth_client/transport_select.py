@@ -0,0 +1,136 @@
+"""
+Pick the cheapest transport (streamable HTTP or SSE) per MCP endpoint.
+
+Servers in this repo differ: some only frame responses as SSE, others
+answer plain JSON. Probing each transport once and caching the winner
+per endpoint saves guessing on every run.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from mcp.client.session import ClientSession
+
+from .json_store import CACHE_DIR, LockedJsonStore, read_entry, write_or_warn
+
+TRANSPORTS = ("streamable_http", "sse")
+
+DEFAULT_CHOICE_PATH = os.path.join(CACHE_DIR, "simple-auth-transports.json")
+# Re-probe after a day, in case the deployment changed
+DEFAULT_CHOICE_TTL = 24 * 3600
+
+PROBE_PINGS = 5
+PROBE_TIMEOUT = 30.0
+# A session makes several calls, so steady-state round trips outweigh the one-off handshake
+ROUND_TRIP_WEIGHT = 10
+
+OpenTransport = Callable[[str], contextlib.AbstractAsyncContextManager[tuple[Any, Any, Any]]]
+
+
+async def measure_transport(
+    open_transport: OpenTransport, transport: str, pings: int = PROBE_PINGS
+) -> dict[str, float]:
+    """Time initialize and the median ping round trip over one transport."""
+    started = time.perf_counter()
+    async with open_transport(transport) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            handshake_ms = (time.perf_counter() - started) * 1000
+            round_trips = []
+            for _ in range(pings):
+                ping_started = time.perf_counter()
+                await session.send_ping()
+                round_trips.append((time.perf_counter() - ping_started) * 1000)
+    round_trip_ms = statistics.median(round_trips)
+    return {
+        "handshake_ms": round(handshake_ms, 1),
+        "round_trip_ms": round(round_trip_ms, 1),
+        "score_ms": round(handshake_ms + ROUND_TRIP_WEIGHT * round_trip_ms, 1),
+    }
+
+
+async def authenticate(open_transport: OpenTransport, transports: tuple[str, ...] = TRANSPORTS) -> bool:
+    """Initialize one session, untimed and with no timeout, so a first-run login is over before probing.
+
+    The browser login can take minutes: inside a probe it would count as
+    handshake time, and PROBE_TIMEOUT would cut it off mid-login.
+    Returns False if no transport got a session going.
+    """
+    for transport in transports:
+        try:
+            async with open_transport(transport) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not log in over {transport}: {e}")
+    return False
+
+
+async def probe_transports(
+    open_transport: OpenTransport, transports: tuple[str, ...] = TRANSPORTS
+) -> dict[str, dict[str, Any]]:
+    """Measure every transport in turn; failures are recorded as {"error": ...}.
+
+    Probes run one after another so they don't skew each other. Each is
+    cut off after PROBE_TIMEOUT, so log in first (see authenticate).
+    """
+    results: dict[str, dict[str, Any]] = {}
+    for transport in transports:
+        try:
+            results[transport] = await asyncio.wait_for(measure_transport(open_transport, transport), PROBE_TIMEOUT)
+        except Exception as e:
+            results[transport] = {"error": str(e) or type(e).__name__}
+    return results
+
+
+def fastest(results: dict[str, dict[str, Any]]) -> str | None:
+    """The transport with the lowest score, or None if every probe failed."""
+    working = {transport: result["score_ms"] for transport, result in results.items() if "score_ms" in result}
+    return min(working, key=working.__getitem__) if working else None
+
+
+def format_probe(results: dict[str, dict[str, Any]]) -> str:
+    lines = []
+    for transport, result in results.items():
+        if "error" in result:
+            lines.append(f"   {transport}: ❌ {result['error']}")
+        else:
+            lines.append(
+                f"   {transport}: handshake {result['handshake_ms']} ms, "
+                f"round trip {result['round_trip_ms']} ms (score {result['score_ms']})"
+            )
+    return "\n".join(lines)
+
+
+class TransportChoiceCache:
+    """Chosen transport per endpoint, shared by every client process, for `ttl` seconds."""
+
+    def __init__(self, path: str | None = None, ttl: float | None = None):
+        self.store = LockedJsonStore(path or os.getenv("MCP_TRANSPORT_CACHE", DEFAULT_CHOICE_PATH))
+        self.ttl = ttl if ttl is not None else float(os.getenv("MCP_TRANSPORT_TTL", DEFAULT_CHOICE_TTL))
+
+    @staticmethod
+    def _key(server_url: str) -> str:
+        return hashlib.sha256(server_url.encode("utf-8")).hexdigest()
+
+    def get(self, server_url: str) -> str | None:
+        entry = read_entry(self.store, self._key(server_url))
+        if not entry or time.time() - entry["chosen_at"] > self.ttl or entry["transport"] not in TRANSPORTS:
+            return None
+        return entry["transport"]
+
+    def put(self, server_url: str, transport: str, results: dict[str, dict[str, Any]]) -> None:
+        key, entry = self._key(server_url), {"transport": transport, "probe": results, "chosen_at": time.time()}
+        write_or_warn(self.store, "transport cache", "a transport probe", lambda: self.store.put(key, entry))
+
+    def forget(self, server_url: str) -> None:
+        """Drop a choice that stopped working, so the next run probes again."""
+        key = self._key(server_url)
+        write_or_warn(self.store, "transport cache", "a transport probe", lambda: self.store.delete(key))
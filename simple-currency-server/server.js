@@ -5,6 +5,72 @@ const BASE_PATH = process.env.BASE_PATH || '';
 
 app.use(express.json());
 
+// Exchange-rate cache: fresh rates are served from memory, stale ones are
+// served while a single background fetch renews them, and the last good
+// rates are used if the upstream API fails.
+const RATES_URL = process.env.RATES_URL || 'https://api.exchangerate-api.com/v4/latest/USD';
+const RATE_TTL_MS = Number(process.env.RATE_TTL_MS || 60000);
+const RATE_MAX_STALE_MS = Number(process.env.RATE_MAX_STALE_MS || 3600000);
+const RATE_RETRY_MS = Number(process.env.RATE_RETRY_MS || 5000);
+const RATE_FETCH_TIMEOUT_MS = Number(process.env.RATE_FETCH_TIMEOUT_MS || 5000);
+
+let rateSnapshot = null;
+let rateRefresh = null;
+let rateFailureAt = 0;
+
+// Concurrent callers share one upstream request
+function refreshRates() {
+  if (!rateRefresh) {
+    rateRefresh = (async () => {
+      try {
+        const response = await fetch(RATES_URL, { signal: AbortSignal.timeout(RATE_FETCH_TIMEOUT_MS) });
+        if (!response.ok) {
+          throw new Error(`Exchange rate API returned ${response.status}`);
+        }
+        const data = await response.json();
+        if (!data?.rates) {
+          throw new Error('Exchange rate API returned no rates');
+        }
+        rateSnapshot = { rates: data.rates, fetchedAt: Date.now() };
+        return rateSnapshot;
+      } catch (error) {
+        rateFailureAt = Date.now();
+        throw error;
+      } finally {
+        rateRefresh = null;
+      }
+    })();
+  }
+  return rateRefresh;
+}
+
+async function getUsdRate(currency = 'INR') {
+  const now = Date.now();
+  const age = rateSnapshot ? now - rateSnapshot.fetchedAt : Infinity;
+  const retryAllowed = now - rateFailureAt >= RATE_RETRY_MS;
+  let snapshot = rateSnapshot;
+
+  if (!snapshot || (age >= RATE_MAX_STALE_MS && retryAllowed)) {
+    try {
+      snapshot = await refreshRates();
+    } catch (error) {
+      if (!rateSnapshot) throw error;
+      console.error('Exchange rate fetch failed, serving last good rates:', error.message);
+      snapshot = rateSnapshot;
+    }
+  } else if (age >= RATE_TTL_MS && retryAllowed) {
+    refreshRates().catch((error) => {
+      console.error('Background exchange rate refresh failed:', error.message);
+    });
+  }
+
+  const rate = snapshot.rates[currency];
+  if (typeof rate !== 'number') {
+    throw new Error(`No exchange rate for ${currency}`);
+  }
+  return rate;
+}
+
 // Health check
 app.get(`${BASE_PATH}/`, (req, res) => {
   res.json({ status: 'healthy', service: 'currency-mcp-server' });
@@ -42,9 +108,7 @@ app.post(`${BASE_PATH}/mcp`, async (req, res) => {
   } else if (method === 'tools/call' && params?.name === 'convert_usd_to_inr') {
     const amount = params.arguments?.amount || 100;
     try {
-      const apiResponse = await fetch('https://api.exchangerate-api.com/v4/latest/USD');
-      const data = await apiResponse.json();
-      const rate = data.rates.INR;
+      const rate = await getUsdRate('INR');
       const converted = amount * rate;
       
       response = {
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cold-start profiling for the short-lived MCP client scripts
+Pass --startup-profile to a client to see where its wall time goes
+"""
+import os
+import sys
+import time
+
+FLAG = '--startup-profile'
+
+# Modules worth knowing about: each costs ~100ms+ to import
+HEAVY_MODULES = ('requests', 'httpx', 'boto3', 'botocore')
+
+
+def parse_args(argv):
+    """Split --startup-profile out of argv; returns (enabled, remaining args)"""
+    args = [arg for arg in argv if arg != FLAG]
+    return len(args) != len(argv), args
+
+
+def process_age():
+    """Seconds since this process was started, or None without /proc"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the ")" closing the command name start at field 3;
+            # starttime is field 22
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfiler:
+    """Record wall time per startup phase.
+
+    Create it first thing in main(); its creation point is where
+    "interpreter + imports" ends. Each mark() closes the phase that
+    started at the previous mark. Disabled profilers do nothing.
+    """
+
+    def __init__(self, enabled=False, budget_ms=None):
+        self.enabled = enabled
+        if budget_ms is None and os.getenv('MCP_STARTUP_BUDGET_MS'):
+            try:
+                budget_ms = float(os.environ['MCP_STARTUP_BUDGET_MS'])
+            except ValueError:
+                print(f"⚠️ Ignoring MCP_STARTUP_BUDGET_MS={os.environ['MCP_STARTUP_BUDGET_MS']!r}; "
+                      "expected milliseconds, e.g. 500")
+        self.budget_ms = budget_ms
+        self.phases = []
+        self._startup = process_age() if enabled else None
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        """Print the profile; returns False if the run went over budget"""
+        if not self.enabled:
+            return True
+
+        rows = []
+        if self._startup is not None:
+            rows.append(("interpreter + imports", self._startup))
+        rows.extend(self.phases)
+        total_ms = sum(seconds for _, seconds in rows) * 1000
+
+        print("\n⏱️  Startup profile")
+        for phase, seconds in rows:
+            print(f"   {phase:<24} {seconds * 1000:9.1f} ms")
+        print(f"   {'total':<24} {total_ms:9.1f} ms")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(f"   heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+        if self.budget_ms is not None and total_ms > self.budget_ms:
+            print(f"   ❌ Over startup budget of {self.budget_ms:.0f} ms")
+            return False
+        return True
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The clients and tools are flat scripts at the repository root; the auth
+# client package is imported from its source tree rather than its wheel
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "simple-auth-client-python"))
+
+from fake_mcp_server import FakeCurrencyServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """A local currency MCP server with no injected latency or errors"""
+    with FakeCurrencyServer(seed=1) as fake:
+        yield fake
+
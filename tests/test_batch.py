@@ -0,0 +1,51 @@
+import asyncio
+
+from mcp_async import AsyncMCPHttpClient
+from mcp_http import MCPHttpClient, match_batch_responses
+
+
+def test_responses_are_matched_to_requests_by_id():
+    payloads = [{"id": 1}, {"id": 2}, {"id": 3}]
+    messages = [{"id": 3, "result": "c"}, {"id": 1, "result": "a"}]
+
+    matched = match_batch_responses(payloads, messages)
+
+    assert [message.get("result") for message in matched] == ["a", None, "c"]
+    assert matched[1]["error"] == "No response for request id 2"
+
+
+def test_an_id_less_error_answers_every_unmatched_request():
+    payloads = [{"id": 1}, {"id": 2}]
+    rejected = {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+
+    assert match_batch_responses(payloads, [{"id": 2, "result": "b"}, rejected]) == [rejected, {"id": 2, "result": "b"}]
+
+
+CALLS = [
+    ("tools/call", {"name": "convert_usd_to_inr", "arguments": {"amount": 1}}),
+    ("tools/list", None),
+    ("tools/call", {"name": "no_such_tool", "arguments": {}}),
+    ("tools/call", {"name": "convert_usd_to_inr", "arguments": {"amount": 3}}),
+]
+
+
+def assert_in_call_order(results):
+    assert results[0]["result"]["content"][0]["text"].startswith("$1 USD")
+    assert [tool["name"] for tool in results[1]["result"]["tools"]][0] == "convert_usd_to_inr"
+    assert results[2]["error"]["message"] == "Unknown tool: no_such_tool"
+    assert results[3]["result"]["content"][0]["text"].startswith("$3 USD")
+
+
+def test_batch_results_follow_call_order(server):
+    with MCPHttpClient(server.url, server.mint_token()) as client:
+        client.initialize({"name": "test", "version": "1.0.0"})
+        assert_in_call_order(client.call_mcp_batch(CALLS))
+
+
+def test_async_batch_results_follow_call_order(server):
+    async def run():
+        async with AsyncMCPHttpClient(server.url, server.mint_token()) as client:
+            await client.initialize({"name": "test", "version": "1.0.0"})
+            return await client.call_mcp_batch(CALLS)
+
+    assert_in_call_order(asyncio.run(run()))
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+from click.testing import CliRunner
+from mcp_simple_auth_client.bench import LatencyHistogram, cli
+
+
+def test_percentiles_are_within_the_bucket_precision():
+    generator = random.Random(1)
+    samples = sorted(generator.lognormvariate(-4, 1) for _ in range(20_000))
+    histogram = LatencyHistogram()
+    for seconds in samples:
+        histogram.record(seconds)
+
+    for percent in (50, 90, 99, 99.9):
+        exact = samples[int(len(samples) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.02)
+    assert histogram.percentile(100) == histogram.max == samples[-1]
+
+
+def test_memory_is_bounded_by_range_not_count():
+    histogram = LatencyHistogram()
+    for _ in range(10_000):
+        histogram.record(0.010)
+        histogram.record(0.020)
+    assert len(histogram._counts) == 2
+    assert histogram.count == 20_000
+
+
+def test_summary_is_in_milliseconds():
+    histogram = LatencyHistogram()
+    for seconds in (0.001, 0.002, 0.003):
+        histogram.record(seconds)
+    summary = histogram.summary()
+    assert summary["count"] == 3
+    assert summary["mean"] == pytest.approx(2.0)
+    assert summary["max"] == pytest.approx(3.0)
+    assert LatencyHistogram().summary()["p99"] == 0.0
+
+
+def test_a_stall_is_backfilled_with_the_requests_it_held_up():
+    corrected = LatencyHistogram()
+    # One 1s stall in a loop that should send every 100ms
+    for _ in range(99):
+        corrected.record_corrected(0.010, expected_interval=0.1)
+    corrected.record_corrected(1.0, expected_interval=0.1)
+
+    # 0.9, 0.8 ... 0.1 would have been seen by the requests that never went out
+    assert corrected.count == 99 + 10
+    assert corrected.percentile(95) > 0.3
+    uncorrected = LatencyHistogram()
+    for _ in range(99):
+        uncorrected.record(0.010)
+    uncorrected.record(1.0)
+    assert uncorrected.percentile(95) < 0.011
+
+
+@pytest.mark.parametrize("argv, problem", [
+    (["--users", "0"], "0 is not in the range x>=1"),
+    (["--mix", "tools/list=0,initialize=0"], "needs at least one weight above 0"),
+    (["--mix", "tools/list=-1,initialize=2"], "must be a finite number >= 0"),
+])
+def test_cli_rejects_runs_that_would_send_nothing(argv, problem):
+    result = CliRunner().invoke(cli, ["--url", "http://127.0.0.1:9/mcp", *argv])
+    assert result.exit_code == 2
+    assert problem in result.output
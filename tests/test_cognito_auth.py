@@ -0,0 +1,67 @@
+import time
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+import cognito_auth
+from fake_mcp_server import FakeCurrencyServer
+
+USERNAME, PASSWORD = "mcptest", "TestPass123!"
+
+
+class Unreachable:
+    """Wraps a Cognito client; the first `failures` calls fail like an unreachable endpoint"""
+
+    def __init__(self, cognito, failures):
+        self.cognito = cognito
+        self.failures = failures
+
+    def admin_initiate_auth(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise EndpointConnectionError(endpoint_url="https://cognito-idp.us-east-1.amazonaws.com/")
+        return self.cognito.admin_initiate_auth(**kwargs)
+
+
+@pytest.fixture
+def cognito():
+    """Cognito stand-in; the server itself is never started"""
+    server = FakeCurrencyServer()
+    yield server
+    cognito_auth.use_cognito_client(None)
+
+
+def credentials(server):
+    return server.signer.user_pool_id, server.signer.client_id, server.cognito.client_secret, USERNAME, PASSWORD
+
+
+def expiring_soon(tmp_path, server):
+    """A token cache whose entry is inside REFRESH_MARGIN but still usable"""
+    cache = cognito_auth.TokenCache(str(tmp_path / "tokens.json"))
+    key = cognito_auth.TokenCache.key(*credentials(server)[:2], USERNAME)
+    with cache.locked(exclusive=True):
+        cache.put(key, {"access_token": "old", "refresh_token": None, "expires_at": time.time() + 120})
+    return cache, key
+
+
+def test_background_refresh_retries_after_a_network_error(tmp_path, cognito, capsys):
+    cognito_auth.use_cognito_client(Unreachable(cognito.cognito, failures=1))
+    cache, key = expiring_soon(tmp_path, cognito)
+
+    cognito_auth._background_refresh(cache, key, *credentials(cognito), retry_delay=0.05)
+    assert "retrying in 0.05s" in capsys.readouterr().out
+
+    deadline = time.time() + 2
+    while time.time() < deadline and cache.get(key)["access_token"] == "old":
+        time.sleep(0.02)
+    assert cache.get(key)["access_token"] != "old"
+
+
+def test_background_refresh_gives_up_when_the_token_is_nearly_out(tmp_path, cognito, capsys):
+    cognito_auth.use_cognito_client(Unreachable(cognito.cognito, failures=1))
+    cache, key = expiring_soon(tmp_path, cognito)
+
+    cognito_auth._background_refresh(cache, key, *credentials(cognito), retry_delay=100)
+
+    assert "the next call renews synchronously" in capsys.readouterr().out
+    assert cache.get(key)["access_token"] == "old"
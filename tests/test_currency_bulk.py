@@ -0,0 +1,43 @@
+import csv
+import io
+import sys
+from decimal import Decimal
+
+import pytest
+
+import currency_bulk
+
+
+class FixedRate:
+    def current(self):
+        return Decimal("83.5")
+
+
+def convert(text, **kwargs):
+    out = io.StringIO()
+    counts = currency_bulk.convert_stream(csv.reader(io.StringIO(text)), csv.writer(out), FixedRate(), **kwargs)
+    return counts, out.getvalue().splitlines()
+
+
+def test_column_by_name_with_a_header():
+    counts, lines = convert('id,usd\n1,"$1,000"\n2,abc\n', column="usd", header=True)
+    assert counts == (1, 1)
+    assert lines == ["id,usd,inr,rate", '1,"$1,000",83500.00,83.5', "2,abc,,"]
+
+
+def test_column_by_index_without_a_header():
+    assert convert("1,2.5\n", column=1) == ((1, 0), ["1,2.5,208.75,83.5"])
+
+
+def test_a_column_name_without_a_header_is_rejected():
+    with pytest.raises(ValueError, match="needs --header"):
+        convert("usd\n1\n", column="usd")
+
+
+def test_cli_rejects_a_column_name_without_header_before_connecting(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["currency_bulk.py", "--column", "usd"])
+    monkeypatch.setattr(currency_bulk, "get_access_token", lambda: pytest.fail("should not authenticate"))
+    with pytest.raises(SystemExit) as exit_info:
+        currency_bulk.main()
+    assert exit_info.value.code == 2
+    assert "--column NAME needs --header" in capsys.readouterr().err
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+import deploy_currency_ecs_only as deploy
+from deploy_plan import DryRunRunner, Stage, StubRunner, hash_json, hash_tree, run_stages
+
+IMAGE_PROBE = ("aws", "ecr", "describe-images")
+STACK_PROBE = ("aws", "cloudformation", "describe-stacks")
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """A stand-in currency-mcp-server/ tree, with the template written under tmp_path"""
+    server_dir = tmp_path / "currency-mcp-server"
+    (server_dir / "src").mkdir(parents=True)
+    (server_dir / "Dockerfile").write_text("FROM node:18-alpine\n")
+    (server_dir / "src" / "index.ts").write_text("console.log('v1');\n")
+    monkeypatch.setattr(deploy, "SERVER_DIR", str(server_dir))
+    monkeypatch.setattr(deploy, "TEMPLATE_PATH", str(tmp_path / "currency-server.json"))
+    return server_dir
+
+
+def deployed(server_dir):
+    """Probe answers saying the current source and template are already deployed"""
+    tag = deploy.image_tag(hash_tree(str(server_dir)))
+    template_hash = hash_json(deploy.build_template(f"{deploy.REGISTRY}/{deploy.REPOSITORY}:{tag}"))
+    return {IMAGE_PROBE: "sha256:abc\n", STACK_PROBE: template_hash + "\n"}
+
+
+def image_uri(runner):
+    build = next(call for call in runner.calls if call[:2] == ["docker", "build"])
+    return build[3]
+
+
+def commands(runner):
+    return [" ".join(call[:3]) for call in runner.calls]
+
+
+def test_unchanged_inputs_skip_every_stage(source):
+    runner = StubRunner(deployed(source))
+
+    assert deploy.main([], runner=runner)
+    assert commands(runner) == ["aws ecr describe-images", "aws cloudformation describe-stacks"]
+
+
+def test_changed_source_builds_pushes_and_deploys(source):
+    runner = StubRunner(deployed(source))
+    (source / "src" / "index.ts").write_text("console.log('v2');\n")
+    # The new tag isn't in ECR yet
+    runner.responses[IMAGE_PROBE] = None
+
+    assert deploy.main([], runner=runner)
+    ran = commands(runner)
+    assert ran.index("docker build -t") < ran.index("docker push " + image_uri(runner))
+    assert ran.index("docker push " + image_uri(runner)) < ran.index("aws cloudformation deploy")
+
+
+def test_image_in_ecr_but_stack_stale_deploys_without_building(source):
+    responses = deployed(source)
+    responses[STACK_PROBE] = "None\n"
+    runner = StubRunner(responses)
+
+    assert deploy.main([], runner=runner)
+    ran = commands(runner)
+    assert "docker build -t" not in ran
+    assert "aws cloudformation validate-template" in ran
+    assert "aws cloudformation deploy" in ran
+
+
+def test_failed_build_blocks_push_and_deploy(source):
+    runner = StubRunner({IMAGE_PROBE: None, STACK_PROBE: None, ("docker", "build"): None})
+
+    stages = deploy.plan_deploy(runner)
+    status = run_stages(stages, runner)
+
+    assert status["build"] == "failed"
+    assert status["push"] == "blocked"
+    assert status["deploy"] == "blocked"
+    # Validation doesn't depend on the image, so it still ran
+    assert status["validate"] == "done"
+    assert not any(call[:2] == ["docker", "push"] for call in runner.calls)
+    assert not deploy.main([], runner=StubRunner({IMAGE_PROBE: None, STACK_PROBE: None, ("docker", "build"): None}))
+
+
+def test_dry_run_executes_nothing_and_writes_no_template(source):
+    runner = StubRunner({IMAGE_PROBE: None, STACK_PROBE: None})
+
+    assert deploy.main(["--dry-run"], runner=runner)
+    # Only the read-only probes reach the real runner
+    assert commands(runner) == ["aws ecr describe-images", "aws cloudformation describe-stacks"]
+    assert not (source.parent / "currency-server.json").exists()
+
+
+def test_dry_run_runner_only_passes_quiet_probes_through():
+    runner = StubRunner()
+    dry = DryRunRunner(runner)
+
+    assert dry(["docker", "push", "x"], "Pushing") == ""
+    assert dry(["aws", "ecr", "describe-images"], "Checking", quiet=True) == ""
+    assert runner.calls == [["aws", "ecr", "describe-images"]]
+
+
+def test_force_rebuilds_and_redeploys_unchanged_inputs(source):
+    runner = StubRunner(deployed(source))
+
+    assert deploy.main(["--force"], runner=runner)
+    assert "docker build -t" in commands(runner)
+    assert "aws cloudformation deploy" in commands(runner)
+
+
+def test_hash_tree_ignores_build_outputs(source):
+    before = hash_tree(str(source))
+    (source / "node_modules").mkdir()
+    (source / "node_modules" / "dep.js").write_text("x")
+    assert hash_tree(str(source)) == before
+    (source / "src" / "rate-cache.ts").write_text("y")
+    assert hash_tree(str(source)) != before
+
+
+def test_independent_stages_run_in_parallel():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow(cmd, description, input=None, quiet=False):
+        with lock:
+            active.append(cmd)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(cmd)
+        return ""
+
+    stages = [Stage("a", "a", ["a"]), Stage("b", "b", ["b"]), Stage("c", "c", ["c"], needs=("a", "b"))]
+    status = run_stages(stages, slow)
+
+    assert status == {"a": "done", "b": "done", "c": "done"}
+    assert max(peak) == 2
+
+
+def test_skipped_stages_unblock_dependents():
+    runner = StubRunner()
+    stages = [Stage("a", "a", ["a"], needed=False), Stage("b", "b", ["b"], needs=("a",))]
+
+    assert run_stages(stages, runner) == {"a": "skipped", "b": "done"}
+
+
+def test_stages_waiting_on_each_other_are_rejected():
+    stages = [Stage("x", "x", ["x"], needs=("y",)), Stage("y", "y", ["y"], needs=("x",))]
+    with pytest.raises(ValueError, match="wait on each other"):
+        run_stages(stages, StubRunner())
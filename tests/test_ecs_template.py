@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import ecs_template
+
+CURRENCY = {"name": "currency", "path": "/currency-nodejs/", "image": "repo/currency:1", "priority": 23}
+WEATHER = {"name": "weather-us", "path": "weather", "image": "repo/weather:1", "priority": 24}
+
+
+def test_each_server_gets_its_own_service_and_autoscaling():
+    template = ecs_template.build_template([CURRENCY, {**WEATHER, "scaling": {"max_tasks": 4}}])
+    resources = template["Resources"]
+
+    assert {name for name in resources if name.endswith("Service")} == {"CurrencyService", "WeatherUsService"}
+    assert resources["CurrencyListenerRule"]["Properties"]["Conditions"][0]["Values"] == ["/currency-nodejs/*"]
+    assert resources["WeatherUsTargetGroup"]["Properties"]["HealthCheckPath"] == "/weather/"
+    # Overrides merge over the defaults instead of replacing the whole section
+    assert resources["WeatherUsScalableTarget"]["Properties"]["MinCapacity"] == 2
+    assert resources["WeatherUsScalableTarget"]["Properties"]["MaxCapacity"] == 4
+    assert "DesiredCount" not in resources["CurrencyService"]["Properties"]
+    assert template["Outputs"]["CurrencyEndpoint"]["Value"] == f"{ecs_template.DEFAULT_BASE_URL}/currency-nodejs/mcp"
+
+
+@pytest.mark.parametrize("spec, problem", [
+    ({"name": "currency", "path": "/c"}, "is missing image, priority"),
+    ({**CURRENCY, "name": "Currency_Server"}, "lowercase letters, digits and dashes"),
+    ({**CURRENCY, "cpu": 256, "memory": 4096}, "no 256 CPU / 4096 MiB task size"),
+    ({**CURRENCY, "scaling": {"min_tasks": 5, "max_tasks": 2}}, "min_tasks <= max_tasks"),
+    ({**CURRENCY, "health_check": {"timeout": 10}}, "timeout must be shorter than its interval"),
+])
+def test_undeployable_specs_are_rejected(spec, problem):
+    with pytest.raises(ValueError, match=problem):
+        ecs_template.normalize_server(spec)
+
+
+def test_servers_may_not_share_a_route():
+    with pytest.raises(ValueError, match="share a priority: 23"):
+        ecs_template.build_template([CURRENCY, {**WEATHER, "priority": 23}])
+    with pytest.raises(ValueError, match="No servers"):
+        ecs_template.build_template([])
+
+
+def test_cli_writes_the_template_or_reports_the_spec(tmp_path, capsys):
+    spec = tmp_path / "servers.json"
+    output = tmp_path / "template.json"
+    spec.write_text(json.dumps({"servers": [CURRENCY, WEATHER]}))
+
+    assert ecs_template.main([str(spec), "-o", str(output)]) == 0
+    assert "WeatherUsService" in json.loads(output.read_text())["Resources"]
+
+    spec.write_text(json.dumps({"servers": [{**CURRENCY, "memory": 3000}]}))
+    assert ecs_template.main([str(spec)]) == 1
+    assert "❌ Invalid spec: currency: Fargate has no 512 CPU / 3000 MiB task size" in capsys.readouterr().err
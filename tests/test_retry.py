@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+
+from mcp_http import MCPHttpClient
+from mcp_retry import CircuitBreaker, CircuitOpenError, LatencyTracker, RetryBudget, RetryPolicy
+
+RATE = ("tools/call", {"name": "get_current_rate", "arguments": {}})
+CONVERT = ("tools/call", {"name": "convert_usd_to_inr", "arguments": {"amount": 1}})
+
+
+def always(error):
+    return True
+
+
+def test_budget_allows_reserve_then_a_fraction_of_calls():
+    budget = RetryBudget(ratio=0.5, reserve=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_breaker_opens_fails_fast_then_probes_once():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(False)
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()
+    # Only one probe goes out while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+
+def policy(**kwargs):
+    return RetryPolicy(base_delay=0, max_delay=0, **kwargs)
+
+
+def test_only_idempotent_calls_are_retried_against_a_failing_server(server):
+    server.error_rate = 1.0
+    retries = policy(budget=RetryBudget(reserve=10), breaker=CircuitBreaker(threshold=100))
+    with MCPHttpClient(server.url, server.mint_token(), retry_policy=retries) as client:
+        assert "503" in client.call_mcp(*CONVERT)["error"]
+        assert retries.budget._tokens == pytest.approx(10.1)
+
+        assert "503" in client.call_mcp(*RATE)["error"]
+        # Two retries after the first attempt, both paid from the budget
+        assert retries.budget._tokens == pytest.approx(10.2 - 2)
+
+
+def test_retry_rides_out_a_flaky_server(server):
+    server.error_rate = 0.3
+    with MCPHttpClient(server.url, server.mint_token(), retry_policy=policy(max_attempts=5)) as client:
+        results = [client.call_mcp(*RATE) for _ in range(20)]
+    assert all("result" in result for result in results)
+
+
+def test_breaker_fails_fast_and_recovers_with_the_server(server):
+    server.error_rate = 1.0
+    retries = policy(max_attempts=1, breaker=CircuitBreaker(threshold=2, cooldown=0.1))
+    with MCPHttpClient(server.url, server.mint_token(), retry_policy=retries) as client:
+        client.call_mcp(*RATE)
+        client.call_mcp(*RATE)
+        assert client.call_mcp(*RATE)["error"].startswith("Circuit open")
+
+        server.error_rate = 0.0
+        time.sleep(0.11)
+        assert "result" in client.call_mcp(*RATE)
+        assert retries.breaker.state == "closed"
+
+
+def test_latency_is_tracked_per_tool():
+    assert RetryPolicy.latency_key("tools/list") == "tools/list"
+    assert RetryPolicy.latency_key(*RATE) == "tools/call:get_current_rate"
+
+    latency = LatencyTracker(min_samples=2)
+    hedging = RetryPolicy(hedge=True, latency=latency)
+    for seconds in (0.01, 0.01, 0.01):
+        latency.observe(RetryPolicy.latency_key(*RATE), seconds)
+    for seconds in (2.0, 2.0, 2.0):
+        latency.observe(RetryPolicy.latency_key(*CONVERT), seconds)
+    assert hedging.hedge_delay("tools/call:get_current_rate") == 0.01
+    assert hedging.hedge_delay("tools/call:convert_usd_to_inr") == 2.0
+
+
+class SlowFirstCopy:
+    """send() whose first copy stalls; later copies answer at once"""
+
+    def __init__(self):
+        self.copies = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.copies += 1
+        if self.copies == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return f"copy {self.copies}"
+
+
+def test_async_hedge_wins_and_cancels_the_slow_copy():
+    send = SlowFirstCopy()
+    hedging = policy(hedge=True, hedge_after=0.05)
+
+    async def run():
+        started = time.monotonic()
+        result = await hedging.acall("tools/list", send, always, idempotent=True)
+        await asyncio.sleep(0)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == "copy 2"
+    assert elapsed < 1
+    assert send.cancelled
+
+
+def test_no_hedge_without_budget():
+    send = SlowFirstCopy()
+    hedging = policy(hedge=True, hedge_after=0.01, budget=RetryBudget(reserve=0))
+
+    async def run():
+        return await asyncio.wait_for(hedging.acall("tools/list", send, always, idempotent=True), 0.2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert send.copies == 1
+
+
+def test_blocking_calls_are_never_hedged():
+    copies = []
+    hedging = policy(hedge=True, hedge_after=0.0)
+
+    def send():
+        copies.append(1)
+        time.sleep(0.05)
+        return "ok"
+
+    assert hedging.call("tools/list", send, always, idempotent=True) == "ok"
+    assert len(copies) == 1
+
+
+def test_sync_client_warns_that_it_will_not_hedge(server, capsys):
+    with pytest.warns(RuntimeWarning, match="Hedging needs the async client"):
+        MCPHttpClient(server.url, server.mint_token(), retry_policy=policy(hedge=True)).close()
+    assert capsys.readouterr().out == ""
+
+
+def test_a_cancelled_probe_does_not_keep_the_circuit_shut():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.01)
+    retries = policy(max_attempts=1, breaker=breaker)
+    breaker.record(False)
+    time.sleep(0.02)
+
+    async def hang():
+        await asyncio.sleep(5)
+
+    async def answer():
+        return "ok"
+
+    async def run():
+        # The half-open probe hangs past the caller's timeout and is cancelled
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(retries.acall("tools/list", hang, always, idempotent=True), 0.05)
+        return await retries.acall("tools/list", answer, always, idempotent=True)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == "closed"
@@ -0,0 +1,48 @@
+from mcp_http import MCPHttpClient
+from mcp_sse import SSEDecoder, iter_jsonrpc_messages, iter_sse_events
+
+STREAM = (
+    b": keep-alive\r\n"
+    b"event: message\r\nid: 7\r\nretry: 1500\r\n"
+    b'data: {"jsonrpc": "2.0",\r\ndata:  "id": 1, "result": {}}\r\n\r\n'
+) + 'data: {"text": "₹83.50"}\n\n'.encode()
+
+
+def feed_all(chunks):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    return events + decoder.close()
+
+
+def test_events_decode_the_same_however_the_stream_is_split():
+    whole = feed_all([STREAM])
+    # One byte at a time splits CRLF pairs and the UTF-8 rupee sign
+    assert feed_all([STREAM[i:i + 1] for i in range(len(STREAM))]) == whole
+    assert [event.data for event in whole] == [
+        '{"jsonrpc": "2.0",\n "id": 1, "result": {}}',
+        '{"text": "₹83.50"}',
+    ]
+    assert (whole[0].event, whole[0].id, whole[0].retry) == ("message", "7", 1500)
+    # The last event id sticks until the server sends another
+    assert whole[1].id == "7"
+
+
+def test_unterminated_trailing_event_is_dropped():
+    events = list(iter_sse_events([b'data: {"id": 1}\n\n', b'data: {"id": 2}']))
+    assert [message["id"] for message in iter_jsonrpc_messages(events)] == [1]
+
+
+def test_batch_array_and_bad_json_in_one_event_each():
+    events = feed_all([b'data: [{"id": 1}, {"id": 2}]\n\n', b"data: not json\n\n"])
+    messages = list(iter_jsonrpc_messages(events))
+    assert [message.get("id") for message in messages[:2]] == [1, 2]
+    assert messages[2]["error"].startswith("Invalid JSON in SSE data")
+
+
+def test_client_reads_sse_responses_from_the_server(server):
+    with MCPHttpClient(server.url, server.mint_token()) as client:
+        client.initialize({"name": "test", "version": "1.0.0"})
+        result = client.call_tool("convert_usd_to_inr", {"amount": 2})
+    assert result["result"]["content"][0]["text"] == f"$2 USD = ₹{2 * server.rate:.2f} INR (Rate: {server.rate})"
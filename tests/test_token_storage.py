@@ -0,0 +1,52 @@
+import asyncio
+import os
+import stat
+import time
+
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+from mcp_simple_auth_client.token_storage import FileTokenStorage
+
+SERVER = "https://auth.example/mcp"
+CLIENT_INFO = OAuthClientInformationFull(client_id="abc", redirect_uris=["http://localhost:3030/callback"])
+
+
+def test_tokens_survive_a_new_process_and_stay_private(tmp_path):
+    path = str(tmp_path / "tokens.json")
+
+    async def run():
+        await FileTokenStorage(SERVER, path).set_tokens(OAuthToken(access_token="t1", expires_in=3600))
+        await FileTokenStorage(SERVER, path).set_client_info(CLIENT_INFO)
+        # A fresh storage stands in for the next process reading the file
+        later = FileTokenStorage(SERVER, path)
+        return later, await later.get_tokens(), await later.get_client_info()
+
+    later, tokens, client_info = asyncio.run(run())
+
+    assert tokens.access_token == "t1"
+    # Writing client info kept the tokens written before it
+    assert client_info.client_id == "abc"
+    assert abs(later.expires_at() - (time.time() + 3600)) < 5
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_entries_are_kept_per_server(tmp_path):
+    path = str(tmp_path / "tokens.json")
+
+    async def run():
+        await FileTokenStorage(SERVER, path).set_tokens(OAuthToken(access_token="t1"))
+        return await FileTokenStorage("https://other.example/mcp", path).get_tokens()
+
+    assert asyncio.run(run()) is None
+
+
+def test_an_unwritable_store_only_warns(tmp_path, capsys):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    storage = FileTokenStorage(SERVER, str(blocker / "tokens.json"))
+
+    async def run():
+        await storage.set_tokens(OAuthToken(access_token="t1"))
+        return await storage.get_tokens()
+
+    assert asyncio.run(run()) is None
+    assert "⚠️ Could not write token store" in capsys.readouterr().out
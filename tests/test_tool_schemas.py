@@ -0,0 +1,74 @@
+from mcp_http import MCPHttpClient
+from tool_schemas import ToolSchemaCache, validate_arguments
+
+CONVERSIONS = {
+    "type": "object",
+    "properties": {"conversions": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"from": {"type": "string"}, "amount": {"type": "number"}},
+            "required": ["from", "amount"],
+        },
+    }},
+    "required": ["conversions"],
+}
+SERVER_V1 = {"name": "currency-converter", "version": "1.0.0"}
+
+
+def test_validation_reports_each_problem_with_its_path():
+    value = {"conversions": [{"from": "USD", "amount": 1}, {"from": 7, "amount": True}, {"amount": 2.5}]}
+
+    assert validate_arguments(CONVERSIONS, value) == [
+        "arguments.conversions[1].from must be of type string",
+        "arguments.conversions[1].amount must be of type number",
+        "arguments.conversions[2].from is required",
+    ]
+    assert validate_arguments(CONVERSIONS, {}) == ["arguments.conversions is required"]
+    assert validate_arguments({"type": "integer"}, 3.0) == []
+    assert validate_arguments({"enum": ["USD", "INR"]}, "EUR") == ["arguments must be one of ['USD', 'INR']"]
+
+
+def test_cache_is_only_served_to_the_same_server_version(tmp_path):
+    cache = ToolSchemaCache(str(tmp_path / "schemas.json"))
+    cache.save("https://a/mcp", SERVER_V1, [{"name": "t"}])
+
+    assert cache.load("https://a/mcp", SERVER_V1) == [{"name": "t"}]
+    assert cache.load("https://a/mcp", {**SERVER_V1, "version": "1.0.1"}) is None
+    assert cache.load("https://b/mcp", SERVER_V1) is None
+    # A second process sees the same file
+    assert ToolSchemaCache(str(tmp_path / "schemas.json")).load("https://a/mcp", SERVER_V1) == [{"name": "t"}]
+
+
+def test_a_paginated_listing_is_not_cached(tmp_path):
+    cache = ToolSchemaCache(str(tmp_path / "schemas.json"))
+    cache.save_listing("https://a/mcp", SERVER_V1, {"tools": [{"name": "t"}], "nextCursor": "2"})
+    assert cache.load("https://a/mcp", SERVER_V1) is None
+
+    cache.save_listing("https://a/mcp", SERVER_V1, {"tools": [{"name": "t"}]})
+    assert cache.load("https://a/mcp", SERVER_V1) == [{"name": "t"}]
+
+
+def test_second_run_lists_tools_from_the_cache(server, tmp_path):
+    cache = ToolSchemaCache(str(tmp_path / "schemas.json"))
+    with MCPHttpClient(server.url, server.mint_token()) as client:
+        client.initialize({"name": "test", "version": "1.0.0"})
+        listed = client.list_tools(cache)
+
+    with MCPHttpClient(server.url, server.mint_token()) as client:
+        client.initialize({"name": "test", "version": "1.0.0"})
+        cached = client.list_tools(cache)
+
+    assert cached["id"] is None
+    assert cached["result"]["tools"] == listed["result"]["tools"]
+
+
+def test_invalid_arguments_are_rejected_without_a_round_trip(server, tmp_path):
+    with MCPHttpClient(server.url, server.mint_token()) as client:
+        client.initialize({"name": "test", "version": "1.0.0"})
+        client.list_tools()
+        server.stop()
+
+        result = client.call_tool("convert_batch", {"amounts": [1, "2"]})
+
+    assert result == {"error": "Invalid arguments for convert_batch: arguments.amounts[1] must be of type number"}
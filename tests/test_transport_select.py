@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+
+from mcp_simple_auth_client import transport_select
+from mcp_simple_auth_client.transport_select import authenticate, fastest, probe_transports
+
+LOGIN_SECONDS = 0.2
+
+
+class FakeServer:
+    """Both transports reach one server; the first initialize waits for a browser login"""
+
+    def __init__(self):
+        self.logged_in = False
+
+    @contextlib.asynccontextmanager
+    async def open_transport(self, transport):
+        yield self, transport, None
+
+
+class FakeSession:
+    def __init__(self, server, transport):
+        self.server = server
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def initialize(self):
+        if not self.server.logged_in:
+            await asyncio.sleep(LOGIN_SECONDS)
+            self.server.logged_in = True
+
+    async def send_ping(self):
+        pass
+
+
+def test_a_login_inside_a_probe_is_cut_off(monkeypatch):
+    monkeypatch.setattr(transport_select, "ClientSession", FakeSession)
+    monkeypatch.setattr(transport_select, "PROBE_TIMEOUT", LOGIN_SECONDS / 4)
+
+    results = asyncio.run(probe_transports(FakeServer().open_transport))
+
+    # The timeout cancelled the login, so the working transport reads as broken
+    assert "error" in results["streamable_http"]
+
+
+def test_logging_in_first_keeps_the_login_out_of_the_probe(monkeypatch):
+    monkeypatch.setattr(transport_select, "ClientSession", FakeSession)
+    monkeypatch.setattr(transport_select, "PROBE_TIMEOUT", LOGIN_SECONDS / 4)
+    server = FakeServer()
+
+    async def run():
+        assert await authenticate(server.open_transport)
+        return await probe_transports(server.open_transport)
+
+    results = asyncio.run(run())
+
+    assert all(result["handshake_ms"] < LOGIN_SECONDS * 1000 for result in results.values())
+    assert fastest(results) in transport_select.TRANSPORTS
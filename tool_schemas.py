@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of tools/list results, keyed by server URL and version
+Lets short-lived clients skip tools/list and check arguments locally
+"""
+import hashlib
+import os
+import time
+
+from file_store import CACHE_DIR, LockedJsonStore
+
+DEFAULT_SCHEMA_PATH = os.path.join(CACHE_DIR, 'mcp-tool-schemas.json')
+
+JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+    'null': type(None),
+}
+
+
+def server_identity(server_info):
+    """The (name, version) a cached tool list is valid for"""
+    server_info = server_info or {}
+    return [server_info.get('name'), server_info.get('version')]
+
+
+class ToolSchemaCache(LockedJsonStore):
+    """tools/list results per server URL.
+
+    An entry is only served while the server reports the same
+    serverInfo name and version it had when the entry was written;
+    a new deployment replaces it on the next miss.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(path or os.getenv('MCP_SCHEMA_CACHE', DEFAULT_SCHEMA_PATH))
+
+    @staticmethod
+    def key(server_url):
+        return hashlib.sha256(server_url.encode('utf-8')).hexdigest()
+
+    def load(self, server_url, server_info):
+        """Return the cached tools for this server version, or None"""
+        if not server_info:
+            return None
+        with self.locked():
+            entry = self.get(self.key(server_url))
+        if entry and entry['server'] == server_identity(server_info):
+            return entry['tools']
+        return None
+
+    def save_listing(self, server_url, server_info, result):
+        """Cache a tools/list result, unless it is only one page of the list"""
+        # A paginated list is incomplete, so it isn't worth caching
+        if not result.get('nextCursor'):
+            self.save(server_url, server_info, result['tools'])
+
+    def save(self, server_url, server_info, tools):
+        if not server_info:
+            return
+        with self.locked(exclusive=True):
+            self.put(self.key(server_url), {
+                'server': server_identity(server_info),
+                'tools': tools,
+                'saved_at': time.time()
+            })
+
+
+def _is_type(value, expected):
+    if isinstance(expected, list):
+        return any(_is_type(value, item) for item in expected)
+    python_type = JSON_TYPES.get(expected)
+    if python_type is None:
+        return True
+    if isinstance(value, bool) and expected in ('integer', 'number'):
+        return False
+    if expected == 'integer' and isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, python_type)
+
+
+def validate_arguments(schema, value, path='arguments'):
+    """Check value against the JSON Schema subset MCP tools use.
+
+    Covers type, required, properties, items and enum; anything else
+    is left for the server to judge. Returns a list of problems.
+    """
+    if not isinstance(schema, dict):
+        return []
+    expected = schema.get('type')
+    if expected is not None and not _is_type(value, expected):
+        return [f"{path} must be of type {expected}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path} must be one of {schema['enum']}"]
+
+    problems = []
+    if isinstance(value, dict):
+        for name in schema.get('required', []):
+            if name not in value:
+                problems.append(f"{path}.{name} is required")
+        for name, subschema in schema.get('properties', {}).items():
+            if name in value:
+                problems.extend(validate_arguments(subschema, value[name], f"{path}.{name}"))
+    elif isinstance(value, list) and isinstance(schema.get('items'), dict):
+        for index, item in enumerate(value):
+            problems.extend(validate_arguments(schema['items'], item, f"{path}[{index}]"))
+    return problems